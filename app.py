@@ -1,10 +1,10 @@
 import streamlit as st
 import os
+import time
 from dotenv import load_dotenv
-from pipeline import run_fakelab_pipeline
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from modules.jobs import get_job_manager, FileSaturee
+from modules.mailer import get_mailer
+from modules.history_store import get_history_store
 
 # Chargement config
 load_dotenv()
@@ -12,7 +12,7 @@ api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
 
 # --- FONCTION EMAIL SÉCURISÉE ---
 def envoyer_rapport_email(destinataire, url, verdict, score):
-    """Envoie le résultat par email via les secrets .env"""
+    """Met le résultat en file d'envoi par email (secrets .env). Retourne un EnvoiMail ou False."""
     # On récupère les identifiants depuis le fichier .env pour la sécurité
     sender_email = os.getenv("EMAIL_USER") 
     sender_password = os.getenv("EMAIL_PASSWORD")
@@ -37,22 +37,35 @@ def envoyer_rapport_email(destinataire, url, verdict, score):
     Groupe 1 - Projet Universitaire.
     """
     
-    msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = destinataire
-    msg['Subject'] = sujet
-    msg.attach(MIMEText(body, 'plain'))
-    
-    try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, destinataire, msg.as_string())
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Erreur mail: {e}")
-        return False
+    # Envoi en arrière-plan (connexion SMTP partagée, ré-essais) : on rend la main tout de suite
+    return get_mailer(sender_email, sender_password).envoyer(destinataire, sujet, body)
+
+# --- AFFICHAGE PROGRESSIF DES ÉTAPES ---
+def afficher_etape(etape, donnees):
+    """Affiche le résultat partiel d'une étape dès qu'il arrive du pipeline."""
+    if etape == "reputation":
+        details = donnees.get('details_reputation', {})
+        st.markdown(f"🌍 **Réputation de la source** : `{donnees['R_source']}/100` "
+                    f"({details.get('status', 'inconnue')})")
+        if details.get('details'):
+            st.caption(details['details'])
+    elif etape == "extraction":
+        st.markdown(f"📰 **Article extrait** ({donnees['methode_extraction']}) : {donnees['titre']}")
+    elif etape == "doublon":
+        st.info(f"♻️ Article quasi identique déjà analysé ({donnees['similarite']:.0%} de similarité) : "
+                f"{donnees['url']}. Fact-Checking et analyse IA repris de cette analyse.")
+    elif etape == "factcheck":
+        if donnees['V_fact'] == "FOUND_FAKE":
+            st.error("🚨 Fact-Checking : information déjà démentie par des vérificateurs.")
+        elif donnees['preuves_factcheck']:
+            st.markdown(f"🔍 **Fact-Checking** : {len(donnees['preuves_factcheck'])} vérification(s) trouvée(s).")
+        else:
+            st.markdown("🔍 **Fact-Checking** : aucune vérification existante.")
+    elif etape == "semantique":
+        if "error" in donnees:
+            st.warning(f"🧠 Analyse IA : {donnees['error']}")
+        else:
+            st.markdown(f"🧠 **Score de risque sémantique** : `{donnees['A_sem']}/100`")
 
 # Configuration de la page
 st.set_page_config(page_title="FAKELAB Scanner", page_icon="🛡️", layout="wide")
@@ -69,22 +82,67 @@ st.divider()
 with st.sidebar:
     st.header("Paramètres")
     st.info("Mode connecté : API Active ✅")
+    file_jobs = get_job_manager().stats()
+    st.caption(f"Analyses en cours : {file_jobs['en_cours']}/{file_jobs['workers']} · "
+               f"en attente : {file_jobs['file_attente']} · regroupées : {file_jobs['regroupes']}")
 
 # --- INITIALISATION DE LA MÉMOIRE (SESSION STATE) ---
 if 'resultat_analyse' not in st.session_state:
     st.session_state.resultat_analyse = None
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'etapes_vues' not in st.session_state:
+    st.session_state.etapes_vues = 0
 
 # --- COEUR DE L'APP ---
 url_input = st.text_input("🔗 Entrez le lien de l'article suspect :", placeholder="https://site-douteux.com/article...")
 
+# Déjà analysée ? (historique persistant, voir la page Historique)
+historique = get_history_store()
+deja = historique.derniere(url_input) if historique and url_input else None
+if deja:
+    st.caption(f"🕘 Déjà analysée le {time.strftime('%d/%m/%Y à %H:%M', time.localtime(deja[1]))} : "
+               f"{deja[2]} (détail dans la page Historique)")
+
 # Bouton d'analyse
 if st.button("Lancer l'Analyse FAKELAB", type="primary"):
     if not url_input:
         st.error("Veuillez entrer une URL.")
     else:
-        with st.spinner('🕵️ Extraction du contenu et vérification des sources...'):
-            # On stocke le résultat dans la session pour qu'il reste affiché
-            st.session_state.resultat_analyse = run_fakelab_pipeline(url_input, api_key)
+        # L'analyse tourne dans la file partagée du serveur : si la même URL est
+        # déjà en cours pour une autre session, on se branche sur cette analyse
+        try:
+            st.session_state.job_id = get_job_manager().soumettre(url_input, api_key).id
+            st.session_state.resultat_analyse = None
+            st.session_state.etapes_vues = 0
+        except FileSaturee:
+            st.error("Le serveur est très sollicité : réessayez dans quelques instants.")
+
+# --- SUIVI DE L'ANALYSE EN COURS (y compris après un rechargement de la page) ---
+# Le fragment se relance seul toutes les ATTENTE_ETAPE secondes : chaque passage
+# attend au plus ce délai une nouvelle étape, sans jamais bloquer le script
+ATTENTE_ETAPE = 0.5
+
+@st.fragment(run_every=ATTENTE_ETAPE)
+def suivre_analyse():
+    job = get_job_manager().job(st.session_state.job_id)
+    if job is None or st.session_state.resultat_analyse is not None:
+        return
+    evenements = job.etapes(st.session_state.etapes_vues, timeout=ATTENTE_ETAPE)
+    st.session_state.etapes_vues = len(evenements)
+    # Chaque étape s'affiche dès qu'elle est prête (la réputation arrive souvent en premier)
+    with st.status('🕵️ Extraction du contenu et vérification des sources...', expanded=True):
+        for etape, donnees in evenements:
+            if etape == "resultat":
+                # On stocke le résultat dans la session pour qu'il reste affiché
+                st.session_state.resultat_analyse = donnees
+            else:
+                afficher_etape(etape, donnees)
+    if st.session_state.resultat_analyse is not None:
+        st.session_state.job_id = None
+        st.rerun()  # page entière : affiche le résultat
+
+suivre_analyse()
 
 # --- AFFICHAGE DES RÉSULTATS (Si disponibles en mémoire) ---
 if st.session_state.resultat_analyse:
@@ -111,6 +169,9 @@ if st.session_state.resultat_analyse:
 
         # Jauge visuelle
         st.progress(result['S_final'] / 100)
+        if result.get('services_degrades'):
+            st.warning("⚡ Service(s) externe(s) indisponible(s), valeur neutre appliquée : "
+                       f"{', '.join(result['services_degrades'])}. Relancez l'analyse plus tard.")
         
         st.divider()
         
@@ -158,16 +219,23 @@ if st.session_state.resultat_analyse:
             st.write("") 
             if st.button("Envoyer le rapport"):
                 if email_user:
-                    with st.spinner("Envoi du mail..."):
-                        # Note: pour que ça marche, configure ton .env (voir plus bas)
-                        succes = envoyer_rapport_email(email_user, url_input, result['verdict'], result['S_final'])
-                        if succes:
-                            st.success("📩 Envoyé !")
-                        else:
-                            st.error("Échec envoi.")
+                    # Note: pour que ça marche, configure ton .env (voir plus bas)
+                    envoi = envoyer_rapport_email(email_user, url_input, result['verdict'], result['S_final'])
+                    if envoi:
+                        st.session_state.envoi_mail = envoi
                 else:
                     st.warning("Email requis.")
 
+        # État du dernier envoi (mis à jour à chaque rafraîchissement de la page)
+        envoi = st.session_state.get('envoi_mail')
+        if envoi is not None:
+            if envoi.etat == "envoye":
+                st.success(f"📩 Envoyé à {envoi.destinataire} !")
+            elif envoi.etat == "echec":
+                st.error(f"Échec envoi : {envoi.erreur}")
+            else:
+                st.info(f"📨 Envoi en cours vers {envoi.destinataire}...")
+
 # --- PIED DE PAGE ---
 st.markdown("---")
 st.caption("FAKELAB © 2025 - UNSTIM Abomey / ENSGMM - Filière GMM-3")
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+FAKELAB - Analyse en lot d'URLs.
+
+Exemples :
+    python batch.py urls.txt -o resultats.jsonl --concurrency 8 --per-host 2
+    cat urls.jsonl | python batch.py - > resultats.jsonl --checkpoint deja_faits.txt
+
+Entrée : un fichier (ou '-' pour stdin) avec une URL par ligne, ou du JSONL
+contenant un champ "url". Sortie : une ligne JSON par URL, écrite dès que
+l'analyse se termine. Les URLs déjà analysées avec succès (fichier de sortie
+ou --checkpoint) sont sautées : un job interrompu reprend là où il s'était arrêté,
+et les URLs en erreur (panne passagère...) sont retentées.
+Sur Ctrl-C, les analyses déjà en cours sont terminées et écrites avant de quitter.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from pipeline import run_fakelab_pipeline
+from modules import local_model, resilience
+from modules.html_store import get_html_store
+from modules.tracing import METRIQUES
+from modules.url_utils import canonicaliser_url
+
+def lire_urls(flux):
+    """Lit les URLs (texte brut ou JSONL), en ignorant lignes vides et commentaires."""
+    for ligne in flux:
+        ligne = ligne.strip()
+        if not ligne or ligne.startswith("#"):
+            continue
+        if ligne.startswith("{"):
+            try:
+                url = json.loads(ligne).get("url")
+            except json.JSONDecodeError:
+                print(f"⚠️ Ligne JSON invalide ignorée : {ligne[:80]}", file=sys.stderr)
+                continue
+            if url:
+                yield url.strip()
+        else:
+            yield ligne
+
+def urls_deja_traitees(chemin_sortie, chemin_checkpoint):
+    """
+    URLs canoniques déjà analysées avec succès, lues depuis la sortie JSONL et/ou le checkpoint.
+    Les lignes en erreur ne comptent pas : ces URLs seront retentées.
+    """
+    faites = set()
+    if chemin_sortie and os.path.exists(chemin_sortie):
+        with open(chemin_sortie, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    donnees = json.loads(ligne)
+                    if "error" not in donnees.get("resultat", {}):
+                        faites.add(canonicaliser_url(donnees["url"]))
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                    continue  # dernière ligne tronquée par un arrêt brutal
+    if chemin_checkpoint and os.path.exists(chemin_checkpoint):
+        with open(chemin_checkpoint, "r", encoding="utf-8") as f:
+            faites.update(l.strip() for l in f if l.strip())
+    return faites
+
+def hote(url):
+    return (urlsplit(url if "://" in url else "http://" + url).hostname or "").lower()
+
+def analyser(url, api_key, use_cache):
+    debut = time.perf_counter()
+    try:
+        resultat = run_fakelab_pipeline(url, api_key, use_cache=use_cache)
+    except Exception as e:
+        resultat = {"error": f"Erreur inattendue : {str(e)}"}
+    return {"url": url, "duree": round(time.perf_counter() - debut, 3), "resultat": resultat}
+
+class BatchRunner:
+    """
+    Planificateur à concurrence bornée : au plus `concurrency` analyses en cours,
+    dont au plus `per_host` sur un même site. Les URLs d'un hôte saturé attendent
+    dans sa file sans bloquer de worker.
+    """
+    def __init__(self, api_key, concurrency=4, per_host=2, use_cache=True):
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.use_cache = use_cache
+        self.en_attente = defaultdict(deque)  # hôte -> URLs en attente de place
+        self.actifs_par_hote = Counter()
+        self.nb_en_attente = 0
+
+    def run(self, urls, on_result):
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fakelab-batch") as pool:
+            futurs = {}
+            try:
+                self._planifier(pool, futurs, iter(urls), on_result)
+            except KeyboardInterrupt:
+                self._vider(pool, futurs, on_result)
+                raise
+
+    def _planifier(self, pool, futurs, urls, on_result):
+        source_epuisee = False
+
+        def lancer(url):
+            h = hote(url)
+            self.actifs_par_hote[h] += 1
+            futurs[pool.submit(analyser, url, self.api_key, self.use_cache)] = h
+
+        while True:
+            # On remplit tant qu'il reste de la place (et un tampon d'attente raisonnable)
+            while (not source_epuisee and len(futurs) < self.concurrency
+                   and self.nb_en_attente < 10 * self.concurrency):
+                url = next(urls, None)
+                if url is None:
+                    source_epuisee = True
+                    break
+                if self.actifs_par_hote[hote(url)] < self.per_host:
+                    lancer(url)
+                else:
+                    self.en_attente[hote(url)].append(url)
+                    self.nb_en_attente += 1
+
+            if not futurs:
+                if source_epuisee and not self.nb_en_attente:
+                    return
+                # Seules restent des URLs en attente : on relance un hôte libre
+                for h, file in list(self.en_attente.items()):
+                    while (file and self.actifs_par_hote[h] < self.per_host
+                           and len(futurs) < self.concurrency):
+                        lancer(file.popleft())
+                        self.nb_en_attente -= 1
+                continue
+
+            termines, _ = wait(futurs, return_when=FIRST_COMPLETED)
+            for futur in termines:
+                h = futurs.pop(futur)
+                self.actifs_par_hote[h] -= 1
+                on_result(futur.result())
+                # Une place vient de se libérer sur cet hôte
+                file = self.en_attente.get(h)
+                if file and len(futurs) < self.concurrency:
+                    lancer(file.popleft())
+                    self.nb_en_attente -= 1
+                    if not file:
+                        del self.en_attente[h]
+
+    def _vider(self, pool, futurs, on_result):
+        """Ctrl-C : plus rien n'est lancé, les analyses en cours vont au bout et sont écrites."""
+        pool.shutdown(wait=False, cancel_futures=True)
+        en_cours = [f for f in futurs if not f.cancelled()]
+        if en_cours:
+            print(f"\n⏳ Arrêt : fin des {len(en_cours)} analyse(s) en cours (Ctrl-C à nouveau pour abandonner)...",
+                  file=sys.stderr)
+        for futur in wait(en_cours).done:
+            if not futur.cancelled():
+                on_result(futur.result())
+        futurs.clear()
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="FAKELAB - Analyse en lot d'URLs")
+    parser.add_argument("entree", help="Fichier d'URLs (texte ou JSONL), '-' pour stdin")
+    parser.add_argument("-o", "--output", help="Fichier JSONL de sortie (sert aussi de point de reprise)")
+    parser.add_argument("--checkpoint", help="Fichier de reprise (URLs terminées), utile si la sortie est stdout")
+    parser.add_argument("--concurrency", type=int, default=4, help="Analyses simultanées (défaut : 4)")
+    parser.add_argument("--per-host", type=int, default=2, help="Analyses simultanées par site (défaut : 2)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore le cache des verdicts")
+    parser.add_argument("--gemini-batch-ms", type=int, default=0,
+                        help="Regroupe les analyses IA simultanées dans une fenêtre de N ms (0 = désactivé)")
+    parser.add_argument("--quiet", action="store_true", help="Masque les logs du pipeline")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
+    if args.gemini_batch_ms:
+        os.environ["FAKELAB_GEMINI_BATCH_MS"] = str(args.gemini_batch_ms)
+    faites = urls_deja_traitees(args.output, args.checkpoint)
+
+    # Les logs du pipeline (print) partent sur stderr : stdout reste du JSONL propre
+    sortie = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    checkpoint = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint else None
+    logs = open(os.devnull, "w") if args.quiet else sys.stderr
+
+    stats = {"ok": 0, "erreurs": 0, "sautees": 0}
+    verdicts = Counter()
+
+    def a_faire():
+        with (open(args.entree, "r", encoding="utf-8") if args.entree != "-" else contextlib.nullcontext(sys.stdin)) as flux:
+            for url in lire_urls(flux):
+                if canonicaliser_url(url) in faites:
+                    stats["sautees"] += 1
+                    continue
+                faites.add(canonicaliser_url(url))  # doublons dans l'entrée
+                yield url
+
+    def on_result(ligne):
+        sortie.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+        sortie.flush()
+        # Une erreur (souvent passagère) n'est pas un point de reprise : l'URL sera retentée
+        if checkpoint and "error" not in ligne["resultat"]:
+            checkpoint.write(canonicaliser_url(ligne["url"]) + "\n")
+            checkpoint.flush()
+        if "error" in ligne["resultat"]:
+            stats["erreurs"] += 1
+            verdicts["ERREUR"] += 1
+        else:
+            stats["ok"] += 1
+            verdicts[ligne["resultat"]["verdict"]] += 1
+
+    runner = BatchRunner(api_key, args.concurrency, args.per_host, use_cache=not args.no_cache)
+    debut = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(logs):
+            runner.run(a_faire(), on_result)
+    except KeyboardInterrupt:
+        print("\n⏹️ Interrompu : relancez la même commande pour reprendre.", file=sys.stderr)
+    finally:
+        duree = time.perf_counter() - debut
+        if args.output:
+            sortie.close()
+        if checkpoint:
+            checkpoint.close()
+
+    traitees = stats["ok"] + stats["erreurs"]
+    print("\n=======================================================", file=sys.stderr)
+    print(f"  {traitees} URL(s) analysée(s) en {duree:.1f}s "
+          f"({traitees / duree if duree else 0:.2f} URL/s)", file=sys.stderr)
+    print(f"  OK : {stats['ok']} | Erreurs : {stats['erreurs']} | Déjà faites : {stats['sautees']}", file=sys.stderr)
+    for verdict, n in verdicts.most_common():
+        print(f"  • {verdict:<18} {n:>6} ({n / traitees:.1%})", file=sys.stderr)
+    tri = local_model.stats()
+    if tri["locales"] + tri["escaladees"] + tri["controles"]:
+        accord = f"{tri['taux_accord']:.1%}" if tri["taux_accord"] is not None else "n/a"
+        print(f"  🧮 Modèle local : {tri['appels_economises']} appel(s) Gemini évité(s) "
+              f"({tri['part_locale']:.1%}) | accord avec Gemini : {accord} "
+              f"sur {tri['comparaisons']} comparaison(s)", file=sys.stderr)
+    pages = get_html_store()
+    if pages is not None:
+        p = pages.stats()
+        if p["revalides_304"] + p["frais"] + p["parsing_repris"]:
+            print(f"  📦 Pages stockées : {p['revalides_304']} revalidée(s) par 304, {p['frais']} fraîche(s), "
+                  f"{p['parsing_repris']} parsing(s) repris | {p['octets_economises'] / 1e6:.1f} Mo évités "
+                  f"| {p['octets_disque'] / 1e6:.1f} Mo sur disque", file=sys.stderr)
+    for service, r in resilience.stats().items():
+        if r["pannes"] + r["rejets_circuit"] + r["rejets_quota"]:
+            print(f"  ⚡ API {service:<10} circuit {r['circuit']} ({r['ouvertures']} ouverture(s)) | "
+                  f"{r['pannes']} panne(s), {r['reessais']} réessai(s), {r['rejets_circuit']} rejet(s) "
+                  f"circuit, {r['rejets_quota']} rejet(s) quota", file=sys.stderr)
+    # Latence par étape (spans agrégés par modules.tracing)
+    for etape, m in METRIQUES.resume().items():
+        print(f"  ⏱ {etape:<18} p50 {m.get('p50_ms', 0):>8.1f} ms | p95 {m.get('p95_ms', 0):>8.1f} ms "
+              f"| p99 {m.get('p99_ms', 0):>8.1f} ms ({m['count']})", file=sys.stderr)
+    print("=======================================================", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
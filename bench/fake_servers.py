@@ -0,0 +1,239 @@
+"""
+FAKELAB - Serveurs factices pour les benchmarks hors ligne.
+
+Un seul serveur HTTP local, plusieurs services (préfixe de chemin) :
+    /sites/...                              articles du corpus (bench/fixtures.py)
+    /factcheck/v1alpha1/claims:search       Google Fact Check Tools
+    /gemini/v1beta/models/<modele>:generateContent   Gemini
+    /wiki/w/api.php                         API MediaWiki
+Latence (ms, avec gigue) et taux d'erreur réglables par service.
+
+    python bench/fake_servers.py --port 8765 --latence gemini=800 --erreurs gemini=0.05
+puis FACTCHECK_API_URL / GEMINI_BASE_URL / WIKIPEDIA_API_URL (voir variables_env()).
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    from bench.fixtures import generer_corpus, TITRES_DEMENTIS
+except ImportError:  # lancé directement : python bench/fake_servers.py
+    from fixtures import generer_corpus, TITRES_DEMENTIS
+
+SERVICES = ("sites", "factcheck", "gemini", "wiki")
+
+# Latences médianes par défaut (ms), proches de ce qu'on observe en production
+LATENCES_DEFAUT = {"sites": 120, "factcheck": 150, "gemini": 1200, "wiki": 200}
+
+# Résumés Wikipédia servis selon le site (mots-clés reconnus par ReputationChecker)
+RESUMES_WIKI = {
+    "quotidien-national": "Le Quotidien national est un journal quotidien d'information générale.",
+    "infos-region": "Infos Région est un site web d'information régional.",
+    "le-petit-eco": "Le Petit Éco est un magazine économique hebdomadaire.",
+    "revue-science": "La Revue Science est publiée par un établissement public de recherche.",
+    "blog-verite": "Blog Vérité est un site connu pour relayer des théories du complot et des fausses nouvelles.",
+    "buzz-du-jour": "Buzz du jour est un site satirique parodique.",
+}
+
+def _empreinte(texte):
+    return int(hashlib.sha256(texte.encode("utf-8")).hexdigest()[:8], 16)
+
+class Config:
+    def __init__(self, latences=None, erreurs=None, nb_articles=60, part_js=0.2, graine=42):
+        self.latences = dict(LATENCES_DEFAUT, **(latences or {}))
+        self.erreurs = {s: 0.0 for s in SERVICES}
+        self.erreurs.update(erreurs or {})
+        self.nb_articles = nb_articles
+        self.part_js = part_js
+        self.graine = graine
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, comme les vrais services
+
+    def log_message(self, *args):
+        pass
+
+    def _envoyer(self, code, corps, type_contenu="application/json; charset=utf-8", entetes=None):
+        donnees = corps.encode("utf-8") if isinstance(corps, str) else corps
+        self.send_response(code)
+        self.send_header("Content-Type", type_contenu)
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _attendre(self, service):
+        """Latence simulée (gigue ±50 %) ; True si on doit répondre par une erreur."""
+        cfg = self.server.config
+        time.sleep(cfg.latences[service] / 1000 * self.server.rng.uniform(0.5, 1.5))
+        return self.server.rng.random() < cfg.erreurs[service]
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        service = url.path.split("/")[1] if url.path.count("/") > 1 else ""
+        if service not in SERVICES or service == "gemini":
+            return self._envoyer(404, '{"error": "not found"}')
+        if self._attendre(service):
+            return self._envoyer(503, '{"error": {"code": 503, "message": "indisponible"}}')
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if service == "sites":
+            return self._site(url.path[len("/sites"):])
+        if service == "factcheck":
+            return self._envoyer(200, json.dumps(self._factcheck(params.get("query", ""))))
+        return self._envoyer(200, json.dumps(self._wiki(params.get("titles", ""))))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        corps = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not url.path.startswith("/gemini/") or ":generateContent" not in url.path:
+            return self._envoyer(404, '{"error": "not found"}')
+        if self._attendre("gemini"):
+            return self._envoyer(503, json.dumps({"error": {
+                "code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}))
+        try:
+            prompt = json.loads(corps)["contents"][0]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError):
+            return self._envoyer(400, '{"error": {"code": 400, "message": "bad request"}}')
+        return self._envoyer(200, json.dumps(self._gemini(prompt), ensure_ascii=False))
+
+    # --- Services ---
+
+    def _site(self, chemin):
+        article = self.server.corpus.get(chemin)
+        if article is None:
+            return self._envoyer(404, "<html><body>Introuvable</body></html>", "text/html; charset=utf-8")
+        # ETag : les requêtes conditionnelles (If-None-Match) reçoivent un 304 sans corps
+        etag = f'"{_empreinte(article["html"])}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._envoyer(304, b"", "text/html; charset=utf-8", {"ETag": etag})
+        return self._envoyer(200, article["html"], "text/html; charset=utf-8", {"ETag": etag})
+
+    def _factcheck(self, requete):
+        if any(requete.strip().lower() == t.lower() for t in TITRES_DEMENTIS):
+            note = "Faux"
+        elif _empreinte(requete) % 5 == 0:
+            note = "Vrai"
+        else:
+            return {}
+        return {"claims": [{
+            "text": requete,
+            "claimDate": "2024-03-01T00:00:00Z",
+            "claimReview": [{
+                "publisher": {"name": "Vérif Locale", "site": "verif.example"},
+                "url": f"https://verif.example/{_empreinte(requete)}",
+                "title": f"Vérification : {requete}",
+                "textualRating": note,
+                "languageCode": "fr",
+            }],
+        }]}
+
+    def _wiki(self, titre):
+        resume = RESUMES_WIKI.get(titre.split(".")[0])
+        if resume is None:
+            return {"batchcomplete": True, "query": {"pages": [{"title": titre, "missing": True}]}}
+        return {"batchcomplete": True, "query": {"pages": [{"pageid": _empreinte(titre), "title": titre,
+                                                            "extract": resume}]}}
+
+    def _gemini(self, prompt):
+        def analyse(texte):
+            h = _empreinte(texte)
+            return {
+                "analyse_subjectivite": {"score": h % 11, "details": "Ton factice."},
+                "analyse_clickbait": {"score": (h >> 4) % 11, "details": "Titre factice."},
+                "analyse_preuves": {"score_manque_preuves": (h >> 8) % 11, "details": "Sources factices."},
+                "synthese_globale": "Analyse générée par le serveur de benchmark.",
+                "verdict_style": "DOUTEUX",
+            }
+        articles = re.findall(r'ARTICLE (\d+) : "', prompt)
+        if articles:
+            reponse = [{"id": int(i), "analyse": analyse(f"{prompt[:200]}{i}")} for i in articles]
+        else:
+            reponse = analyse(prompt)
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": json.dumps(reponse, ensure_ascii=False)}]},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 120},
+        }
+
+def creer_serveur(config, port=0):
+    serveur = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    serveur.daemon_threads = True
+    serveur.request_queue_size = 256
+    serveur.config = config
+    serveur.corpus = generer_corpus(config.nb_articles, config.part_js, config.graine)
+    serveur.rng = random.Random(config.graine)
+    return serveur
+
+def variables_env(base):
+    """Variables d'environnement qui branchent FAKELAB sur les serveurs factices."""
+    return {
+        "FACTCHECK_API_URL": f"{base}/factcheck/v1alpha1/claims:search",
+        "GEMINI_BASE_URL": f"{base}/gemini",
+        "WIKIPEDIA_API_URL": f"{base}/wiki/w/api.php",
+        "GOOGLE_FACT_CHECK_API_KEY": "bench",
+        # Pas de quota côté serveurs factices : on mesure le pipeline, pas nos limites de débit
+        "FAKELAB_QUOTA_GEMINI": "0",
+        "FAKELAB_QUOTA_FACTCHECK": "0",
+        "FAKELAB_QUOTA_WIKI": "0",
+        "NO_PROXY": "127.0.0.1,localhost",
+    }
+
+def _servir(config, file_port):
+    serveur = creer_serveur(config)
+    file_port.put(serveur.server_address[1])
+    serveur.serve_forever()
+
+def demarrer(config):
+    """
+    Lance le serveur dans un processus séparé (il ne partage pas le GIL du code mesuré).
+    Retourne (url de base, processus) ; terminer avec processus.terminate().
+    """
+    contexte = multiprocessing.get_context("spawn")
+    file_port = contexte.Queue()
+    processus = contexte.Process(target=_servir, args=(config, file_port), daemon=True)
+    processus.start()
+    return f"http://127.0.0.1:{file_port.get(timeout=30)}", processus
+
+def lire_reglages(valeurs):
+    """['gemini=800', 'sites=50'] -> {'gemini': 800.0, 'sites': 50.0}"""
+    reglages = {}
+    for valeur in valeurs or []:
+        service, _, nombre = valeur.partition("=")
+        if service not in SERVICES:
+            raise argparse.ArgumentTypeError(f"Service inconnu : {service} (parmi {', '.join(SERVICES)})")
+        reglages[service] = float(nombre)
+    return reglages
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Serveurs factices (benchmarks hors ligne)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latence", action="append", metavar="SERVICE=MS", help="Latence médiane d'un service")
+    parser.add_argument("--erreurs", action="append", metavar="SERVICE=TAUX", help="Taux d'erreur (0-1)")
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--part-js", type=float, default=0.2)
+    args = parser.parse_args()
+
+    config = Config(lire_reglages(args.latence), lire_reglages(args.erreurs), args.articles, args.part_js)
+    serveur = creer_serveur(config, args.port)
+    base = f"http://127.0.0.1:{serveur.server_address[1]}"
+    for nom, valeur in variables_env(base).items():
+        print(f"export {nom}={valeur}")
+    for chemin in list(serveur.corpus)[:3]:
+        print(f"# {base}/sites{chemin}")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+FAKELAB - Corpus d'articles factices pour les benchmarks hors ligne.
+
+Pages générées de façon déterministe (même graine = même corpus), avec la
+forme des vrais sites d'information : menus, barres latérales, publicités,
+métadonnées OpenGraph / JSON-LD, commentaires, pied de page.
+Deux familles :
+  - "statique" : le texte est dans le HTML (Newspaper / Trafilatura / Readability) ;
+  - "js"       : le texte est injecté par JavaScript (seul Selenium le voit).
+"""
+import html
+import json
+import random
+
+MOTS = (
+    "gouvernement ministre projet loi réforme économie croissance emploi région "
+    "santé hôpital école université recherche climat énergie transport route "
+    "élection député sénat budget impôt entreprise marché prix inflation salaire "
+    "agriculture récolte sécheresse pluie football match équipe victoire culture "
+    "festival musique cinéma numérique internet réseau téléphone sécurité police "
+    "justice tribunal enquête rapport étude chercheurs population ville quartier "
+    "habitants maire conseil association syndicat grève accord négociation "
+    "international sommet président diplomatie frontière commerce exportation "
+    "selon les chiffres publiés cette semaine la situation reste préoccupante "
+    "les autorités ont annoncé de nouvelles mesures pour les prochains mois"
+).split()
+
+# Titres « piégés » : le faux Fact Check y répond par une vérification négative
+TITRES_DEMENTIS = [
+    "Un vaccin modifierait l'ADN des enfants selon un rapport secret",
+    "La 5G responsable de la sécheresse dans le nord du pays",
+    "Le gouvernement va supprimer tous les salaires en janvier",
+    "Une pluie de météorites prévue sur la capitale ce week-end",
+]
+
+SITES = ["quotidien-national", "infos-region", "le-petit-eco", "actu-sport",
+         "blog-verite", "revue-science", "radio-locale", "buzz-du-jour"]
+
+def _phrase(rng, n_min=8, n_max=24):
+    mots = [rng.choice(MOTS) for _ in range(rng.randint(n_min, n_max))]
+    return mots[0].capitalize() + " " + " ".join(mots[1:]) + "."
+
+def _paragraphe(rng):
+    return " ".join(_phrase(rng) for _ in range(rng.randint(3, 7)))
+
+def _habillage(rng, site):
+    """Tout ce qui entoure l'article : menus, liens, pubs (bruit pour les parsers)."""
+    menu = "".join(f'<li><a href="/rubrique/{m}">{m.capitalize()}</a></li>'
+                   for m in rng.sample(MOTS, 10))
+    lateral = "".join(f'<li><a href="/article/{rng.randint(1, 9999)}">{html.escape(_phrase(rng, 4, 9))}</a></li>'
+                      for _ in range(8))
+    pub = '<div class="ad-slot" data-ad="top"><iframe src="about:blank" width="728" height="90"></iframe></div>'
+    pied = " | ".join(f'<a href="/{m}">{m}</a>' for m in ("contact", "mentions-legales", "cookies", "abonnement"))
+    return menu, lateral, pub, pied
+
+def _page_statique(rng, site, titre, paragraphes, date):
+    menu, lateral, pub, pied = _habillage(rng, site)
+    corps = "\n".join(f"<p>{html.escape(p)}</p>" for p in paragraphes)
+    commentaires = "".join(f'<div class="comment"><b>lecteur{i}</b> {html.escape(_phrase(rng, 3, 12))}</div>'
+                           for i in range(rng.randint(0, 12)))
+    ld = json.dumps({"@context": "https://schema.org", "@type": "NewsArticle",
+                     "headline": titre, "datePublished": date,
+                     "author": {"@type": "Person", "name": "Rédaction"}}, ensure_ascii=False)
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8">
+<title>{html.escape(titre)} - {site}</title>
+<meta property="og:title" content="{html.escape(titre)}">
+<meta property="og:type" content="article">
+<meta property="article:published_time" content="{date}">
+<script type="application/ld+json">{ld}</script>
+<script src="/static/tracker.js"></script>
+<link rel="stylesheet" href="/static/site.css">
+</head><body>
+<header><div class="logo">{site}</div><nav><ul>{menu}</ul></nav></header>
+{pub}
+<main><article>
+<h1>{html.escape(titre)}</h1>
+<div class="byline">Par la rédaction - <time datetime="{date}">{date}</time></div>
+{corps}
+</article>
+<section class="comments">{commentaires}</section>
+</main>
+<aside><h3>À lire aussi</h3><ul>{lateral}</ul></aside>
+<footer>{pied}</footer>
+</body></html>"""
+
+def _page_js(rng, site, titre, paragraphes, date):
+    """Application monopage : le HTML ne contient qu'un squelette, le texte arrive par script."""
+    menu, _, pub, pied = _habillage(rng, site)
+    donnees = json.dumps({"titre": titre, "date": date, "paragraphes": paragraphes}, ensure_ascii=False)
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{site}</title></head><body>
+<header><nav><ul>{menu}</ul></nav></header>{pub}
+<div id="app"><div class="spinner">Chargement...</div></div>
+<footer>{pied}</footer>
+<script>
+  var d = {donnees};
+  setTimeout(function () {{
+    var a = document.createElement("article");
+    var h = document.createElement("h1"); h.textContent = d.titre; a.appendChild(h);
+    d.paragraphes.forEach(function (t) {{
+      var p = document.createElement("p"); p.textContent = t; a.appendChild(p);
+    }});
+    var app = document.getElementById("app"); app.innerHTML = ""; app.appendChild(a);
+  }}, 300);
+</script>
+</body></html>"""
+
+def generer_corpus(n=60, part_js=0.2, graine=42):
+    """
+    Retourne {chemin: {"html", "titre", "type", "site"}}.
+    Tailles variées (brève, article, long format) ; une partie des titres est « démentie ».
+    """
+    rng = random.Random(graine)
+    corpus = {}
+    for i in range(n):
+        site = SITES[i % len(SITES)]
+        if i % 7 == 3:
+            titre = TITRES_DEMENTIS[i % len(TITRES_DEMENTIS)]
+        else:
+            titre = _phrase(rng, 6, 12).rstrip(".")
+        taille = rng.choices([3, 8, 25, 60], weights=[2, 5, 3, 1])[0]
+        paragraphes = [_paragraphe(rng) for _ in range(taille)]
+        date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(6, 22):02d}:00:00+01:00"
+        est_js = rng.random() < part_js
+        page = (_page_js if est_js else _page_statique)(rng, site, titre, paragraphes, date)
+        corpus[f"/{site}/article-{i}.html"] = {
+            "html": page, "titre": titre, "type": "js" if est_js else "statique", "site": site,
+        }
+    return corpus
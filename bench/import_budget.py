@@ -0,0 +1,92 @@
+"""
+FAKELAB - Budget de temps d'import (démarrage à froid).
+
+Mesure, dans des processus Python neufs, le temps d'import des points d'entrée
+(app Streamlit, CLI batch, workers) et échoue si un budget est dépassé ou si
+une bibliothèque lourde est chargée alors qu'elle devrait l'être à la demande.
+
+    python bench/import_budget.py            # vérifie les budgets
+    python bench/import_budget.py --top 15   # + les imports les plus coûteux
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget (ms, médiane) par module importé à froid.
+# "app" exécute la page Streamlit en mode nu (sans serveur) : streamlit lui-même en est l'essentiel.
+BUDGETS_MS = {
+    "app": 1500,
+    "pipeline": 400,
+    "batch": 450,
+    "modules.extractor": 300,
+    "modules.reputation_checker": 250,
+    "modules.gemini_analyzer": 50,
+    "modules.fact_checker": 250,
+}
+
+# Bibliothèques qui ne doivent être chargées qu'au premier usage
+IMPORTS_DIFFERES = ["newspaper", "trafilatura", "readability", "selenium",
+                    "webdriver_manager", "google.genai", "tldextract", "numpy"]
+
+class DependanceAbsente(Exception):
+    """Le module importe une bibliothèque non installée ici (ex : streamlit)."""
+
+def mesurer(module):
+    """Retourne (temps cumulé en µs, {sous-module: µs}, modules lourds chargés)."""
+    code = (f"import sys, {module}\n"
+            f"print('LOURDS=' + ','.join(m for m in {IMPORTS_DIFFERES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=RACINE, capture_output=True, text=True, timeout=120)
+    if proc.returncode:
+        absent = re.search(r"ModuleNotFoundError: No module named '([^']+)'", proc.stderr)
+        if absent and not absent.group(1).startswith(("modules", "pipeline", "batch")):
+            raise DependanceAbsente(absent.group(1))
+        raise RuntimeError(f"import {module} impossible :\n{proc.stderr[-2000:]}")
+    cumuls = {}
+    for ligne in proc.stderr.splitlines():
+        if not ligne.startswith("import time:") or "|" not in ligne:
+            continue
+        try:
+            _, cumul, nom = ligne.split("|")
+            cumuls[nom.strip()] = int(cumul.strip())
+        except ValueError:
+            continue  # ligne d'en-tête
+    lourds = [m for m in proc.stdout.strip().split("LOURDS=")[-1].split(",") if m]
+    return cumuls.get(module, 0), cumuls, lourds
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Budget de temps d'import")
+    parser.add_argument("--runs", type=int, default=5, help="Mesures par module (médiane)")
+    parser.add_argument("--top", type=int, default=0, help="Affiche les N imports les plus lents")
+    args = parser.parse_args()
+
+    echecs = 0
+    for module, budget in BUDGETS_MS.items():
+        mesures, details, lourds = [], {}, []
+        try:
+            for _ in range(args.runs):
+                total, details, lourds = mesurer(module)
+                mesures.append(total / 1000)
+        except DependanceAbsente as e:
+            # Non compté comme réussi : signalé pour qu'on le mesure là où la dépendance est installée
+            print(f"⏭️ {module:<28} non mesuré ({e} non installé)")
+            continue
+        mediane = statistics.median(mesures)
+        ok = mediane <= budget and not lourds
+        echecs += not ok
+        print(f"{'✅' if ok else '❌'} {module:<28} {mediane:7.1f} ms (budget {budget} ms)")
+        if lourds:
+            print(f"     chargés trop tôt : {', '.join(lourds)}")
+        if args.top:
+            for nom, us in sorted(details.items(), key=lambda x: -x[1])[1:args.top + 1]:
+                print(f"     {us / 1000:7.1f} ms  {nom}")
+
+    sys.exit(1 if echecs else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+FAKELAB - Benchmark hors ligne du pipeline.
+
+Lance les serveurs factices (bench/fake_servers.py : sites, Fact Check, Gemini,
+Wikipédia), puis mesure RobustExtractor.extract, ReputationChecker.check_source
+et run_fakelab_pipeline à plusieurs niveaux de concurrence. Chaque mesure tourne
+dans un processus neuf (caches vides, mémoire isolée) et rapporte débit,
+percentiles de latence, pic de mémoire et durées par étape.
+
+    python bench/pipeline_bench.py                              # compare à bench/baseline.json
+    python bench/pipeline_bench.py --save-baseline              # enregistre la référence
+    python bench/pipeline_bench.py --scenarios pipeline --concurrency 1,8 --latence gemini=300
+    python bench/pipeline_bench.py --erreurs factcheck=0.1 --erreurs gemini=0.05
+
+Code de sortie 1 si une mesure régresse au-delà de --tolerance par rapport à la référence.
+
+La référence dépend de la machine (débit, mémoire) : elle n'est pas versionnée.
+Chacun la génère localement avec --save-baseline avant de mesurer une
+modification, puis relance sans l'option pour comparer.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+from bench import fake_servers
+from bench.fixtures import generer_corpus
+
+SCENARIOS = ("extraction", "reputation", "pipeline")
+BASELINE_DEFAUT = os.path.join(RACINE, "bench", "baseline.json")
+
+# Métriques comparées à la référence : (clé, sens) ; +1 = plus haut est meilleur
+CRITERES = (("debit", +1), ("p95_ms", -1), ("rss_max_mo", -1))
+
+def percentile(valeurs, q):
+    valeurs = sorted(valeurs)
+    if not valeurs:
+        return 0.0
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+# --- Côté processus mesuré ---
+
+def _cibles(scenario, base, nb_requetes, args):
+    """(URL d'échauffement, URLs mesurées) ; les pages JS seulement avec --js (Selenium requis)."""
+    corpus = generer_corpus(args.articles, args.part_js)
+    chemins = [c for c, a in corpus.items() if args.js or a["type"] == "statique"]
+    if scenario == "reputation":
+        # Seul le domaine compte (l'URL n'est jamais téléchargée)
+        urls = [f"https://{corpus[c]['site']}.fr{c}" for c in chemins]
+    else:
+        urls = [f"{base}/sites{c}" for c in chemins]
+    echauffement, urls = urls[0], urls[1:]
+    return echauffement, [urls[i % len(urls)] for i in range(nb_requetes)]
+
+def _appel(scenario, args):
+    """Fonction mesurée pour un scénario ; retourne True si l'appel a abouti."""
+    if scenario == "extraction":
+        from modules.extractor import RobustExtractor
+        extractor = RobustExtractor()
+        return lambda url: extractor.extract(url)[0] is not None
+    if scenario == "reputation":
+        from modules.reputation_checker import ReputationChecker
+        checker = ReputationChecker(use_cache=not args.no_cache)
+        return lambda url: checker.check_source(url)[0] is not None
+    from pipeline import run_fakelab_pipeline
+    return lambda url: "error" not in run_fakelab_pipeline(url, "bench", use_cache=not args.no_cache)
+
+def executer_scenario(scenario, concurrence, base, args):
+    from modules.tracing import METRIQUES
+
+    echauffement, urls = _cibles(scenario, base, args.requetes, args)
+    appel = _appel(scenario, args)
+    latences, erreurs = [], 0
+
+    def mesurer(url):
+        debut = time.perf_counter()
+        try:
+            ok = appel(url)
+        except Exception:
+            ok = False
+        return time.perf_counter() - debut, ok
+
+    # Logs du pipeline (print) masqués ; le résultat passe par un fichier (voir lancer_mesure)
+    with open(os.devnull, "w") as nul, contextlib.redirect_stdout(nul):
+        mesurer(echauffement)  # imports différés, pools, index des domaines
+        METRIQUES.__init__()
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as pool:
+            for duree, ok in pool.map(mesurer, urls):
+                latences.append(duree)
+                erreurs += not ok
+        total = time.perf_counter() - debut
+
+    return {
+        "scenario": scenario,
+        "concurrence": concurrence,
+        "requetes": len(urls),
+        "erreurs": erreurs,
+        "duree_s": round(total, 3),
+        "debit": round(len(urls) / total, 2) if total else 0.0,
+        **{f"p{int(q * 100)}_ms": round(percentile(latences, q) * 1000, 1) for q in (0.5, 0.95, 0.99)},
+        "max_ms": round(max(latences) * 1000, 1) if latences else 0.0,
+        "etapes": METRIQUES.resume(),
+    }
+
+# --- Côté orchestrateur ---
+
+def lancer_mesure(scenario, concurrence, base, args, env):
+    """
+    Processus neuf par mesure ; le pic de mémoire vient de wait4 (RSS max du processus).
+    Le résultat revient par un fichier temporaire, pas par stdout : des threads
+    d'arrière-plan (étapes, Wikipédia, disjoncteurs) peuvent encore y écrire.
+    """
+    fd, chemin_resultat = tempfile.mkstemp(prefix="fakelab-bench-", suffix=".json")
+    os.close(fd)
+    try:
+        return _lancer_worker(scenario, concurrence, base, args, env, chemin_resultat)
+    finally:
+        os.unlink(chemin_resultat)
+
+def _lancer_worker(scenario, concurrence, base, args, env, chemin_resultat):
+    commande = [sys.executable, os.path.abspath(__file__), "--worker", scenario, str(concurrence), base,
+                "--resultat", chemin_resultat, "--requetes", str(args.requetes),
+                "--articles", str(args.articles), "--part-js", str(args.part_js)]
+    commande += ["--js"] * args.js + ["--no-cache"] * args.no_cache
+    proc = subprocess.Popen(commande, cwd=RACINE, env=env, stdout=subprocess.DEVNULL)
+    rss_max_mo = None
+    if hasattr(os, "wait4"):
+        _, statut, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(statut)
+        # ru_maxrss : Ko sous Linux, octets sous macOS
+        rss_max_mo = round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    else:
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"Mesure {scenario}@{concurrence} en échec (code {proc.returncode})")
+    with open(chemin_resultat, "r", encoding="utf-8") as f:
+        resultat = json.load(f)
+    resultat["rss_max_mo"] = rss_max_mo
+    return resultat
+
+def comparer(resultats, reference, tolerance):
+    """Liste des régressions (texte) par rapport à la référence."""
+    regressions = []
+    for cle, mesure in resultats.items():
+        ancienne = reference.get(cle)
+        if not ancienne:
+            continue
+        for critere, sens in CRITERES:
+            avant, apres = ancienne.get(critere), mesure.get(critere)
+            if not avant or apres is None:
+                continue
+            ecart = (apres - avant) / avant
+            if ecart * sens < -tolerance:
+                regressions.append(f"{cle} {critere} : {avant} -> {apres} ({ecart:+.0%})")
+    return regressions
+
+def afficher(resultat, reference):
+    cle = f"{resultat['scenario']}@{resultat['concurrence']}"
+    ancienne = reference.get(cle, {})
+
+    def avec_ecart(critere, fmt):
+        valeur = resultat.get(critere)
+        if valeur is None:
+            return "      n/a"
+        texte = format(valeur, fmt)
+        if ancienne.get(critere):
+            texte += f" ({(valeur - ancienne[critere]) / ancienne[critere]:+.0%})"
+        return texte
+
+    print(f"{cle:<16} {avec_ecart('debit', '7.2f')} req/s | p50 {resultat['p50_ms']:8.1f} ms "
+          f"| p95 {avec_ecart('p95_ms', '8.1f')} ms | p99 {resultat['p99_ms']:8.1f} ms "
+          f"| RSS max {avec_ecart('rss_max_mo', '6.1f')} Mo | erreurs {resultat['erreurs']}/{resultat['requetes']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Benchmark hors ligne")
+    parser.add_argument("--worker", nargs=3, metavar=("SCENARIO", "CONCURRENCE", "BASE"), help=argparse.SUPPRESS)
+    parser.add_argument("--resultat", help=argparse.SUPPRESS)  # fichier du résultat (mode --worker)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Parmi extraction,reputation,pipeline")
+    parser.add_argument("--concurrency", default="1,4,16", help="Niveaux de concurrence (ex : 1,4,16)")
+    parser.add_argument("--requetes", type=int, default=40, help="Appels mesurés par niveau")
+    parser.add_argument("--articles", type=int, default=60, help="Taille du corpus")
+    parser.add_argument("--part-js", type=float, default=0.2, help="Part de pages rendues en JavaScript")
+    parser.add_argument("--js", action="store_true", help="Inclut les pages JS (Chrome / CHROMEDRIVER_PATH requis)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive les caches de verdicts/réputation et le stockage des pages")
+    parser.add_argument("--latence", action="append", metavar="SERVICE=MS", help="Latence médiane d'un service factice")
+    parser.add_argument("--erreurs", action="append", metavar="SERVICE=TAUX", help="Taux d'erreur d'un service factice")
+    parser.add_argument("--baseline", default=BASELINE_DEFAUT, help="Fichier de référence")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistre ces mesures comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Écart toléré avant régression (défaut : 25 %%)")
+    parser.add_argument("-o", "--output", help="Écrit toutes les mesures en JSON")
+    args = parser.parse_args()
+
+    if args.worker:
+        scenario, concurrence, base = args.worker
+        resultat = executer_scenario(scenario, int(concurrence), base, args)
+        with open(args.resultat, "w", encoding="utf-8") as f:
+            json.dump(resultat, f)
+        return
+
+    config = fake_servers.Config(fake_servers.lire_reglages(args.latence),
+                                 fake_servers.lire_reglages(args.erreurs),
+                                 args.articles, args.part_js)
+    base, serveur = fake_servers.demarrer(config)
+
+    reference = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+    elif not args.save_baseline:
+        print(f"ℹ️ Pas de référence ({args.baseline}), aucune comparaison : elle se génère localement "
+              f"(propre à chaque machine) avec --save-baseline, sur la version de départ.")
+
+    resultats = {}
+    try:
+        for scenario in args.scenarios.split(","):
+            for concurrence in [int(c) for c in args.concurrency.split(",")]:
+                with tempfile.TemporaryDirectory(prefix="fakelab-bench-") as cache:
+                    env = dict(os.environ, FAKELAB_CACHE_DIR=cache, **fake_servers.variables_env(base))
+                    env.pop("FAKELAB_TRACE_JSONL", None)
+                    env.pop("FAKELAB_METRICS_FILE", None)
+                    if args.no_cache:
+                        env["FAKELAB_HTML_STORE"] = "0"
+                    resultat = lancer_mesure(scenario, concurrence, base, args, env)
+                resultats[f"{scenario}@{concurrence}"] = resultat
+                afficher(resultat, reference)
+    finally:
+        serveur.terminate()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+        print(f"💾 Référence enregistrée : {args.baseline}")
+        return
+
+    regressions = comparer(resultats, reference, args.tolerance)
+    for r in regressions:
+        print(f"❌ Régression {r}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
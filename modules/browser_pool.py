@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Sélecteurs qui signalent que le corps de l'article est rendu
+SELECTEURS_ARTICLE = "article, [itemprop='articleBody'], .article-body, .entry-content, main"
+
+class _Slot:
+    """Un navigateur du pool et le nombre de pages qu'il a déjà servies."""
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+class BrowserPool:
+    """
+    Pool borné de navigateurs Chrome headless réutilisés d'une requête à l'autre.
+    - Le chemin du chromedriver est résolu UNE fois (ou lu dans CHROMEDRIVER_PATH).
+    - Un navigateur est recyclé après `max_pages` pages ou si sa session est morte
+      (une page trop lente ne suffit pas à le jeter).
+    - `driver_factory` permet d'injecter un autre navigateur (tests, bench local).
+    """
+    def __init__(self, max_size=2, max_pages=50, headless=True, driver_factory=None):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.headless = headless
+        self._driver_factory = driver_factory or self._create_driver
+        self._libres = queue.LifoQueue()  # LIFO : on réutilise le navigateur le plus "chaud"
+        self._places = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._driver_path = None
+        self.stats = {"crees": 0, "recycles": 0, "plantages": 0, "pages": 0}
+
+    def _resolve_driver_path(self):
+        with self._lock:
+            if self._driver_path is None:
+                # Installation automatique du driver (une seule fois par processus)
+                self._driver_path = os.getenv("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+            return self._driver_path
+
+    def _create_driver(self):
+        options = Options()
+        if self.headless:
+            options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        # On rend la main dès que le DOM est prêt, la suite est gérée par attendre_page_prete()
+        options.page_load_strategy = "eager"
+        driver = webdriver.Chrome(service=Service(self._resolve_driver_path()), options=options)
+        driver.set_page_load_timeout(20)
+        return driver
+
+    @contextmanager
+    def checkout(self, timeout=30):
+        """
+        Emprunte un navigateur le temps d'un `with`.
+        Lève TimeoutError si aucun navigateur ne se libère à temps.
+        """
+        if not self._places.acquire(timeout=timeout):
+            raise TimeoutError("Aucun navigateur disponible dans le pool")
+        slot = None
+        try:
+            try:
+                slot = self._libres.get_nowait()
+            except queue.Empty:
+                slot = _Slot(self._driver_factory())
+                self._compter("crees")
+
+            try:
+                yield slot.driver
+            except WebDriverException as e:
+                if not session_vivante(slot.driver, e):
+                    # Navigateur planté / session perdue : on le jette
+                    self._compter("plantages")
+                    self._quit(slot)
+                    slot = None
+                raise
+
+            slot.pages += 1
+            self._compter("pages")
+            if slot.pages >= self.max_pages:
+                self._compter("recycles")
+                self._quit(slot)
+                slot = None
+        finally:
+            if slot is not None:
+                self._libres.put(slot)
+            self._places.release()
+
+    def _compter(self, nom):
+        with self._lock:
+            self.stats[nom] += 1
+
+    def _quit(self, slot):
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Ferme tous les navigateurs inactifs."""
+        while True:
+            try:
+                self._quit(self._libres.get_nowait())
+            except queue.Empty:
+                break
+
+def session_vivante(driver, erreur=None):
+    """
+    Le navigateur répond-il encore après `erreur` ? Un délai de chargement dépassé
+    laisse la session intacte ; sinon on le vérifie par un appel minimal.
+    """
+    if isinstance(erreur, InvalidSessionIdException):
+        return False
+    if isinstance(erreur, TimeoutException):
+        return True
+    try:
+        driver.execute_script("return 1")
+        return True
+    except WebDriverException:
+        return False
+
+def attendre_page_prete(driver, selecteur=SELECTEURS_ARTICLE, delai_max=10.0,
+                        intervalle=0.25, stabilite=3, texte_min=200):
+    """
+    Remplace l'ancien time.sleep(3) : attend que le corps de l'article apparaisse
+    (sélecteur avec assez de texte) OU que le DOM ne bouge plus pendant
+    `stabilite` sondages consécutifs. Ne dépasse jamais `delai_max` secondes.
+    Retourne la raison de l'arrêt : "selecteur", "stable" ou "delai".
+    """
+    fin = time.monotonic() + delai_max
+    derniere_taille = None
+    stable = 0
+    while time.monotonic() < fin:
+        if driver.execute_script("return document.readyState") == "complete":
+            for element in driver.find_elements(By.CSS_SELECTOR, selecteur):
+                if len(element.text or "") >= texte_min:
+                    return "selecteur"
+
+            taille = driver.execute_script(
+                "return document.body ? document.body.innerHTML.length : 0")
+            if taille and taille == derniere_taille:
+                stable += 1
+                if stable >= stabilite:
+                    return "stable"
+            else:
+                stable = 0
+            derniere_taille = taille
+        time.sleep(intervalle)
+    return "delai"
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def get_browser_pool(headless=True):
+    """Pool partagé par tout le processus (taille via FAKELAB_BROWSER_POOL)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = BrowserPool(
+                max_size=int(os.getenv("FAKELAB_BROWSER_POOL", "2")),
+                max_pages=int(os.getenv("FAKELAB_BROWSER_MAX_PAGES", "50")),
+                headless=headless
+            )
+        return _POOL
@@ -0,0 +1,131 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Dossier des caches persistants (partagé entre processus)
+CACHE_DIR = os.getenv("FAKELAB_CACHE_DIR", ".fakelab_cache")
+
+def chemin_cache(nom):
+    """Chemin d'un fichier dans le dossier de cache (créé si besoin)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, nom)
+
+class LRUCache:
+    """
+    Cache mémoire LRU, thread-safe, avec une durée de vie par entrée.
+    Au-delà de `max_entries`, l'entrée la moins récemment utilisée est évincée.
+    """
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteStore:
+    """
+    Table clé -> valeur JSON dans un fichier SQLite, avec expiration et éviction
+    par taille (les entrées les moins récemment lues partent en premier).
+    Une connexion par opération : utilisable depuis plusieurs threads et processus.
+    """
+    def __init__(self, chemin, table, max_bytes=None):
+        self.chemin = chemin
+        self.table = table
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    cle TEXT PRIMARY KEY,
+                    valeur TEXT NOT NULL,
+                    expire REAL,
+                    taille INTEGER NOT NULL,
+                    acces REAL NOT NULL
+                )""")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_acces ON {table}(acces)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.chemin, timeout=10)
+        try:
+            with conn:  # commit / rollback automatique
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        maintenant = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT valeur, expire FROM {self.table} WHERE cle = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < maintenant:
+                conn.execute(f"DELETE FROM {self.table} WHERE cle = ?", (key,))
+                return None
+            conn.execute(f"UPDATE {self.table} SET acces = ? WHERE cle = ?", (maintenant, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        valeur = json.dumps(value, ensure_ascii=False)
+        maintenant = time.time()
+        expire = maintenant + ttl if ttl else None
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (cle, valeur, expire, taille, acces) "
+                f"VALUES (?, ?, ?, ?, ?)",
+                (key, valeur, expire, len(valeur.encode("utf-8")), maintenant))
+            if self.max_bytes:
+                self._evict(conn)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE cle = ?", (key,))
+
+    def _evict(self, conn):
+        """Supprime les entrées expirées puis les moins récemment lues jusqu'à repasser sous max_bytes."""
+        conn.execute(f"DELETE FROM {self.table} WHERE expire IS NOT NULL AND expire < ?", (time.time(),))
+        total = conn.execute(f"SELECT COALESCE(SUM(taille), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for cle, taille in conn.execute(
+                f"SELECT cle, taille FROM {self.table} ORDER BY acces ASC").fetchall():
+            conn.execute(f"DELETE FROM {self.table} WHERE cle = ?", (cle,))
+            total -= taille
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._connect() as conn:
+            n, total = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM {self.table}").fetchone()
+        return {"entrees": n, "octets": total}
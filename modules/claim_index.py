@@ -0,0 +1,274 @@
+"""
+FAKELAB - Index local des vérifications (ClaimReview).
+
+Les vérifications publiées par les fact-checkers sont stockées dans un fichier
+SQLite avec un index plein texte FTS5 : une recherche par titre d'article
+prend quelques millisecondes, sans appel réseau. Les candidats (classement
+BM25) sont ensuite re-classés par pertinence : part des mots du titre
+présents dans la vérification + similarité floue (difflib) avec le texte
+vérifié et les titres des revues.
+
+Alimentation :
+  - exports JSON / JSONL (réponses de l'API Fact Check Tools, ou flux
+    schema.org ClaimReview) :  python -m modules.claim_index ingest export.json
+  - au fil de l'eau : chaque réponse de l'API y est ajoutée (fact_checker).
+
+    python -m modules.claim_index search "titre de l'article"
+    python -m modules.claim_index stats
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from modules.cache import chemin_cache
+from modules.fact_checker import normaliser_requete
+
+CHEMIN_INDEX = os.getenv("FAKELAB_CLAIMS_INDEX")  # défaut : claims.sqlite dans le dossier de cache
+# Pertinence minimale (0-1) d'une vérification pour être retenue
+SEUIL = float(os.getenv("FAKELAB_CLAIMS_SEUIL", "0.6"))
+# Candidats BM25 re-classés par recherche
+MAX_CANDIDATS = 50
+# Mots de la requête gardés (les titres très longs n'apportent rien de plus)
+MAX_MOTS = 32
+
+_MOTS_VIDES = frozenset("""
+le la les l un une des du de d au aux et ou en dans sur sous par pour avec sans ce cet cette ces
+se sa son ses leur leurs qui que qu quoi dont est sont a ont ete etre pas ne n plus il elle ils
+elles on nous vous je tu y c s t m the a an of to in on for and or is are was were be by with
+""".split())
+
+def mots_significatifs(texte):
+    """Mots normalisés (sans accents ni mots vides), dans l'ordre, sans doublons."""
+    vus = []
+    for mot in normaliser_requete(texte).split():
+        if len(mot) > 1 and mot not in _MOTS_VIDES and mot not in vus:
+            vus.append(mot)
+    return vus
+
+def _textes(claim):
+    """Texte vérifié et titres des revues d'un claim (format de l'API)."""
+    textes = [claim.get('text') or ""]
+    textes += [r.get('title') or "" for r in claim.get('claimReview', [])]
+    return [t for t in textes if t]
+
+def pertinence(requete, claim):
+    """Score 0-1 : 60 % couverture des mots de la requête, 40 % similarité floue."""
+    mots = mots_significatifs(requete)
+    textes = _textes(claim)
+    if not mots or not textes:
+        return 0.0
+    presents = set()
+    for texte in textes:
+        presents.update(mots_significatifs(texte))
+    couverture = sum(m in presents for m in mots) / len(mots)
+    requete_norm = " ".join(mots)
+    similarite = max(difflib.SequenceMatcher(None, requete_norm, " ".join(mots_significatifs(t))).ratio()
+                     for t in textes)
+    return round(0.6 * couverture + 0.4 * similarite, 3)
+
+def classer(requete, claims):
+    """Ajoute 'pertinence' à chaque claim et les trie du plus au moins pertinent."""
+    for claim in claims:
+        claim['pertinence'] = pertinence(requete, claim)
+    return sorted(claims, key=lambda c: -c['pertinence'])
+
+def pertinents(claims, seuil=SEUIL):
+    """Claims au-dessus du seuil ; à défaut, le mieux classé (réponse de l'API)."""
+    retenus = [c for c in claims if c.get('pertinence', 1.0) >= seuil]
+    return retenus or claims[:1]
+
+def _cle(claim):
+    """Identifiant stable : URL de la première revue, sinon empreinte du texte vérifié."""
+    for review in claim.get('claimReview', []):
+        if review.get('url'):
+            return review['url']
+    return "sha1:" + hashlib.sha1(normaliser_requete(claim.get('text')).encode("utf-8")).hexdigest()
+
+def depuis_schema_org(item):
+    """Convertit un ClaimReview schema.org (JSON-LD) au format des claims de l'API."""
+    reviewed = item.get('itemReviewed') or {}
+    auteur = reviewed.get('author') or {}
+    editeur = item.get('author') or {}
+    if isinstance(auteur, list):
+        auteur = auteur[0] if auteur else {}
+    if isinstance(editeur, list):
+        editeur = editeur[0] if editeur else {}
+    note = item.get('reviewRating') or {}
+    return {
+        "text": item.get('claimReviewed') or reviewed.get('name') or "",
+        "claimant": auteur.get('name'),
+        "claimDate": reviewed.get('datePublished'),
+        "claimReview": [{
+            "publisher": {"name": editeur.get('name'), "site": editeur.get('url')},
+            "url": item.get('url'),
+            "title": item.get('headline') or item.get('name'),
+            "reviewDate": item.get('datePublished'),
+            "textualRating": note.get('alternateName') or note.get('name') or "",
+            "languageCode": item.get('inLanguage'),
+        }],
+    }
+
+def _extraire_claims(donnees):
+    """Parcourt un export (réponse API, liste, flux DataFeed, ClaimReview isolé)."""
+    if isinstance(donnees, list):
+        for element in donnees:
+            yield from _extraire_claims(element)
+    elif isinstance(donnees, dict):
+        if 'claims' in donnees:
+            yield from _extraire_claims(donnees['claims'])
+        elif 'dataFeedElement' in donnees:
+            for element in donnees['dataFeedElement']:
+                yield from _extraire_claims(element.get('item', []))
+        elif donnees.get('@type') == "ClaimReview":
+            yield depuis_schema_org(donnees)
+        elif 'claimReview' in donnees:
+            yield donnees
+
+def lire_export(chemin):
+    """Claims d'un fichier .json ou .jsonl."""
+    with open(chemin, encoding="utf-8") as f:
+        if chemin.endswith(".jsonl"):
+            for ligne in f:
+                if ligne.strip():
+                    yield from _extraire_claims(json.loads(ligne))
+        else:
+            yield from _extraire_claims(json.load(f))
+
+class ClaimIndex:
+    """
+    Vérifications indexées (table claims + index FTS5 claims_fts).
+    Une connexion par opération : utilisable depuis plusieurs threads et processus.
+    """
+    def __init__(self, chemin=None, seuil=SEUIL):
+        self.chemin = chemin or CHEMIN_INDEX or chemin_cache("claims.sqlite")
+        self.seuil = seuil
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS claims (
+                    cle TEXT PRIMARY KEY,
+                    langue TEXT NOT NULL,
+                    donnees TEXT NOT NULL,
+                    ajoute REAL NOT NULL
+                )""")
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS claims_fts USING fts5(
+                    cle UNINDEXED, texte, titres, tokenize = 'unicode61 remove_diacritics 2'
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.chemin, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ajouter(self, claims, langue=None):
+        """
+        Ajoute ou met à jour des claims (format de l'API). Les claims déjà indexés
+        à l'identique sont ignorés. Retourne le nombre de claims nouveaux ou modifiés.
+        """
+        modifies = 0
+        with self._connect() as conn:
+            for claim in claims:
+                if not claim.get('text') and not claim.get('claimReview'):
+                    continue
+                claim = {k: v for k, v in claim.items() if k != 'pertinence'}
+                cle = _cle(claim)
+                donnees = json.dumps(claim, ensure_ascii=False, sort_keys=True)
+                ligne = conn.execute("SELECT donnees FROM claims WHERE cle = ?", (cle,)).fetchone()
+                if ligne and ligne[0] == donnees:
+                    continue
+                reviews = claim.get('claimReview', [])
+                code = langue or next((r['languageCode'] for r in reviews if r.get('languageCode')), "")
+                conn.execute("INSERT OR REPLACE INTO claims (cle, langue, donnees, ajoute) VALUES (?, ?, ?, ?)",
+                             (cle, code, donnees, time.time()))
+                conn.execute("DELETE FROM claims_fts WHERE cle = ?", (cle,))
+                conn.execute("INSERT INTO claims_fts (cle, texte, titres) VALUES (?, ?, ?)",
+                             (cle, claim.get('text') or "", " ".join(_textes(claim)[1:])))
+                modifies += 1
+        return modifies
+
+    def rechercher(self, requete, langue=None, seuil=None):
+        """Claims pertinents pour `requete`, du plus au moins pertinent (liste vide si aucun)."""
+        mots = mots_significatifs(requete)[:MAX_MOTS]
+        if not mots:
+            return []
+        expression = " OR ".join(f'"{mot}"' for mot in mots)
+        sql = ("SELECT c.donnees FROM claims_fts JOIN claims c ON c.cle = claims_fts.cle "
+               "WHERE claims_fts MATCH ?")
+        params = [expression]
+        if langue:
+            sql += " AND c.langue IN (?, '')"
+            params.append(langue)
+        sql += " ORDER BY bm25(claims_fts, 0.0, 1.0, 0.5) LIMIT ?"
+        params.append(MAX_CANDIDATS)
+        with self._connect() as conn:
+            candidats = [json.loads(d) for (d,) in conn.execute(sql, params)]
+        seuil = self.seuil if seuil is None else seuil
+        return [c for c in classer(requete, candidats) if c['pertinence'] >= seuil]
+
+    def stats(self):
+        with self._connect() as conn:
+            total, dernier = conn.execute("SELECT COUNT(*), MAX(ajoute) FROM claims").fetchone()
+            langues = dict(conn.execute("SELECT langue, COUNT(*) FROM claims GROUP BY langue"))
+        return {"claims": total, "langues": langues, "dernier_ajout": dernier, "chemin": self.chemin}
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+def get_claim_index():
+    """Index partagé du processus (None si désactivé par FAKELAB_CLAIMS=0 ou FTS5 absent)."""
+    global _INDEX
+    if os.getenv("FAKELAB_CLAIMS") == "0":
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            try:
+                _INDEX = ClaimIndex()
+            except sqlite3.Error as e:
+                print(f"⚠️ Index local des vérifications indisponible : {e}")
+                return None
+        return _INDEX
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Index local des vérifications")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("ingest", help="Ajoute des exports JSON / JSONL de ClaimReview")
+    p.add_argument("fichiers", nargs="+")
+    p.add_argument("--langue", help="Code langue si absent des revues (ex : fr)")
+    p = sous.add_parser("search", help="Vérifications pertinentes pour un titre")
+    p.add_argument("titre")
+    p.add_argument("--langue")
+    sous.add_parser("stats", help="Taille de l'index")
+    args = parser.parse_args()
+
+    index = ClaimIndex()
+    if args.commande == "ingest":
+        for fichier in args.fichiers:
+            debut = time.perf_counter()
+            modifies = index.ajouter(lire_export(fichier), langue=args.langue)
+            print(f"📥 {fichier} : {modifies} vérification(s) ajoutée(s) ou mise(s) à jour "
+                  f"en {time.perf_counter() - debut:.1f}s")
+        print(json.dumps(index.stats(), ensure_ascii=False))
+    elif args.commande == "search":
+        debut = time.perf_counter()
+        claims = index.rechercher(args.titre, args.langue)
+        print(f"{len(claims)} résultat(s) en {(time.perf_counter() - debut) * 1000:.1f} ms")
+        for claim in claims:
+            review = (claim.get('claimReview') or [{}])[0]
+            print(f"  {claim['pertinence']:.2f}  [{review.get('textualRating')}] {claim.get('text')}"
+                  f"  ({review.get('url')})")
+    else:
+        print(json.dumps(index.stats(), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import marshal
+import os
+import threading
+import time
+
+SOURCES_PATH = os.getenv("FAKELAB_SOURCES", "sources.json")
+
+# Drapeaux d'un noeud du trie (combinables)
+BLACK = 1           # "exemple.com"   : le domaine ET ses sous-domaines
+BLACK_SUB = 2       # "*.exemple.com" : uniquement les sous-domaines
+WHITE = 4
+WHITE_SUB = 8
+
+FORMAT_VERSION = 1
+
+def _cle(domaine):
+    """'news.exemple.com' -> 'com.exemple.news' (labels inversés)."""
+    return ".".join(reversed(domaine.strip().lower().rstrip(".").split(".")))
+
+class DomainIndex:
+    """
+    Index compilé des listes blanche/noire de sources.json.
+
+    Le trie de suffixes (labels inversés) est aplati dans un dictionnaire :
+    chaque noeud est la clé de son chemin ('bj', 'bj.gouv', 'bj.gouv.presidence'...)
+    et porte des drapeaux. Une recherche coûte donc une lecture de hash par label
+    du nom d'hôte, quelle que soit la taille des listes.
+    La règle la plus spécifique gagne ; à égalité, la liste noire l'emporte.
+    """
+    def __init__(self, noeuds=None):
+        self.noeuds = noeuds or {}
+
+    @classmethod
+    def from_sources(cls, data):
+        noeuds = {}
+        for liste, plein, sous in (("whitelist", WHITE, WHITE_SUB), ("blacklist", BLACK, BLACK_SUB)):
+            for regle in data.get(liste, []):
+                regle = regle.strip().lower()
+                if not regle:
+                    continue
+                if regle.startswith("*."):
+                    cle, drapeau = _cle(regle[2:]), sous
+                else:
+                    cle, drapeau = _cle(regle), plein
+                noeuds[cle] = noeuds.get(cle, 0) | drapeau
+        return cls(noeuds)
+
+    def lookup(self, hote):
+        """Retourne 'blacklist', 'whitelist' ou None pour un nom d'hôte."""
+        labels = hote.strip().lower().rstrip(".").split(".")
+        if labels and labels[0] == "www":
+            labels = labels[1:]
+        labels.reverse()
+
+        trouve = None
+        cle = ""
+        for i, label in enumerate(labels):
+            cle = f"{cle}.{label}" if cle else label
+            drapeaux = self.noeuds.get(cle)
+            if not drapeaux:
+                continue
+            sous_domaine = i < len(labels) - 1  # il reste des labels après ce noeud
+            if drapeaux & BLACK or (sous_domaine and drapeaux & BLACK_SUB):
+                trouve = "blacklist"
+            elif drapeaux & WHITE or (sous_domaine and drapeaux & WHITE_SUB):
+                trouve = "whitelist"
+        return trouve
+
+    def __len__(self):
+        return len(self.noeuds)
+
+    # --- Sérialisation binaire (marshal : chargement en quelques millisecondes) ---
+
+    def save(self, chemin, signature_source):
+        tmp = f"{chemin}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps((FORMAT_VERSION, signature_source, self.noeuds)))
+        os.replace(tmp, chemin)  # écriture atomique
+
+    @classmethod
+    def load(cls, chemin, signature_source):
+        """Retourne l'index compilé, ou None s'il est absent / périmé."""
+        try:
+            with open(chemin, "rb") as f:
+                version, signature, noeuds = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != FORMAT_VERSION or signature != signature_source:
+            return None
+        return cls(noeuds)
+
+def _signature(chemin):
+    st = os.stat(chemin)
+    return [st.st_mtime_ns, st.st_size]
+
+class DomainIndexLoader:
+    """
+    Fournit l'index à jour de sources.json.
+    - Réutilise le fichier compilé (sources.idx) s'il correspond au JSON.
+    - Recompile et recharge à chaud quand sources.json change (vérifié au plus
+      toutes les `intervalle` secondes), sans redémarrer l'application.
+    """
+    def __init__(self, chemin_sources=SOURCES_PATH, chemin_index=None, intervalle=2.0):
+        self.chemin_sources = chemin_sources
+        self.chemin_index = chemin_index or os.path.splitext(chemin_sources)[0] + ".idx"
+        self.intervalle = intervalle
+        self._lock = threading.Lock()
+        self._index = DomainIndex()
+        self._signature = None
+        self._derniere_verif = 0.0
+        self._recharger()
+
+    def get(self):
+        if time.monotonic() - self._derniere_verif >= self.intervalle:
+            self._recharger()
+        return self._index
+
+    def _recharger(self):
+        with self._lock:
+            self._derniere_verif = time.monotonic()
+            try:
+                signature = _signature(self.chemin_sources)
+            except OSError as e:
+                if self._signature is None:
+                    print(f"Erreur chargement DB : {e}")
+                return
+            if signature == self._signature:
+                return
+
+            index = DomainIndex.load(self.chemin_index, signature)
+            if index is None:
+                index = self._compiler(signature)
+                if index is None:
+                    return
+            self._index, self._signature = index, signature
+
+    def _compiler(self, signature):
+        try:
+            with open(self.chemin_sources, "r", encoding="utf-8") as f:
+                index = DomainIndex.from_sources(json.load(f))
+        except Exception as e:
+            print(f"Erreur chargement DB : {e}")
+            return None
+        try:
+            index.save(self.chemin_index, signature)
+        except OSError as e:
+            print(f"Index non sauvegardé ({e})")
+        return index
+
+_LOADER = None
+_LOADER_LOCK = threading.Lock()
+
+def get_domain_index():
+    """Index partagé par tout le processus."""
+    global _LOADER
+    with _LOADER_LOCK:
+        if _LOADER is None:
+            _LOADER = DomainIndexLoader()
+    return _LOADER.get()
+
+def importer_liste(chemin_liste, liste, chemin_sources=SOURCES_PATH):
+    """
+    Ajoute à sources.json les domaines d'une liste externe
+    (un domaine par ligne, ou format fichier hosts '0.0.0.0 domaine').
+    Retourne le nombre de nouvelles entrées.
+    """
+    with open(chemin_sources, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    existants = set(data.get(liste, []))
+    nouveaux = []
+    with open(chemin_liste, "r", encoding="utf-8") as f:
+        for ligne in f:
+            ligne = ligne.split("#", 1)[0].strip()
+            if not ligne:
+                continue
+            domaine = ligne.split()[-1].lower()
+            if "." in domaine and domaine not in existants:
+                existants.add(domaine)
+                nouveaux.append(domaine)
+    data[liste] = data.get(liste, []) + nouveaux
+    with open(chemin_sources, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    return len(nouveaux)
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Index des domaines (sources.json)")
+    sub = parser.add_subparsers(dest="commande", required=True)
+    sub.add_parser("compile", help="Compile sources.json en sources.idx")
+    p_lookup = sub.add_parser("lookup", help="Cherche un nom d'hôte dans l'index")
+    p_lookup.add_argument("hote")
+    p_import = sub.add_parser("import", help="Importe une liste externe dans sources.json")
+    p_import.add_argument("fichier")
+    p_import.add_argument("--liste", choices=["whitelist", "blacklist"], default="blacklist")
+    args = parser.parse_args()
+
+    if args.commande == "import":
+        n = importer_liste(args.fichier, args.liste)
+        print(f"{n} domaine(s) ajouté(s) à la {args.liste}.")
+
+    debut = time.perf_counter()
+    loader = DomainIndexLoader()
+    print(f"Index : {len(loader.get())} règles chargées en {(time.perf_counter() - debut) * 1000:.1f} ms")
+    if args.commande == "lookup":
+        print(f"{args.hote} -> {loader.get().lookup(args.hote)}")
+
+if __name__ == "__main__":
+    main()
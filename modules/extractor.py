@@ -1,66 +1,118 @@
+import re
 import sys
-import requests
-from newspaper import Article
-import trafilatura
-from readability import Document
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from modules import http_client
+from modules.tracing import TRACE_NULLE
+from modules.extractor_router import PARSERS, Plan, get_extractor_router
+from modules.html_store import empreinte_html, get_html_store
+from modules.text_reducer import nettoyer_texte
+from modules.url_utils import domaine
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Pool partagé pour parser le même HTML avec plusieurs bibliothèques en parallèle
+_PARSER_EXECUTOR = ThreadPoolExecutor(max_workers=6, thread_name_prefix="fakelab-parser")
+# Texte resté en HTML (sortie brute d'un parser)
+_BALISE = re.compile(r"<\s*/?\s*(html|body|div|p|br|span|article|section)\b", re.I)
 
 class RobustExtractor:
     def __init__(self, headless_browser=True):
         self.headless = headless_browser
 
-    def extract(self, url):
+    def extract(self, url, trace=TRACE_NULLE):
         """
-        Tente d'extraire le contenu via une stratégie en cascade.
+        Télécharge la page UNE SEULE FOIS, puis fait parser ce même HTML par
+        Newspaper3k, Trafilatura et Readability en parallèle ; le résultat retenu
+        suit l'ordre de préférence de la cascade d'origine (voir _parse_parallel).
+        Selenium reste le dernier recours (sites dynamiques).
+        Les méthodes essayées, et leur ordre, suivent le plan du domaine appris
+        des extractions précédentes (voir modules/extractor_router.py).
+        Une page déjà stockée (modules/html_store.py) est revalidée par requête
+        conditionnelle : inchangée, son extraction précédente est reprise telle quelle.
+        Le résultat contient 'stats_extraction' : octets téléchargés, durée de chaque parser et plan suivi.
+        Chaque tentative est aussi enregistrée comme span dans `trace` (voir modules/tracing.py).
         """
         print(f"\n🔍 Analyse de : {url}")
-        
-        # 1. Newspaper3k
-        print("   [1/4] Tentative Newspaper3k...", end="")
-        try:
-            data = self._try_newspaper(url)
-            if self._validate(data):
-                print("  Succès")
-                return data, "Newspaper3k"
-            print("  Contenu vide/incomplet")
-        except Exception as e:
-            print(f"  Échec ({str(e)})")
+        store = get_html_store()
+        entree = store.get(url) if store else None
+        if entree and entree["extraction"] and entree["frais"]:
+            # Revalidée il y a moins de FAKELAB_HTML_FRAIS secondes : aucune requête
+            store.compter("frais")
+            print("   Page stockée localement, revalidée récemment")
+            return self._depuis_stockage(entree["extraction"], {"octets": 0, "durees_parsers": {},
+                                                                 "stockage": "frais",
+                                                                 "empreinte_html": entree["empreinte"]})
 
-        # 2. Trafilatura
-        print("   [2/4] Tentative Trafilatura...", end="")
+        router = get_extractor_router()
+        plan = router.planifier(url) if router else Plan(domaine(url))
+        stats = {"octets": 0, "durees_parsers": {}, "routage": plan.to_dict()}
+        essais = []  # (méthode, succès, durée) pour les statistiques du domaine
+        if plan.mode != "complet":
+            print(f"   Routage {plan.domaine} : {plan.raison}")
         try:
-            data = self._try_trafilatura(url)
-            if self._validate(data):
-                print("  Succès")
-                return data, "Trafilatura"
-            print("  Contenu vide")
-        except Exception as e:
-            print(f"  Échec ({str(e)})")
+            data, method = self._extract_selon_plan(url, plan, stats, essais, trace, store, entree)
+        finally:
+            if router:
+                try:
+                    router.enregistrer(plan.domaine, essais)
+                except Exception as e:
+                    print(f"   Erreur statistiques de routage : {e}")
+        # Seule une extraction propre (vrai titre, texte sans HTML) est rejouée sans re-parsing
+        if data and store and not stats.get("extraction_reprise") and self._qualite(data):
+            try:
+                store.enregistrer_extraction(url, data, method)
+            except Exception as e:
+                print(f"   Erreur stockage de la page : {e}")
+        return data, method
 
-        # 3. Readability (Legacy)
-        print("   [3/4] Tentative Readability...", end="")
-        try:
-            data = self._try_readability(url)
-            if self._validate(data):
-                print("  Succès")
-                return data, "Readability"
-            print("  Contenu vide")
-        except Exception as e:
-            print(f" Échec ({str(e)})")
+    def _extract_selon_plan(self, url, plan, stats, essais, trace, store=None, entree=None):
+        # 1. Téléchargement unique du HTML brut : conditionnel si la page est déjà stockée,
+        #    inutile si le plan va droit à Selenium et que la page est inconnue
+        html = None
+        if plan.telecharger or entree:
+            print("   [1/3] Téléchargement HTML...", end="")
+            try:
+                html, reprise = self._telecharger(url, store, entree, stats, trace)
+                print(f"  {stats['octets']} octets" + (f" ({stats['stockage']})" if "stockage" in stats else ""))
+                if reprise:
+                    # Page inchangée depuis le dernier parsing réussi : rien à refaire
+                    return self._depuis_stockage(reprise, stats)
+            except Exception as e:
+                print(f"  Échec ({str(e)})")
 
-        # 4. Selenium (Dynamic)
-        print("   [4/4] Tentative Selenium (Pour sites dynamiques)...")
+        # 2. Parsing parallèle du même buffer, puis les parsers de secours
+        if html and plan.telecharger:
+            for vague in (plan.parsers, plan.secours):
+                if not vague:
+                    continue
+                print(f"   [2/3] Parsing parallèle ({' / '.join(vague)})...")
+                data, method = self._parse_parallel(url, html, stats, trace, vague, essais)
+                if data:
+                    print(f"     Succès {method}")
+                    data["stats_extraction"] = stats
+                    return data, method
+                print(f"     Contenu vide/incomplet pour {len(vague)} parser(s)")
+
+        if not plan.selenium:
+            print("   [3/3] Selenium sauté (jamais efficace sur ce domaine)")
+            return None, "FAILED"
+
+        # 3. Selenium (Dynamic)
+        print("   [3/3] Tentative Selenium (Pour sites dynamiques)...")
+        debut = time.perf_counter()
         try:
-            data = self._try_selenium(url)
+            with trace.span("extraction.Selenium") as span:
+                data = self._try_selenium(url)
+                span.issue = "valide" if self._validate(data) else "vide"
+            stats["durees_parsers"]["Selenium"] = round(time.perf_counter() - debut, 3)
+            essais.append(("Selenium", self._qualite(data), stats["durees_parsers"]["Selenium"]))
             if self._validate(data):
                 print("     Succès Selenium")
+                data["stats_extraction"] = stats
                 return data, "Selenium"
             print("      Contenu vide même avec Selenium")
         except Exception as e:
+            stats["durees_parsers"]["Selenium"] = round(time.perf_counter() - debut, 3)
+            essais.append(("Selenium", False, stats["durees_parsers"]["Selenium"]))
             print(f"      Échec Selenium ({str(e)})")
 
         return None, "FAILED"
@@ -71,69 +123,188 @@ class RobustExtractor:
             return False
         return len(data['texte'].strip()) > 50  # Au moins 50 caractères
 
-    def _try_newspaper(self, url):
-        article = Article(url)
-        article.download()
+    def _qualite(self, data):
+        """
+        Extraction utilisable seule (note de la méthode pour le routage) : texte valide,
+        sans HTML, et un vrai titre, qui sert ensuite de requête au Fact-Checking.
+        """
+        return self._validate(data) and bool(data.get('titre')) and not _BALISE.search(data['texte'])
+
+    def _telecharger(self, url, store, entree, stats, trace=TRACE_NULLE):
+        """
+        Télécharge la page et la stocke. Si elle est déjà stockée, la requête est
+        conditionnelle (ETag / Last-Modified) : un 304 ne coûte aucun octet.
+        Retourne (html, extraction reprise du stockage ou None).
+        """
+        entetes = {}
+        if entree:
+            if entree["etag"]:
+                entetes["If-None-Match"] = entree["etag"]
+            if entree["last_modified"]:
+                entetes["If-Modified-Since"] = entree["last_modified"]
+        with trace.span("extraction.telechargement") as span:
+            html, stats["octets"], validateurs = self._fetch_html(url, entetes)
+            span.set(octets=stats["octets"])
+            if html is None:
+                span.issue = "304"
+        # Empreinte du HTML : valide le verdict en cache quel que soit le parser retenu
+        stats["empreinte_html"] = entree["empreinte"] if html is None else empreinte_html(html)
+        if store is None:
+            return html, None
+
+        if html is None:  # 304 Not Modified
+            store.revalider(url)
+            store.compter("revalides_304")
+            store.compter("octets_economises", entree["octets"])
+            stats["stockage"] = "304"
+            return entree["html"], entree["extraction"]
+        store.compter("modifies" if entree else "absents")
+        if store.enregistrer_html(url, html, stats["octets"], **validateurs):
+            # Serveur sans validateurs, mais HTML identique : le parsing est repris
+            store.compter("parsing_repris")
+            stats["stockage"] = "html_identique"
+            return html, entree["extraction"]
+        return html, None
+
+    def _fetch_html(self, url, entetes=None):
+        """
+        Télécharge le HTML brut. Retourne (html, nombre d'octets reçus, validateurs),
+        html valant None si le serveur répond 304 à une requête conditionnelle.
+        """
+        # Client HTTP partagé : connexion keep-alive réutilisée, gzip/brotli transparent
+        response = http_client.get(url, timeout=10, headers=entetes or None)
+        if response.status_code == 304:
+            return None, 0, {}
+        response.raise_for_status()
+        # Sans charset dans l'en-tête, requests suppose ISO-8859-1 : on laisse deviner l'encodage
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            response.encoding = response.apparent_encoding
+        validateurs = {"etag": response.headers.get("ETag"),
+                       "last_modified": response.headers.get("Last-Modified")}
+        return response.text, len(response.content), validateurs
+
+    @staticmethod
+    def _depuis_stockage(extraction, stats):
+        data = dict(extraction["data"])
+        stats["extraction_reprise"] = True
+        data["stats_extraction"] = stats
+        print(f"     Extraction reprise du stockage local ({extraction['methode']})")
+        return data, extraction["methode"]
+
+    def _parse_parallel(self, url, html, stats, trace=TRACE_NULLE, noms=None, essais=None):
+        """
+        Lance les parsers `noms` (les 3 par défaut) en parallèle sur le même HTML. Le résultat
+        ne dépend pas de l'ordre d'arrivée : c'est le premier valide dans l'ordre de PARSERS
+        (Newspaper3k, puis Trafilatura, puis Readability, comme la cascade d'origine) ;
+        sans titre, il prend celui du parser suivant qui en a trouvé un.
+        Les parsers devenus inutiles sont abandonnés (leur durée n'est pas reportée).
+        """
+        parsers = {
+            "Newspaper3k": lambda: self._parse_newspaper(url, html),
+            "Trafilatura": lambda: self._parse_trafilatura(html),
+            "Readability": lambda: self._parse_readability(html),
+        }
+        noms = [nom for nom in PARSERS if nom in (noms or PARSERS)]
+        futurs = {nom: _PARSER_EXECUTOR.submit(self._chrono, parsers[nom]) for nom in noms}
+        recoltes = set()
+
+        def recolter(nom):
+            recoltes.add(nom)
+            data, duree, erreur = futurs[nom].result()
+            stats["durees_parsers"][nom] = duree
+            valide = not erreur and self._validate(data)
+            if essais is not None:
+                essais.append((nom, valide and self._qualite(data), duree))
+            trace.ajouter(f"extraction.{nom}", duree,
+                          issue="erreur" if erreur else ("valide" if valide else "vide"))
+            if erreur:
+                print(f"      {nom} : Échec ({erreur})")
+            return data, valide
+
+        retenu = None
+        try:
+            for nom in noms:
+                data, valide = recolter(nom)
+                if retenu is None and valide:
+                    retenu = (data, nom)
+                elif retenu is not None and data and data.get("titre"):
+                    retenu[0]["titre"] = data["titre"]
+                if retenu is not None and retenu[0].get("titre"):
+                    break
+            # Parsers déjà terminés mais pas attendus : comptés quand même pour le routage
+            for nom in noms:
+                if nom not in recoltes and futurs[nom].done():
+                    recolter(nom)
+        finally:
+            for futur in futurs.values():
+                futur.cancel()
+        return retenu or (None, None)
+
+    @staticmethod
+    def _chrono(fn):
+        """Exécute un parser et mesure sa durée. Retourne (data, durée, erreur)."""
+        debut = time.perf_counter()
+        try:
+            data, erreur = fn(), None
+        except Exception as e:
+            data, erreur = None, str(e)
+        return data, round(time.perf_counter() - debut, 3), erreur
+
+    # Les bibliothèques de parsing (et Selenium) sont importées au premier usage :
+    # importer le module ne coûte presque rien.
+
+    def _parse_newspaper(self, url, html):
+        from newspaper import Article
+        article = Article(url) # URL juste pour référence
+        article.download(input_html=html)
         article.parse()
         return {
-            "titre": article.title,
+            "titre": article.title or None,
             "texte": article.text,
             "image": article.top_image,
             "date": str(article.publish_date)
         }
 
-    def _try_trafilatura(self, url):
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded is None:
+    def _parse_trafilatura(self, html):
+        import trafilatura
+        # Même texte que trafilatura.extract, avec les métadonnées (titre, date, image)
+        doc = trafilatura.bare_extraction(html, with_metadata=True)
+        if doc is None:
             return None
-        text = trafilatura.extract(downloaded)
-        # Trafilatura extrait moins de métadonnées par défaut, on se focus sur le texte
+        doc = doc.as_dict() if hasattr(doc, "as_dict") else doc  # Document (>= 1.9) ou dict
         return {
-            "titre": "Titre (via Trafilatura)", 
-            "texte": text,
-            "image": None,
-            "date": None
+            "titre": doc.get("title") or None,
+            "texte": doc.get("text"),
+            "image": doc.get("image"),
+            "date": doc.get("date")
         }
 
-    def _try_readability(self, url):
-        response = requests.get(url, timeout=10)
-        doc = Document(response.text)
+    def _parse_readability(self, html):
+        from readability import Document
+        doc = Document(html)
+        titre = doc.short_title()  # sans le « - Nom du site » de la balise <title>
         return {
-            "titre": doc.title(),
-            "texte": doc.summary(), # Readability donne du HTML souvent, à nettoyer si besoin
+            "titre": titre if titre and titre != "[no-title]" else None,
+            "texte": nettoyer_texte(doc.summary()), # Readability donne du HTML : texte brut, paragraphes gardés
             "image": None,
             "date": None
         }
 
     def _try_selenium(self, url):
-        options = Options()
-        if self.headless:
-            options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        
-        # Installation automatique du driver
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        
-        try:
+        from modules.browser_pool import get_browser_pool, attendre_page_prete
+        # Navigateur emprunté au pool partagé (pas de démarrage de Chrome à chaque article)
+        pool = get_browser_pool(self.headless)
+        with pool.checkout() as driver:
             driver.get(url)
-            time.sleep(3) # Attente chargement JS
+            attendre_page_prete(driver) # Attente chargement JS (corps d'article ou DOM stable)
             
             # On réutilise Newspaper sur le HTML rendu par Selenium !
             # C'est une astuce puissante : Selenium charge, Newspaper parse.
             html = driver.page_source
-            article = Article(url) # URL juste pour référence
-            article.download(input_html=html)
-            article.parse()
-            
-            return {
-                "titre": article.title,
-                "texte": article.text,
-                "image": article.top_image,
-                "date": None
-            }
-        finally:
-            driver.quit()
+
+        data = self._parse_newspaper(url, html)
+        data["date"] = None
+        return data
 
 def main():
     print("=======================================================")
@@ -151,6 +322,8 @@ def main():
         if result:
             print(f"\n EXTRACTION RÉUSSIE via [{method}]")
             print(f"Titre : {result['titre']}")
+            stats = result.get('stats_extraction', {})
+            print(f"Stats : {stats.get('octets', 0)} octets, parsers {stats.get('durees_parsers', {})}")
             
             # Affichage partiel
             preview = result['texte'][:300].replace('\n', ' ') if result['texte'] else "Pas de texte"
@@ -0,0 +1,224 @@
+"""
+FAKELAB - Routage adaptatif des méthodes d'extraction, par domaine.
+
+Pour chaque domaine et chaque méthode (Newspaper3k, Trafilatura, Readability,
+Selenium), on garde dans SQLite un taux de succès et une latence en moyenne
+mobile exponentielle : les dernières extractions pèsent le plus, le routage
+suit donc un site qui change de mise en page.
+
+Une méthode réussit quand son extraction est utilisable seule : texte
+valide sans HTML et vrai titre (RobustExtractor._qualite).
+
+Le plan d'un domaine connu :
+  - parsers statiques jamais valides mais Selenium efficace : Selenium direct,
+    sans téléchargement ni parsing inutiles (sites rendus en JavaScript) ;
+  - un parser fiable (>= 90 %) : lui seul d'abord, les autres en secours ;
+  - parsers ou Selenium toujours en échec : relégués en secours / sautés.
+Une part des extractions (FAKELAB_ROUTAGE_EXPLORATION, défaut 10 %) suit le
+plan complet pour remettre les statistiques à jour.
+
+    python -m modules.extractor_router stats [domaine]
+    python -m modules.extractor_router plan https://exemple.com/article
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from modules.cache import chemin_cache
+from modules.url_utils import domaine
+
+PARSERS = ("Newspaper3k", "Trafilatura", "Readability")
+SELENIUM = "Selenium"
+
+# Part des extractions qui suivent le plan complet (exploration)
+EXPLORATION = float(os.getenv("FAKELAB_ROUTAGE_EXPLORATION", "0.1"))
+# Essais nécessaires avant de faire confiance aux statistiques d'une méthode
+MIN_ESSAIS = 5
+# Poids de la dernière issue dans le taux de succès et la latence
+ALPHA = 0.2
+SEUIL_FIABLE = 0.9
+SEUIL_INUTILE = 0.1
+# Version des statistiques : les versions antérieures sont effacées à l'ouverture.
+# v2 : succès = texte propre ET vrai titre (la v1 notait le parser le plus rapide
+# à rendre 50 caractères, titre factice compris).
+VERSION_STATS = 2
+
+class Plan:
+    """Ordre d'essai des méthodes pour une URL."""
+    def __init__(self, domaine, parsers=PARSERS, secours=(), selenium=True, raison="plan complet",
+                 exploration=False):
+        self.domaine = domaine
+        self.parsers = list(parsers)    # lancés en parallèle sur le HTML téléchargé
+        self.secours = list(secours)    # lancés seulement si aucun des premiers n'est valide
+        self.selenium = selenium        # dernier recours autorisé
+        self.raison = raison
+        self.exploration = exploration
+
+    @property
+    def telecharger(self):
+        return bool(self.parsers or self.secours)
+
+    @property
+    def mode(self):
+        if not self.telecharger:
+            return "selenium_direct"
+        if len(self.parsers) == 1:
+            return "parser_unique"
+        return "complet" if len(self.parsers) == len(PARSERS) and self.selenium else "parallele"
+
+    def to_dict(self):
+        return {"domaine": self.domaine, "mode": self.mode, "parsers": self.parsers,
+                "secours": self.secours, "selenium": self.selenium, "raison": self.raison}
+
+class ExtractorRouter:
+    """
+    Statistiques par (domaine, méthode) et plans d'extraction.
+    Une connexion SQLite par opération : partagé entre threads et processus.
+    """
+    def __init__(self, chemin=None, exploration=EXPLORATION):
+        self.chemin = chemin or chemin_cache("routage_extraction.sqlite")
+        self.exploration = exploration
+        self._lock = threading.Lock()
+        self.decisions = {"complet": 0, "parallele": 0, "parser_unique": 0, "selenium_direct": 0,
+                          "explorations": 0}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS routage (
+                    domaine TEXT NOT NULL,
+                    methode TEXT NOT NULL,
+                    essais INTEGER NOT NULL,
+                    taux REAL NOT NULL,
+                    latence REAL NOT NULL,
+                    maj REAL NOT NULL,
+                    PRIMARY KEY (domaine, methode)
+                )""")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < VERSION_STATS:
+                conn.execute("DELETE FROM routage")
+                conn.execute(f"PRAGMA user_version = {VERSION_STATS}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.chemin, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def statistiques(self, dom):
+        """{methode: {essais, taux, latence_ms, maj}} pour un domaine."""
+        with self._connect() as conn:
+            lignes = conn.execute("SELECT methode, essais, taux, latence, maj FROM routage WHERE domaine = ?",
+                                  (dom,)).fetchall()
+        return {m: {"essais": e, "taux": round(t, 3), "latence_ms": round(l * 1000, 1), "maj": maj}
+                for m, e, t, l, maj in lignes}
+
+    def planifier(self, url):
+        dom = domaine(url)
+        plan = self._plan(dom, self.statistiques(dom))
+        with self._lock:
+            self.decisions[plan.mode] += 1
+            self.decisions["explorations"] += plan.exploration
+        return plan
+
+    def _plan(self, dom, stats):
+        connus = {m: s for m, s in stats.items() if s["essais"] >= MIN_ESSAIS}
+        if not connus:
+            return Plan(dom)
+        if random.random() < self.exploration:
+            return Plan(dom, raison="exploration", exploration=True)
+
+        selenium = connus.get(SELENIUM)
+        inutiles = [p for p in PARSERS if p in connus and connus[p]["taux"] < SEUIL_INUTILE]
+        if len(inutiles) == len(PARSERS) and selenium and selenium["taux"] >= 0.5:
+            return Plan(dom, parsers=(), raison="site dynamique : parsers statiques toujours vides")
+
+        # Les parsers jamais essayés gardent leur chance (taux neutre 0.5)
+        utiles = sorted((p for p in PARSERS if p not in inutiles),
+                        key=lambda p: (-connus.get(p, {}).get("taux", 0.5),
+                                       connus.get(p, {}).get("latence_ms", 0.0)))
+        selenium_permis = not (selenium and selenium["taux"] < SEUIL_INUTILE)
+        if utiles and utiles[0] in connus and connus[utiles[0]]["taux"] >= SEUIL_FIABLE:
+            return Plan(dom, parsers=utiles[:1], secours=utiles[1:] + inutiles, selenium=selenium_permis,
+                        raison=f"{utiles[0]} fiable sur ce domaine ({connus[utiles[0]]['taux']:.0%})")
+        if not utiles:
+            return Plan(dom, selenium=selenium_permis, raison="aucune méthode efficace : plan complet")
+        if not inutiles and selenium_permis:
+            return Plan(dom)
+        return Plan(dom, parsers=utiles, secours=inutiles, selenium=selenium_permis,
+                    raison="méthodes en échec reléguées : " + ", ".join(
+                        inutiles + ([] if selenium_permis else [SELENIUM])))
+
+    def enregistrer(self, dom, essais):
+        """essais : liste de (methode, succès, durée en secondes) d'une extraction."""
+        if not essais:
+            return
+        maintenant = time.time()
+        with self._connect() as conn:
+            for methode, succes, duree in essais:
+                conn.execute(f"""
+                    INSERT INTO routage (domaine, methode, essais, taux, latence, maj)
+                    VALUES (?, ?, 1, ?, ?, ?)
+                    ON CONFLICT (domaine, methode) DO UPDATE SET
+                        essais = essais + 1,
+                        taux = taux * {1 - ALPHA} + excluded.taux * {ALPHA},
+                        latence = latence * {1 - ALPHA} + excluded.latence * {ALPHA},
+                        maj = excluded.maj
+                    """, (dom, methode, float(bool(succes)), duree, maintenant))
+
+    def oublier(self, dom):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM routage WHERE domaine = ?", (dom,))
+
+    def stats(self, dom=None):
+        """Décisions prises par ce processus et statistiques (d'un domaine, ou de tous)."""
+        with self._connect() as conn:
+            if dom:
+                domaines = [dom]
+            else:
+                domaines = [d for (d,) in conn.execute("SELECT DISTINCT domaine FROM routage ORDER BY domaine")]
+        with self._lock:
+            decisions = dict(self.decisions)
+        return {"decisions": decisions, "domaines": {d: self.statistiques(d) for d in domaines}}
+
+_ROUTER = None
+_ROUTER_LOCK = threading.Lock()
+
+def get_extractor_router():
+    """Routeur partagé du processus (None si désactivé par FAKELAB_ROUTAGE=0)."""
+    global _ROUTER
+    if os.getenv("FAKELAB_ROUTAGE") == "0":
+        return None
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            _ROUTER = ExtractorRouter()
+        return _ROUTER
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Routage des méthodes d'extraction")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("stats", help="Taux de succès et latences par domaine")
+    p.add_argument("domaine", nargs="?")
+    p = sous.add_parser("plan", help="Plan d'extraction qui serait suivi pour une URL")
+    p.add_argument("url")
+    p = sous.add_parser("oublier", help="Efface les statistiques d'un domaine")
+    p.add_argument("domaine")
+    args = parser.parse_args()
+
+    router = ExtractorRouter(exploration=0.0)
+    if args.commande == "stats":
+        print(json.dumps(router.stats(args.domaine)["domaines"], ensure_ascii=False, indent=2))
+    elif args.commande == "plan":
+        print(json.dumps(router.planifier(args.url).to_dict(), ensure_ascii=False, indent=2))
+    else:
+        router.oublier(args.domaine)
+        print(f"🗑️ Statistiques de {args.domaine} effacées.")
+
+if __name__ == "__main__":
+    main()
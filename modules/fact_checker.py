@@ -2,30 +2,180 @@ import os
 import requests
 import json
 import time
+import copy
+import re
+import threading
+import unicodedata
+from concurrent.futures import Future
 
-def check_google_facts(query, api_key):
+from modules import http_client
+from modules.cache import LRUCache, SQLiteStore, chemin_cache
+from modules.resilience import ServiceIndisponible, get_service
+
+# Durées de vie du cache : une vérification trouvée reste valable longtemps,
+# une absence de résultat doit être retentée plus tôt (les fact-checkers publient après coup).
+TTL_POSITIF = int(os.getenv("FAKELAB_FACTCHECK_TTL", str(24 * 3600)))
+TTL_NEGATIF = int(os.getenv("FAKELAB_FACTCHECK_TTL_VIDE", str(3600)))
+
+# Surchargeable (FACTCHECK_API_URL) pour viser un serveur local (bench/)
+FACTCHECK_API_URL = os.getenv("FACTCHECK_API_URL",
+                              "https://factchecktools.googleapis.com/v1alpha1/claims:search")
+
+_CACHE_MEMOIRE = LRUCache(max_entries=1024)
+_CACHE_DISQUE = None
+_EN_VOL = {}  # clé -> Future de la requête en cours (regroupement des appels identiques)
+_LOCK = threading.Lock()
+_COMPTEURS = {"hits": 0, "misses": 0, "regroupes": 0, "appels_api": 0,
+              "index_local": 0, "claims_indexes": 0, "indisponible": 0}
+
+def _cache_disque():
+    global _CACHE_DISQUE
+    with _LOCK:
+        if _CACHE_DISQUE is None:
+            _CACHE_DISQUE = SQLiteStore(chemin_cache("factcheck.sqlite"), "factcheck")
+        return _CACHE_DISQUE
+
+def normaliser_requete(query):
+    """Minuscules, sans accents ni ponctuation, espaces compactés."""
+    texte = unicodedata.normalize("NFKD", query or "")
+    texte = "".join(c for c in texte if not unicodedata.combining(c)).lower()
+    texte = re.sub(r"[^\w\s]", " ", texte)
+    return " ".join(texte.split())
+
+def _compter(nom):
+    with _LOCK:
+        _COMPTEURS[nom] += 1
+
+def stats_cache():
+    """Compteurs du cache fact-check : taux de hits et appels API économisés."""
+    with _LOCK:
+        stats = dict(_COMPTEURS)
+    total = stats["hits"] + stats["misses"] + stats["regroupes"]
+    stats["appels_economises"] = stats["hits"] + stats["regroupes"]
+    stats["hit_ratio"] = round(stats["appels_economises"] / total, 3) if total else 0.0
+    return stats
+
+def check_google_facts(query, api_key, language='fr', use_cache=True):
     """
     Interroge l'API Google Fact Check Tools pour vérifier une information.
+    Les réponses sont mises en cache (requête normalisée + langue) et les
+    recherches identiques simultanées ne font qu'UN appel à l'API.
     """
-    url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+    if not use_cache:
+        return _appel_api(query, api_key, language)
+
+    cle = f"{language}|{normaliser_requete(query)}"
+    claims = _CACHE_MEMOIRE.get(cle)
+    if claims is None:
+        try:
+            claims = _cache_disque().get(cle)
+        except Exception as e:
+            print(f"Erreur cache fact-check : {e}")
+        if claims is not None:
+            _CACHE_MEMOIRE.set(cle, claims, TTL_POSITIF if claims else TTL_NEGATIF)
+    if claims is not None:
+        _compter("hits")
+        return copy.deepcopy(claims)
+
+    with _LOCK:
+        futur = _EN_VOL.get(cle)
+        proprietaire = futur is None
+        if proprietaire:
+            # La requête en vol a pu se terminer entre-temps : dernier coup d'oeil au cache
+            claims = _CACHE_MEMOIRE.get(cle)
+            if claims is not None:
+                _COMPTEURS["hits"] += 1
+                return copy.deepcopy(claims)
+            futur = _EN_VOL[cle] = Future()
+
+    if not proprietaire:
+        # Même recherche déjà en vol : on attend sa réponse
+        _compter("regroupes")
+        claims = futur.result()
+        return copy.deepcopy(claims)
+
+    _compter("misses")
+    claims = None
+    try:
+        claims = _appel_api(query, api_key, language)
+        if claims is not None:  # Les erreurs ne sont jamais mises en cache
+            ttl = TTL_POSITIF if claims else TTL_NEGATIF
+            _CACHE_MEMOIRE.set(cle, claims, ttl)
+            try:
+                _cache_disque().set(cle, claims, ttl=ttl)
+            except Exception as e:
+                print(f"Erreur cache fact-check : {e}")
+            _indexer_localement(claims, language)
+    finally:
+        with _LOCK:
+            _EN_VOL.pop(cle, None)
+        futur.set_result(claims)
+    return copy.deepcopy(claims)
+
+def rechercher_verifications(query, api_key, language='fr', use_cache=True):
+    """
+    Vérifications pour un titre, classées par pertinence (champ 'pertinence').
+    L'index local (modules.claim_index) est consulté d'abord ; l'API n'est
+    appelée que s'il ne trouve rien. Retourne (claims, source) avec source
+    "local", "api" ou "aucune" (rien en local et pas de clé API).
+    """
+    from modules.claim_index import get_claim_index, classer  # claim_index importe ce module
+    index = get_claim_index()
+    if index is not None:
+        try:
+            claims = index.rechercher(query, language)
+        except Exception as e:
+            print(f"Erreur index local fact-check : {e}")
+            claims = []
+        if claims:
+            _compter("index_local")
+            return claims, "local"
+    if not api_key:
+        return [], "aucune"
+    claims = check_google_facts(query, api_key, language, use_cache=use_cache)
+    return (classer(query, claims) if claims else claims), "api"
+
+def _indexer_localement(claims, language):
+    """Synchronisation incrémentale : les réponses de l'API alimentent l'index local."""
+    if not claims:
+        return
+    from modules.claim_index import get_claim_index
+    try:
+        index = get_claim_index()
+        if index is not None:
+            ajoutes = index.ajouter(claims, langue=language)
+            with _LOCK:
+                _COMPTEURS["claims_indexes"] += ajoutes
+    except Exception as e:
+        print(f"Erreur index local fact-check : {e}")
+
+def _appel_api(query, api_key, language):
+    """Claims de l'API, ou None en cas d'erreur (jamais mise en cache) ou si l'API est indisponible."""
     params = {
         'query': query,
         'key': api_key,
-        'languageCode': 'fr' # On privilégie les sources francophones
+        'languageCode': language # On privilégie les sources francophones
     }
+    _compter("appels_api")
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status() # Lève une erreur si le statut HTTP n'est pas 200
-        
-        data = response.json()
-        claims = data.get('claims', [])
-        
-        return claims
+        # Quota, réessais et disjoncteur (modules.resilience) : une API en panne
+        # est écartée tout de suite au lieu de faire attendre chaque analyse
+        return get_service("factcheck").appeler(_requete_api, params)
+    except ServiceIndisponible as e:
+        _compter("indisponible")
+        print(f"Fact Check API indisponible : {e.raison}")
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Erreur de connexion à l'API : {e}")
         return None
 
+def _requete_api(params):
+    # Client HTTP partagé (keep-alive + timeout par défaut : plus de blocage infini)
+    response = http_client.get(FACTCHECK_API_URL, params=params)
+    response.raise_for_status() # Lève une erreur si le statut HTTP n'est pas 200
+    return response.json().get('claims', [])
+
 def format_result(claim):
     """
     Formate un résultat brut de l'API pour l'affichage.
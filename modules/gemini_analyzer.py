@@ -1,24 +1,59 @@
-from google import genai
-from google.genai import types
 import json
+import os
 import re # On ajoute les expressions régulières pour nettoyer
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as DelaiDepasse
 
-def analyze_text_semantics(text, api_key):
+from modules.resilience import ServiceIndisponible, get_service
+from modules.text_reducer import (nettoyer_texte, estimer_tokens, reduire, decouper_morceaux,
+                                  agreger_analyses, SEUIL_MAP_REDUCE)
+
+# Modèle principal, puis modèle de secours (utilisé seulement si le principal est indisponible)
+MODELE_PRINCIPAL = "gemini-2.0-flash"
+MODELE_SECOURS = "gemini-1.5-flash"
+
+# Codes HTTP pour lesquels changer de modèle a un sens (modèle inconnu, quota, surcharge).
+# Une clé invalide ou une requête mal formée échouerait pareil avec le second modèle.
+CODES_BASCULE = {404, 429, 500, 503}
+
+# Délai max d'un appel Gemini (ms)
+GEMINI_TIMEOUT_MS = int(os.getenv("FAKELAB_GEMINI_TIMEOUT_MS", "30000"))
+
+# Nombre d'articles envoyés dans une seule requête par analyze_texts_batch
+TAILLE_LOT = int(os.getenv("FAKELAB_GEMINI_BATCH", "5"))
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_client(api_key):
     """
-    Analyse sémantique ROBUSTE.
-    Corrige automatiquement les erreurs de syntaxe JSON de l'IA.
+    Client Gemini réutilisé d'un appel à l'autre (un par clé API).
+    GEMINI_BASE_URL permet de viser un serveur Gemini factice local.
     """
-    if not api_key:
-        return {"error": "Clé API manquante"}
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            # SDK importé au premier appel (google.genai est long à charger)
+            from google import genai
+            from google.genai import types
+            options = {"timeout": GEMINI_TIMEOUT_MS}
+            if os.getenv("GEMINI_BASE_URL"):
+                options["base_url"] = os.getenv("GEMINI_BASE_URL")
+            client = genai.Client(api_key=api_key, http_options=types.HttpOptions(**options))
+            _CLIENTS[api_key] = client
+        return client
 
-    # 1. Configuration Client
-    try:
-        client = genai.Client(api_key=api_key)
-    except Exception as e:
-        return {"error": f"Erreur Client Google : {str(e)}"}
+SCHEMA_JSON = """{{
+        "analyse_subjectivite": {{ "score": 0, "details": "..." }},
+        "analyse_clickbait": {{ "score": 0, "details": "..." }},
+        "analyse_preuves": {{ "score_manque_preuves": 0, "details": "..." }},
+        "synthese_globale": "...",
+        "verdict_style": "DOUTEUX"
+    }}"""
 
-    # 2. Prompt
-    prompt = f"""
+def _prompt_article(text):
+    return f"""
     Tu es l'IA du projet FAKELAB.
     Analyse ce texte : "{text}"
 
@@ -28,67 +63,160 @@ def analyze_text_semantics(text, api_key):
     3. Absence de preuves (score_manque_preuves)
 
     Réponds UNIQUEMENT au format JSON strict (sans Markdown) :
-    {{
-        "analyse_subjectivite": {{ "score": 0, "details": "..." }},
-        "analyse_clickbait": {{ "score": 0, "details": "..." }},
-        "analyse_preuves": {{ "score_manque_preuves": 0, "details": "..." }},
-        "synthese_globale": "...",
-        "verdict_style": "DOUTEUX"
-    }}
+    {SCHEMA_JSON.format()}
     """
 
-    # 3. Appel IA (Utilisation du modèle stable 2.0)
-    # J'ai retiré "2.5" qui n'existe pas et peut causer des bugs
-    model_id = "gemini-2.0-flash" 
+def _prompt_lot(textes):
+    articles = "\n".join(f'    ARTICLE {i} : "{texte}"' for i, texte in enumerate(textes))
+    return f"""
+    Tu es l'IA du projet FAKELAB.
+    Analyse SÉPARÉMENT chacun des {len(textes)} articles suivants :
+{articles}
+
+    Pour chaque article, note sur 10 (10 = TRES SUSPECT/FAUX) :
+    1. Subjectivité
+    2. Clickbait
+    3. Absence de preuves (score_manque_preuves)
+
+    Réponds UNIQUEMENT par un tableau JSON strict (sans Markdown), un objet par article,
+    avec le numéro de l'article dans "id" :
+    [
+    {{ "id": 0, "analyse": {SCHEMA_JSON.format()} }}
+    ]
+    """
 
+def _generer(client, prompt):
+    """
+    Appelle le modèle principal ; bascule sur le modèle de secours uniquement
+    si l'erreur est liée au modèle (indisponible, quota), pas sur toute exception.
+    Les deux appels passent par le disjoncteur et le quota du service "gemini" ;
+    la bascule compte comme un réessai (budget de modules.resilience).
+    Retourne (response, model_id) ; lève ServiceIndisponible si Gemini est en panne.
+    """
+    service = get_service("gemini")
+    service.nouvel_appel()
     try:
-        response = client.models.generate_content(
-            model=model_id,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                temperature=0.1 # Créativité faible pour éviter les erreurs de format
-            )
-        )
+        return service.essayer(_appel_modele, client, prompt, MODELE_PRINCIPAL), MODELE_PRINCIPAL
     except Exception as e:
-        # Si le 2.0 échoue, on tente le 1.5 qui est très fiable
-        try:
-            model_id = "gemini-1.5-flash"
-            response = client.models.generate_content(
-                model=model_id,
-                contents=prompt,
-                config=types.GenerateContentConfig(response_mime_type="application/json")
-            )
-        except Exception as e2:
-             return {"error": f"Erreur IA totale : {str(e2)}"}
-
-    # 4. Nettoyage et Parsing (La partie qui corrige ton erreur)
+        if isinstance(e, ServiceIndisponible) and e.refus:
+            raise  # circuit ouvert / quota : le modèle de secours n'y changerait rien
+        cause = e.__cause__ if isinstance(e, ServiceIndisponible) else e
+        if getattr(cause, "code", None) not in CODES_BASCULE or not service.reessai_permis():
+            raise
+    # Si le 2.0 est indisponible, on tente le 1.5 qui est très fiable
+    return service.essayer(_appel_modele, client, prompt, MODELE_SECOURS), MODELE_SECOURS
+
+def _appel_modele(client, prompt, modele):
+    from google.genai import types
+    return client.models.generate_content(
+        model=modele,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            temperature=0.1 # Créativité faible pour éviter les erreurs de format
+        )
+    )
+
+def analyse_neutre(raison):
+    """
+    Même structure que analyze_text_semantics quand Gemini est indisponible :
+    risque neutre (A_sem 50), comme NOT_FOUND pour le Fact-Check. 'indisponible' la signale.
+    """
+    details = "Non évalué : IA indisponible."
+    return {
+        "analyse_subjectivite": {"score": 5, "details": details},
+        "analyse_clickbait": {"score": 5, "details": details},
+        "analyse_preuves": {"score_manque_preuves": 5, "details": details},
+        "synthese_globale": f"Analyse IA indisponible ({raison}) : score neutre appliqué.",
+        "verdict_style": "DOUTEUX",
+        "modele_utilise": "aucun",
+        "A_sem": 50.0,
+        "indisponible": True,
+    }
+
+def _nettoyer_json(json_text):
+    # Nettoyage brutal des balises Markdown (```json) ; réponse vide (texte None) -> ""
+    return (json_text or "").replace("```json", "").replace("```", "").strip()
+
+def _calculer_scores(data, model_id):
+    """Ajoute modele_utilise et A_sem (score de risque sur 100) à une analyse."""
+    data['modele_utilise'] = model_id
+
+    # --- Calculs ---
+    s1 = data.get('analyse_subjectivite', {}).get('score', 5)
+    s2 = data.get('analyse_clickbait', {}).get('score', 5)
+
+    s3 = 5
+    if 'analyse_preuves' in data:
+        if 'score_manque_preuves' in data['analyse_preuves']:
+            s3 = data['analyse_preuves']['score_manque_preuves']
+        elif 'score_fiabilite' in data['analyse_preuves']:
+            s3 = 10 - data['analyse_preuves']['score_fiabilite']
+            data['analyse_preuves']['score_manque_preuves'] = s3
+
+    moyenne = (s1 + s2 + s3) / 3
+    data['A_sem'] = round(moyenne * 10, 1)
+    return data
+
+# Analyse des morceaux d'un article très long (map-reduce)
+_MORCEAUX_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fakelab-gemini-morceau")
+
+def analyze_text_semantics(text, api_key, titre=None):
+    """
+    Analyse sémantique ROBUSTE.
+    Corrige automatiquement les erreurs de syntaxe JSON de l'IA.
+    Le texte est d'abord nettoyé (HTML) et réduit au budget de tokens
+    (FAKELAB_PROMPT_TOKENS) ; un article très long est analysé par morceaux
+    en parallèle, puis les analyses sont combinées dans le même format.
+    """
+    if not api_key:
+        return {"error": "Clé API manquante"}
+
+    # 1. Configuration Client (réutilisé entre les appels)
     try:
-        json_text = response.text
-        
-        # Nettoyage brutal des balises Markdown (```json)
-        json_text = json_text.replace("```json", "").replace("```", "").strip()
-        
-        # TENTATIVE DE PARSING
-        data = json.loads(json_text)
-        data['modele_utilise'] = model_id
+        client = get_client(api_key)
+    except Exception as e:
+        return {"error": f"Erreur Client Google : {str(e)}"}
 
-        # --- Calculs ---
-        s1 = data.get('analyse_subjectivite', {}).get('score', 5)
-        s2 = data.get('analyse_clickbait', {}).get('score', 5)
-        
-        s3 = 5
-        if 'analyse_preuves' in data:
-            if 'score_manque_preuves' in data['analyse_preuves']:
-                s3 = data['analyse_preuves']['score_manque_preuves']
-            elif 'score_fiabilite' in data['analyse_preuves']:
-                s3 = 10 - data['analyse_preuves']['score_fiabilite']
-                data['analyse_preuves']['score_manque_preuves'] = s3
+    texte = nettoyer_texte(text)
+    if estimer_tokens(texte) > SEUIL_MAP_REDUCE:
+        return _analyser_par_morceaux(client, texte, titre)
+    return _analyser_article(client, reduire(texte, titre=titre))
+
+def _analyser_par_morceaux(client, texte, titre):
+    morceaux = decouper_morceaux(texte)
+    if titre:
+        morceaux[0] = f"Titre : {titre} {morceaux[0]}"
+    analyses = list(_MORCEAUX_EXECUTOR.map(lambda m: _analyser_article(client, m), morceaux))
+    # Morceaux sans réponse (Gemini indisponible) : on agrège ceux qui ont été analysés
+    poids = [estimer_tokens(m) for m in morceaux]
+    disponibles = [(a, p) for a, p in zip(analyses, poids) if not a.get("indisponible")]
+    if not disponibles:
+        return analyses[0]
+    analyses, poids = (list(c) for c in zip(*disponibles))
+    agregee = agreger_analyses(analyses, poids)
+    if "error" in agregee:
+        return agregee
+    modele = next(a['modele_utilise'] for a in analyses if "error" not in a)
+    return _calculer_scores(agregee, modele)
+
+def _analyser_article(client, text):
+    # 2. Appel IA
+    try:
+        response, model_id = _generer(client, _prompt_article(text))
+    except ServiceIndisponible as e:
+        return analyse_neutre(e.raison)
+    except Exception as e:
+        return {"error": f"Erreur IA totale : {str(e)}"}
 
-        moyenne = (s1 + s2 + s3) / 3
-        data['A_sem'] = round(moyenne * 10, 1)
+    # 3. Nettoyage et Parsing (La partie qui corrige ton erreur)
+    json_text = ""
+    try:
+        json_text = _nettoyer_json(response.text)
 
-        return data
+        # TENTATIVE DE PARSING
+        data = json.loads(json_text)
+        return _calculer_scores(data, model_id)
 
     except json.JSONDecodeError as e:
         # C'est ici que ton erreur "Expecting ','" est attrapée
@@ -99,3 +227,141 @@ def analyze_text_semantics(text, api_key):
         }
     except Exception as e:
         return {"error": f"Erreur interne : {str(e)}"}
+
+def analyze_texts_batch(texts, api_key, taille_lot=TAILLE_LOT):
+    """
+    Analyse plusieurs articles avec UNE requête Gemini par lot de `taille_lot`.
+    Retourne une liste alignée sur `texts`, chaque élément ayant exactement la
+    structure de analyze_text_semantics (analyse_*, A_sem...) ou {"error": ...}.
+    """
+    if not api_key:
+        return [{"error": "Clé API manquante"} for _ in texts]
+    try:
+        client = get_client(api_key)
+    except Exception as e:
+        return [{"error": f"Erreur Client Google : {str(e)}"} for _ in texts]
+
+    # Chaque article est ramené au budget de tokens (pas de map-reduce dans un lot)
+    texts = [reduire(t) for t in texts]
+    resultats = []
+    for debut in range(0, len(texts), taille_lot):
+        lot = texts[debut:debut + taille_lot]
+        resultats.extend(_analyser_lot(client, lot))
+    return resultats
+
+def _analyser_lot(client, lot):
+    try:
+        response, model_id = _generer(client, _prompt_lot(lot))
+    except ServiceIndisponible as e:
+        return [analyse_neutre(e.raison) for _ in lot]
+    except Exception as e:
+        return [{"error": f"Erreur IA totale : {str(e)}"} for _ in lot]
+
+    json_text = ""
+    try:
+        json_text = _nettoyer_json(response.text)
+        items = json.loads(json_text)
+        if isinstance(items, dict):  # Certains modèles enveloppent le tableau
+            items = next((v for v in items.values() if isinstance(v, list)), [])
+        if not isinstance(items, list):
+            raise ValueError(f"tableau JSON attendu, reçu {type(items).__name__}")
+    except ValueError as e:  # json.JSONDecodeError compris
+        print(f"⚠️ JSON malformé reçu : {json_text}")
+        return [{
+            "error": "L'IA a généré une réponse mal formatée. Veuillez relancer l'analyse.",
+            "details_technique": str(e)
+        } for _ in lot]
+
+    # On remet chaque analyse à la place de son article grâce à "id"
+    par_id = {}
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("analyse"), dict):
+            try:
+                par_id[int(item.get("id"))] = item["analyse"]
+            except (TypeError, ValueError):
+                continue
+
+    resultats = []
+    for i in range(len(lot)):
+        if i in par_id:
+            try:
+                resultats.append(_calculer_scores(par_id[i], model_id))
+            except (TypeError, ValueError, AttributeError) as e:  # notes non numériques...
+                resultats.append({"error": "Analyse de l'IA inexploitable pour cet article.",
+                                  "details_technique": str(e)})
+        else:
+            resultats.append({"error": "Article absent de la réponse groupée de l'IA."})
+    return resultats
+
+# Lots groupés envoyés en même temps : un lot lent ne retarde pas les suivants
+_LOTS_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("FAKELAB_GEMINI_LOTS", "4")),
+                                    thread_name_prefix="fakelab-gemini-lot")
+# Attente max d'une analyse groupée après sa fenêtre (modèle principal puis secours, chacun borné)
+ATTENTE_LOT = 2 * GEMINI_TIMEOUT_MS / 1000 + 5
+
+class _Regroupeur:
+    """
+    Regroupe les analyses demandées en même temps par plusieurs threads
+    (ex : batch.py avec --concurrency) en une seule requête Gemini.
+    Un lot part dès qu'il est plein, ou à l'échéance de la fenêtre du plus
+    pressé de ses articles (chaque appel donne la sienne).
+    """
+    def __init__(self, api_key, taille_lot=TAILLE_LOT):
+        self.api_key = api_key
+        self.taille_lot = taille_lot
+        self._cond = threading.Condition()
+        self._attente = []  # (texte, Future, échéance)
+        threading.Thread(target=self._boucle, daemon=True, name="fakelab-gemini-regroupeur").start()
+
+    def soumettre(self, text, fenetre):
+        futur = Future()
+        with self._cond:
+            self._attente.append((text, futur, time.monotonic() + fenetre))
+            self._cond.notify()
+        return futur
+
+    def _boucle(self):
+        while True:
+            with self._cond:
+                while not self._attente:
+                    self._cond.wait()
+                # On laisse la fenêtre se remplir (sauf si le lot est déjà plein)
+                while len(self._attente) < self.taille_lot:
+                    reste = min(e for _, _, e in self._attente) - time.monotonic()
+                    if reste <= 0:
+                        break
+                    self._cond.wait(reste)
+                lot, self._attente = self._attente[:self.taille_lot], self._attente[self.taille_lot:]
+            _LOTS_EXECUTOR.submit(self._envoyer, lot)
+
+    def _envoyer(self, lot):
+        try:
+            resultats = analyze_texts_batch([t for t, _, _ in lot], self.api_key, self.taille_lot)
+        except Exception as e:
+            resultats = [{"error": f"Erreur interne : {str(e)}"} for _ in lot]
+        for (_, futur, _), resultat in zip(lot, resultats):
+            futur.set_result(resultat)
+
+_REGROUPEURS = {}
+
+def analyze_text_semantics_groupe(text, api_key, fenetre=0.2, titre=None):
+    """
+    Même contrat que analyze_text_semantics, mais l'appel est regroupé avec
+    ceux des autres threads arrivés dans la même fenêtre (moins d'appels API).
+    Les articles très longs (map-reduce) ne sont pas regroupés.
+    """
+    if not api_key:
+        return {"error": "Clé API manquante"}
+    texte = nettoyer_texte(text)
+    if estimer_tokens(texte) > SEUIL_MAP_REDUCE:
+        return analyze_text_semantics(texte, api_key, titre)
+    text = reduire(texte, titre=titre)
+    with _CLIENTS_LOCK:
+        regroupeur = _REGROUPEURS.get(api_key)
+        if regroupeur is None:
+            regroupeur = _REGROUPEURS[api_key] = _Regroupeur(api_key)
+    try:
+        return regroupeur.soumettre(text, fenetre).result(timeout=fenetre + ATTENTE_LOT)
+    except DelaiDepasse:
+        # Lot bloqué : valeur neutre (verdict non mis en cache) plutôt qu'une attente sans fin
+        return analyse_neutre("délai dépassé pour l'analyse groupée")
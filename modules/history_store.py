@@ -0,0 +1,195 @@
+"""
+FAKELAB - Historique des analyses (SQLite).
+
+Chaque analyse terminée par le pipeline (hors verdicts servis par le cache)
+est enregistrée : colonnes indexées pour filtrer et agréger (domaine,
+verdict, date, empreinte d'URL, scores) et résultat complet compressé.
+Les listes sont paginées par curseur (date, id) : une page coûte la même
+chose quelle que soit sa position dans l'historique.
+
+Désactivable par FAKELAB_HISTORIQUE=0 ; fichier : FAKELAB_HISTORIQUE_DB
+(défaut : historique.sqlite dans le dossier de cache).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from modules.cache import chemin_cache
+from modules.url_utils import canonicaliser_url, domaine
+
+VERDICTS_SUSPECTS = ("FAUX (Avéré)", "TROMPEUR / FAUX")
+
+def empreinte_url(url):
+    return hashlib.sha256(canonicaliser_url(url).encode("utf-8")).hexdigest()
+
+class HistoryStore:
+    """Table analyses. Une connexion par opération : utilisable depuis plusieurs threads et processus."""
+    def __init__(self, chemin=None):
+        self.chemin = chemin or os.getenv("FAKELAB_HISTORIQUE_DB") or chemin_cache("historique.sqlite")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cree REAL NOT NULL,
+                    jour TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    url_hash TEXT NOT NULL,
+                    domaine TEXT NOT NULL,
+                    titre TEXT,
+                    verdict TEXT NOT NULL,
+                    S_final REAL,
+                    R_source REAL,
+                    V_fact TEXT,
+                    A_sem REAL,
+                    methode_extraction TEXT,
+                    duree_ms REAL,
+                    resultat BLOB NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_cree ON analyses(cree)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_domaine ON analyses(domaine, cree)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_verdict ON analyses(verdict, cree)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_url ON analyses(url_hash, cree)")
+            # Index couvrant des agrégats par jour (comptages sans lire les lignes)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_jour ON analyses(jour, domaine, verdict)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.chemin, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enregistrer(self, url, resultats, duree=None, quand=None):
+        """Ajoute une analyse réussie (avec verdict). Retourne son id, ou None si ignorée."""
+        if "verdict" not in resultats:
+            return None
+        quand = quand or time.time()
+        blob = zlib.compress(json.dumps(resultats, ensure_ascii=False, default=str).encode("utf-8"), 6)
+        with self._connect() as conn:
+            curseur = conn.execute(
+                "INSERT INTO analyses (cree, jour, url, url_hash, domaine, titre, verdict, S_final, R_source, "
+                "V_fact, A_sem, methode_extraction, duree_ms, resultat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (quand, time.strftime("%Y-%m-%d", time.localtime(quand)), url, empreinte_url(url),
+                 domaine(url), resultats.get("titre"), resultats["verdict"], resultats.get("S_final"),
+                 resultats.get("R_source"), resultats.get("V_fact"), resultats.get("A_sem"),
+                 resultats.get("methode_extraction"), round(duree * 1000, 1) if duree is not None else None,
+                 blob))
+            return curseur.lastrowid
+
+    @staticmethod
+    def _filtres(dom=None, verdicts=None, depuis=None, jusqu_a=None):
+        clauses, params = [], []
+        if dom:
+            clauses.append("domaine = ?")
+            params.append(domaine(dom))
+        if verdicts:
+            clauses.append(f"verdict IN ({', '.join('?' * len(verdicts))})")
+            params.extend(verdicts)
+        if depuis:
+            clauses.append("cree >= ?")
+            params.append(depuis)
+        if jusqu_a:
+            clauses.append("cree < ?")
+            params.append(jusqu_a)
+        return clauses, params
+
+    def page(self, taille=25, apres=None, **filtres):
+        """
+        Analyses les plus récentes d'abord, sans le résultat complet.
+        apres : curseur (cree, id) de la dernière ligne de la page précédente.
+        Retourne (lignes, curseur de la page suivante ou None).
+        """
+        clauses, params = self._filtres(**filtres)
+        if apres:
+            clauses.append("(cree, id) < (?, ?)")
+            params.extend(apres)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            lignes = [dict(r) for r in conn.execute(
+                f"SELECT id, cree, url, domaine, titre, verdict, S_final, R_source, V_fact, A_sem, "
+                f"methode_extraction, duree_ms FROM analyses {where} ORDER BY cree DESC, id DESC LIMIT ?",
+                params + [taille + 1])]
+        suivant = None
+        if len(lignes) > taille:
+            lignes = lignes[:taille]
+            suivant = (lignes[-1]["cree"], lignes[-1]["id"])
+        return lignes, suivant
+
+    def compter(self, **filtres):
+        """Nombre d'analyses par verdict pour ces filtres."""
+        clauses, params = self._filtres(**filtres)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            return dict(conn.execute(f"SELECT verdict, COUNT(*) FROM analyses {where} GROUP BY verdict", params))
+
+    def detail(self, analyse_id):
+        """Résultat complet d'une analyse, ou None."""
+        with self._connect() as conn:
+            ligne = conn.execute("SELECT resultat FROM analyses WHERE id = ?", (analyse_id,)).fetchone()
+        return json.loads(zlib.decompress(ligne[0])) if ligne else None
+
+    def derniere(self, url):
+        """Dernière analyse de cette URL : (id, cree, verdict) ou None."""
+        with self._connect() as conn:
+            return conn.execute("SELECT id, cree, verdict FROM analyses WHERE url_hash = ? "
+                                "ORDER BY cree DESC LIMIT 1", (empreinte_url(url),)).fetchone()
+
+    def verdicts_par_jour(self, jours=30, dom=None, par_domaine=False):
+        """[(jour, domaine ou None, verdict, nombre)] sur les `jours` derniers jours."""
+        depuis = time.strftime("%Y-%m-%d", time.localtime(time.time() - jours * 86400))
+        colonne = "domaine" if par_domaine else "NULL"
+        sql = f"SELECT jour, {colonne}, verdict, COUNT(*) FROM analyses WHERE jour >= ?"
+        params = [depuis]
+        if dom:
+            sql += " AND domaine = ?"
+            params.append(domaine(dom))
+        sql += f" GROUP BY jour, {colonne}, verdict ORDER BY jour"
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def domaines_suspects(self, jours=30, limite=10, min_analyses=3):
+        """Domaines dont la part de verdicts FAUX / TROMPEUR est la plus forte."""
+        marqueurs = ", ".join("?" * len(VERDICTS_SUSPECTS))
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(r) for r in conn.execute(f"""
+                SELECT domaine, COUNT(*) AS analyses,
+                       SUM(verdict IN ({marqueurs})) AS suspectes,
+                       ROUND(1.0 * SUM(verdict IN ({marqueurs})) / COUNT(*), 3) AS part_suspectes,
+                       ROUND(AVG(S_final), 1) AS score_moyen,
+                       MAX(cree) AS derniere
+                FROM analyses WHERE cree >= ?
+                GROUP BY domaine HAVING COUNT(*) >= ?
+                ORDER BY part_suspectes DESC, analyses DESC LIMIT ?""",
+                VERDICTS_SUSPECTS + VERDICTS_SUSPECTS + (time.time() - jours * 86400, min_analyses, limite))]
+
+    def colonnes(self):
+        """(R_source, V_fact, A_sem) de tout l'historique, pour modules.scoring."""
+        with self._connect() as conn:
+            lignes = conn.execute("SELECT R_source, V_fact, A_sem FROM analyses "
+                                  "WHERE R_source IS NOT NULL AND A_sem IS NOT NULL").fetchall()
+        r, v, a = zip(*lignes) if lignes else ((), (), ())
+        return r, v, a
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def get_history_store():
+    """Historique partagé du processus (None si désactivé par FAKELAB_HISTORIQUE=0)."""
+    global _STORE
+    if os.getenv("FAKELAB_HISTORIQUE") == "0":
+        return None
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = HistoryStore()
+        return _STORE
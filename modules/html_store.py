@@ -0,0 +1,169 @@
+"""
+FAKELAB - Stockage local des pages téléchargées.
+
+Pour chaque URL canonique : le HTML brut et le résultat du parsing
+({titre, texte, image, date} + méthode), compressés (zlib), avec les
+validateurs HTTP de la réponse (ETag, Last-Modified). Une nouvelle analyse
+de la même page envoie une requête conditionnelle : si le serveur répond
+304, ni téléchargement ni parsing. Sans validateurs, la page est
+re-téléchargée mais le parsing est repris si le HTML n'a pas changé.
+
+Taille bornée (FAKELAB_HTML_STORE_MO, défaut 500 Mo) : les pages les moins
+récemment lues sont évincées en premier.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from modules.cache import chemin_cache
+from modules.url_utils import canonicaliser_url
+
+MAX_OCTETS = int(float(os.getenv("FAKELAB_HTML_STORE_MO", "500")) * 1024 * 1024)
+# Page relue sans même la revalider si elle l'a été il y a moins de FRAICHEUR secondes
+FRAICHEUR = int(os.getenv("FAKELAB_HTML_FRAIS", "300"))
+NIVEAU_COMPRESSION = 6
+# Format des extractions stockées : celles d'une autre version ne sont pas reprises.
+# v2 : seulement des extractions avec un vrai titre et un texte sans HTML
+# (la v1 gardait celle du parser le plus rapide, titre factice compris).
+VERSION_EXTRACTION = 2
+
+def _compresser(texte):
+    return zlib.compress(texte.encode("utf-8"), NIVEAU_COMPRESSION)
+
+def _decompresser(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else None
+
+def empreinte_html(html):
+    return hashlib.sha1(html.encode("utf-8")).hexdigest()
+
+class HtmlStore:
+    """
+    Table pages : une ligne par URL canonique. Une connexion par opération
+    (threads et processus), éviction LRU comme modules.cache.SQLiteStore.
+    """
+    def __init__(self, chemin=None, max_bytes=MAX_OCTETS, fraicheur=FRAICHEUR):
+        self.chemin = chemin or chemin_cache("pages.sqlite")
+        self.max_bytes = max_bytes
+        self.fraicheur = fraicheur
+        self._lock = threading.Lock()
+        self.compteurs = {"frais": 0, "revalides_304": 0, "modifies": 0, "parsing_repris": 0,
+                          "absents": 0, "octets_economises": 0}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    cle TEXT PRIMARY KEY,
+                    html BLOB NOT NULL,
+                    empreinte TEXT NOT NULL,
+                    octets INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    extraction BLOB,
+                    taille INTEGER NOT NULL,
+                    valide REAL NOT NULL,
+                    acces REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_acces ON pages(acces)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.chemin, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def compter(self, nom, n=1):
+        with self._lock:
+            self.compteurs[nom] += n
+
+    def get(self, url):
+        """
+        {html, empreinte, octets, etag, last_modified, extraction, frais} ou None.
+        extraction : {"data", "methode"} du dernier parsing réussi, ou None.
+        """
+        cle = canonicaliser_url(url)
+        maintenant = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT html, empreinte, octets, etag, last_modified, extraction, valide "
+                               "FROM pages WHERE cle = ?", (cle,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE pages SET acces = ? WHERE cle = ?", (maintenant, cle))
+        html, empreinte, octets, etag, last_modified, extraction, valide = row
+        extraction = json.loads(_decompresser(extraction)) if extraction else None
+        if extraction and extraction.get("version") != VERSION_EXTRACTION:
+            extraction = None  # parsée à nouveau, puis remplacée
+        return {"html": _decompresser(html), "empreinte": empreinte, "octets": octets,
+                "etag": etag, "last_modified": last_modified, "extraction": extraction,
+                "frais": maintenant - valide < self.fraicheur}
+
+    def enregistrer_html(self, url, html, octets, etag=None, last_modified=None):
+        """Nouvelle version de la page ; le parsing enregistré est gardé seulement si le HTML est identique."""
+        cle = canonicaliser_url(url)
+        empreinte = empreinte_html(html)
+        blob = _compresser(html)
+        maintenant = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT empreinte, extraction FROM pages WHERE cle = ?", (cle,)).fetchone()
+            extraction = row[1] if row and row[0] == empreinte else None
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (cle, html, empreinte, octets, etag, last_modified, extraction, "
+                "taille, valide, acces) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cle, blob, empreinte, octets, etag, last_modified, extraction,
+                 len(blob) + len(extraction or b""), maintenant, maintenant))
+            self._evict(conn)
+        return extraction is not None
+
+    def enregistrer_extraction(self, url, data, methode):
+        """Résultat du parsing (déjà validé par l'extracteur) de la version enregistrée de la page."""
+        data = {k: data.get(k) for k in ("titre", "texte", "image", "date")}
+        blob = _compresser(json.dumps({"data": data, "methode": methode, "version": VERSION_EXTRACTION},
+                                      ensure_ascii=False))
+        with self._connect() as conn:
+            conn.execute("UPDATE pages SET extraction = ?, taille = LENGTH(html) + ? WHERE cle = ?",
+                         (blob, len(blob), canonicaliser_url(url)))
+
+    def revalider(self, url):
+        """Le serveur a confirmé (304) que la page n'a pas changé."""
+        with self._connect() as conn:
+            conn.execute("UPDATE pages SET valide = ? WHERE cle = ?", (time.time(), canonicaliser_url(url)))
+
+    def _evict(self, conn):
+        """Supprime les pages les moins récemment lues jusqu'à repasser sous max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(taille), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for cle, taille in conn.execute("SELECT cle, taille FROM pages ORDER BY acces ASC").fetchall():
+            conn.execute("DELETE FROM pages WHERE cle = ?", (cle,))
+            total -= taille
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._connect() as conn:
+            n, total, brut = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(taille), 0), COALESCE(SUM(octets), 0) FROM pages").fetchone()
+        with self._lock:
+            compteurs = dict(self.compteurs)
+        return dict(compteurs, pages=n, octets_disque=total, octets_telecharges=brut,
+                    max_octets=self.max_bytes)
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def get_html_store():
+    """Stockage partagé du processus (None si désactivé par FAKELAB_HTML_STORE=0)."""
+    global _STORE
+    if os.getenv("FAKELAB_HTML_STORE") == "0":
+        return None
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = HtmlStore()
+        return _STORE
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Délais par défaut (connexion, lecture) appliqués à toute requête sans timeout explicite
+DEFAULT_TIMEOUT = (
+    float(os.getenv("FAKELAB_HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("FAKELAB_HTTP_READ_TIMEOUT", "15")),
+)
+# Connexions keep-alive gardées par hôte (au-delà, les requêtes attendent une connexion libre)
+MAX_CONNEXIONS_PAR_HOTE = int(os.getenv("FAKELAB_HTTP_MAX_PER_HOST", "8"))
+# Nombre d'hôtes différents dont on garde le pool de connexions
+MAX_HOTES = int(os.getenv("FAKELAB_HTTP_MAX_HOSTS", "64"))
+
+USER_AGENT = "Mozilla/5.0 (compatible; FakeLabProject/1.0; +contact@fakelab.org)"
+
+def _accept_encoding():
+    """gzip/deflate toujours ; brotli seulement si urllib3 sait le décoder."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return "gzip, deflate, br"
+        except ImportError:
+            return "gzip, deflate"
+
+class _SessionAvecTimeout(requests.Session):
+    """Session requests qui applique DEFAULT_TIMEOUT quand l'appelant n'en donne pas."""
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+def _creer_session():
+    session = _SessionAvecTimeout()
+    adapter = HTTPAdapter(
+        pool_connections=MAX_HOTES,
+        pool_maxsize=MAX_CONNEXIONS_PAR_HOTE,
+        pool_block=True,  # plafond strict de connexions par hôte
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": _accept_encoding(),  # décompression transparente par urllib3
+    })
+    return session
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def get_session():
+    """
+    Client HTTP partagé par tous les modules : connexions keep-alive réutilisées
+    (plus de poignée de main TCP+TLS à chaque appel vers le même hôte).
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = _creer_session()
+        return _SESSION
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+def post(url, **kwargs):
+    return get_session().post(url, **kwargs)
+
+async def async_request(method, url, **kwargs):
+    """
+    Variante asynchrone : la requête tourne dans un thread et partage le même
+    pool de connexions que les appels synchrones.
+    """
+    import asyncio
+    return await asyncio.to_thread(get_session().request, method, url, **kwargs)
+
+async def async_get(url, **kwargs):
+    return await async_request("GET", url, **kwargs)
+
+async def async_post(url, **kwargs):
+    return await async_request("POST", url, **kwargs)
@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.tracing import METRIQUES, Span
+from modules.url_utils import canonicaliser_url
+
+# Analyses exécutées en même temps par le processus (les autres attendent dans la file)
+MAX_WORKERS = int(os.getenv("FAKELAB_JOB_WORKERS", "4"))
+# Analyses en attente acceptées au-delà des workers occupés ; au-delà, refus immédiat
+MAX_FILE = int(os.getenv("FAKELAB_JOB_QUEUE", "32"))
+# Jobs terminés gardés en mémoire (une session peut relire son résultat après un rerun)
+RETENTION = 512
+
+class FileSaturee(RuntimeError):
+    """Trop d'analyses en attente : la soumission est refusée."""
+
+class Job:
+    """
+    Une analyse FAKELAB en arrière-plan. Les étapes publiées par le pipeline
+    (voir iter_fakelab_pipeline) sont gardées dans l'ordre : un abonné arrivé
+    en retard les reçoit toutes.
+    """
+    def __init__(self, url):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.etat = "en_attente"  # en_attente -> en_cours -> termine
+        self.evenements = []
+        self.resultat = None
+        self.abonnes = 1
+        self.soumis_a = time.time()
+        self.debut = None
+        self.fin = None
+        self._cond = threading.Condition()
+
+    @property
+    def termine(self):
+        return self.etat == "termine"
+
+    def _publier(self, etape, donnees):
+        with self._cond:
+            self.evenements.append((etape, donnees))
+            if etape == "resultat":
+                self.resultat = donnees
+                self.etat = "termine"
+                self.fin = time.time()
+            self._cond.notify_all()
+
+    def suivre(self, depuis=0, timeout=None):
+        """
+        Génère les (etape, donnees) à partir de l'index `depuis`, au fur et à mesure,
+        jusqu'au "resultat". TimeoutError si rien n'arrive pendant `timeout` secondes.
+        """
+        i = depuis
+        while True:
+            with self._cond:
+                if i >= len(self.evenements) and not self._cond.wait_for(
+                        lambda: i < len(self.evenements), timeout):
+                    raise TimeoutError(f"Job {self.id} : aucune étape depuis {timeout}s")
+                nouveaux = self.evenements[i:]
+            for etape, donnees in nouveaux:
+                i += 1
+                yield etape, donnees
+                if etape == "resultat":
+                    return
+
+    def etapes(self, depuis=0, timeout=None):
+        """
+        Copie des (etape, donnees) publiées jusqu'ici. Attend au plus `timeout`
+        secondes qu'il y en ait au-delà de l'index `depuis` (sans lever d'erreur :
+        l'appelant affiche ce qu'il a et repasse plus tard).
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: depuis < len(self.evenements), timeout)
+            return list(self.evenements)
+
+    def attendre(self, timeout=None):
+        """Résultat final (dictionnaire du pipeline), ou None si le délai expire."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.termine, timeout)
+            return self.resultat
+
+    def to_dict(self):
+        return {"id": self.id, "url": self.url, "etat": self.etat, "abonnes": self.abonnes,
+                "etapes": [e for e, _ in self.evenements], "soumis_a": self.soumis_a,
+                "debut": self.debut, "fin": self.fin}
+
+class JobManager:
+    """
+    File d'analyses du processus : pool borné de workers, file bornée, et
+    regroupement des soumissions identiques (même URL canonique) sur le job déjà en vol.
+    Observabilité : stats() et, dans modules.tracing.METRIQUES, les spans
+    job.soumission (issue acceptee/regroupee/rejetee), job.attente, job.execution
+    et la jauge jobs_file_attente.
+    """
+    def __init__(self, max_workers=MAX_WORKERS, max_file=MAX_FILE, pipeline=None):
+        """pipeline : générateur (url, api_key, **options) -> (etape, donnees) ; iter_fakelab_pipeline par défaut."""
+        self.max_workers = max_workers
+        self.max_file = max_file
+        self._pipeline_fn = pipeline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fakelab-job")
+        self._lock = threading.Lock()
+        self._en_vol = {}             # URL canonique -> Job non terminé
+        self._jobs = OrderedDict()    # id -> Job (terminés : les RETENTION derniers)
+        self._en_attente = 0
+        self._en_cours = 0
+        self._compteurs = {"soumis": 0, "regroupes": 0, "rejetes": 0, "termines": 0, "erreurs": 0}
+
+    def soumettre(self, url, api_key_gemini, **options):
+        """
+        Retourne le Job de l'analyse (nouveau ou déjà en vol pour la même URL).
+        Lève FileSaturee si la file d'attente est pleine.
+        """
+        cle = canonicaliser_url(url)
+        with self._lock:
+            job = self._en_vol.get(cle)
+            if job is not None:
+                job.abonnes += 1
+                self._compteurs["regroupes"] += 1
+                self._observer("job.soumission", 0.0, "regroupee")
+                return job
+            if self._en_attente >= self.max_file:
+                self._compteurs["rejetes"] += 1
+                self._observer("job.soumission", 0.0, "rejetee")
+                raise FileSaturee(f"{self._en_attente} analyses déjà en attente")
+            job = Job(url)
+            self._en_vol[cle] = job
+            self._jobs[job.id] = job
+            self._en_attente += 1
+            self._compteurs["soumis"] += 1
+            self._observer("job.soumission", 0.0, "acceptee")
+            METRIQUES.jauge("jobs_file_attente", self._en_attente)
+            self._oublier_anciens()
+        self._executor.submit(self._executer, job, cle, api_key_gemini, options)
+        return job
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def _executer(self, job, cle, api_key_gemini, options):
+        job.debut = time.time()
+        with self._lock:
+            self._en_attente -= 1
+            self._en_cours += 1
+            METRIQUES.jauge("jobs_file_attente", self._en_attente)
+        self._observer("job.attente", job.debut - job.soumis_a)
+        job.etat = "en_cours"
+
+        issue = "ok"
+        try:
+            for etape, donnees in self._pipeline(job.url, api_key_gemini, **options):
+                if etape == "resultat":
+                    # Plus d'abonnés possibles après ce point : la prochaine soumission relance
+                    self._liberer(cle, job)
+                    issue = "erreur" if "error" in donnees else "ok"
+                job._publier(etape, donnees)
+        except Exception as e:
+            issue = "erreur"
+            self._liberer(cle, job)
+            job._publier("resultat", {"error": f"Erreur inattendue : {str(e)}"})
+        finally:
+            with self._lock:
+                self._en_cours -= 1
+                self._compteurs["termines"] += 1
+                self._compteurs["erreurs"] += issue == "erreur"
+            self._liberer(cle, job)
+            self._observer("job.execution", time.time() - job.debut, issue)
+
+    def _liberer(self, cle, job):
+        # Une nouvelle soumission a pu déjà remplacer ce job pour la même URL
+        with self._lock:
+            if self._en_vol.get(cle) is job:
+                del self._en_vol[cle]
+
+    def _pipeline(self, url, api_key_gemini, **options):
+        if self._pipeline_fn is not None:
+            return self._pipeline_fn(url, api_key_gemini, **options)
+        from pipeline import iter_fakelab_pipeline  # pipeline importe les modules lourds
+        return iter_fakelab_pipeline(url, api_key_gemini, **options)
+
+    def _oublier_anciens(self):
+        """Garde au plus RETENTION jobs terminés (appelé sous verrou)."""
+        termines = [i for i, j in self._jobs.items() if j.termine]
+        for job_id in termines[:max(0, len(termines) - RETENTION)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _observer(nom, duree, issue="ok"):
+        span = Span(nom)
+        span.duree = duree
+        span.issue = issue
+        METRIQUES.observer(span)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._compteurs, file_attente=self._en_attente, en_cours=self._en_cours,
+                         workers=self.max_workers, max_file=self.max_file)
+        attente = METRIQUES.percentiles("job.attente")
+        stats.update({f"attente_p{int(q * 100)}_ms": round(v * 1000, 1) for q, v in attente.items()})
+        return stats
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+def get_job_manager():
+    """File d'analyses partagée par toutes les sessions du processus."""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = JobManager()
+        return _MANAGER
@@ -0,0 +1,345 @@
+"""
+FAKELAB - Modèle sémantique local (tri avant Gemini).
+
+Régression linéaire (ridge) sur des n-grammes de mots hachés et quelques
+indices de style, entraînée sur l'historique des réponses Gemini (sorties
+JSONL de batch.py). Elle estime les trois sous-scores (subjectivité,
+clickbait, manque de preuves) et A_sem, sur CPU, en quelques millisecondes.
+
+Seuls les articles pour lesquels le modèle est incertain partent chez Gemini :
+A_sem estimé dans la bande d'incertitude (FAKELAB_LOCAL_BANDE, défaut 35,65)
+ou vocabulaire trop peu couvert par l'entraînement.
+
+    python -m modules.local_model train resultats.jsonl [autres.jsonl...]
+    python -m modules.local_model eval resultats.jsonl
+    python -m modules.local_model predict "texte de l'article"
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+
+from modules.cache import CACHE_DIR
+
+# Dimension de l'espace haché des n-grammes (puissance de 2)
+DIMENSION = 2 ** 16
+SOUS_SCORES = ("subjectivite", "clickbait", "manque_preuves")
+
+CHEMIN_MODELE = os.getenv("FAKELAB_LOCAL_MODEL", os.path.join(CACHE_DIR, "modele_local.npz"))
+# A_sem estimé dans cette bande -> incertain -> Gemini
+BANDE_INCERTITUDE = tuple(float(x) for x in os.getenv("FAKELAB_LOCAL_BANDE", "35,65").split(","))
+# Part minimale des n-grammes de l'article déjà vus à l'entraînement
+COUVERTURE_MIN = float(os.getenv("FAKELAB_LOCAL_COUVERTURE", "0.5"))
+# Part des articles « sûrs » envoyés quand même à Gemini pour mesurer l'accord
+TAUX_CONTROLE = float(os.getenv("FAKELAB_LOCAL_CONTROLE", "0.05"))
+# Écart d'A_sem (sur 100) en deçà duquel local et Gemini sont « d'accord »
+TOLERANCE_ACCORD = 15.0
+
+_MOT = re.compile(r"\w+", re.UNICODE)
+_PREMIERE_PERSONNE = {"je", "j", "moi", "me", "nous", "mon", "ma", "mes", "notre", "nos"}
+_ATTRIBUTION = {"selon", "affirme", "déclare", "indique", "rapporte", "source", "sources",
+                "étude", "rapport", "communiqué", "précise", "explique"}
+
+def _indices_style(texte, mots):
+    """Indices denses (indépendants du vocabulaire) : ponctuation, majuscules, chiffres..."""
+    n_mots = max(1, len(mots))
+    n_car = max(1, len(texte))
+    return [
+        texte.count("!") / n_mots * 10,
+        texte.count("?") / n_mots * 10,
+        sum(c.isupper() for c in texte) / n_car * 10,
+        sum(c.isdigit() for c in texte) / n_car * 10,
+        (texte.count('"') + texte.count("«")) / n_mots * 10,
+        sum(m in _PREMIERE_PERSONNE for m in mots) / n_mots * 10,
+        sum(m in _ATTRIBUTION for m in mots) / n_mots * 10,
+        math.log1p(n_mots) / 10,
+    ]
+
+NB_STYLE = 8
+
+def vectoriser(texte):
+    """
+    Texte -> (indices, valeurs) creux dans un espace de DIMENSION + NB_STYLE colonnes.
+    Unigrammes et bigrammes hachés (signe aléatoire), tf sous-linéaire, norme L2.
+    """
+    minuscule = (texte or "").lower()
+    mots = _MOT.findall(minuscule)
+    comptes = {}
+    for i, mot in enumerate(mots):
+        for gramme in (mot, f"{mots[i - 1]} {mot}" if i else None):
+            if gramme is None:
+                continue
+            h = zlib.crc32(gramme.encode("utf-8"))
+            indice = h & (DIMENSION - 1)
+            signe = 1.0 if h & DIMENSION else -1.0
+            comptes[indice] = comptes.get(indice, 0.0) + signe
+    indices = list(comptes)
+    valeurs = [math.copysign(1 + math.log(abs(v)), v) if v else 0.0 for v in comptes.values()]
+    norme = math.sqrt(sum(v * v for v in valeurs)) or 1.0
+    valeurs = [v / norme for v in valeurs]
+    indices += range(DIMENSION, DIMENSION + NB_STYLE)
+    valeurs += _indices_style(texte or "", mots)
+    return indices, valeurs
+
+def _matrice(textes):
+    """Matrice creuse au format CSR (indices, valeurs, ligne de chaque valeur, nb lignes)."""
+    import numpy as np
+    indices, valeurs, lignes = [], [], []
+    for i, texte in enumerate(textes):
+        idx, val = vectoriser(texte)
+        indices += idx
+        valeurs += val
+        lignes += [i] * len(idx)
+    return (np.asarray(indices, dtype=np.int64), np.asarray(valeurs, dtype=np.float64),
+            np.asarray(lignes, dtype=np.int64), len(textes))
+
+def _produit(X, w):
+    """X @ w pour la matrice creuse X."""
+    import numpy as np
+    indices, valeurs, lignes, n = X
+    return np.bincount(lignes, weights=valeurs * w[indices], minlength=n)
+
+def _produit_t(X, r, dim):
+    """X.T @ r."""
+    import numpy as np
+    indices, valeurs, lignes, _ = X
+    return np.bincount(indices, weights=valeurs * r[lignes], minlength=dim)
+
+def _ridge(X, y, dim, alpha=1.0, iterations=200):
+    """Résout (XᵀX + αI) w = Xᵀy par gradient conjugué (sans jamais densifier X)."""
+    import numpy as np
+    def operateur(v):
+        return _produit_t(X, _produit(X, v), dim) + alpha * v
+    w = np.zeros(dim)
+    r = _produit_t(X, y, dim)
+    p = r.copy()
+    rr = r @ r
+    for _ in range(iterations):
+        if rr < 1e-10:
+            break
+        Ap = operateur(p)
+        pas = rr / (p @ Ap)
+        w += pas * p
+        r -= pas * Ap
+        rr_nouveau = r @ r
+        p = r + (rr_nouveau / rr) * p
+        rr = rr_nouveau
+    return w
+
+class LocalSemanticModel:
+    """Trois régressions linéaires partageant les mêmes features (une par sous-score)."""
+    def __init__(self, poids, biais, vus, alpha=1.0):
+        self.poids = poids      # (DIMENSION + NB_STYLE, 3)
+        self.biais = biais      # (3,)
+        self.vus = vus          # (DIMENSION,) bool : n-gramme présent dans >= 2 articles d'entraînement
+        self.alpha = alpha
+
+    @classmethod
+    def entrainer(cls, textes, cibles, alpha=1.0):
+        """cibles : liste de (subjectivite, clickbait, manque_preuves) sur 10."""
+        import numpy as np
+        X = _matrice(textes)
+        Y = np.asarray(cibles, dtype=np.float64)
+        biais = Y.mean(axis=0)
+        dim = DIMENSION + NB_STYLE
+        poids = np.stack([_ridge(X, Y[:, k] - biais[k], dim, alpha) for k in range(Y.shape[1])], axis=1)
+        indices, _, lignes, _ = X
+        # Fréquence documentaire des n-grammes (paires uniques ligne/indice)
+        uniques = np.unique(lignes * (dim + 1) + indices) % (dim + 1)
+        vus = np.bincount(uniques[uniques < DIMENSION], minlength=DIMENSION) >= 2
+        return cls(poids, biais, vus, alpha)
+
+    def predire(self, texte):
+        """Retourne ({sous-score: note sur 10}, A_sem sur 100, couverture du vocabulaire)."""
+        import numpy as np
+        indices, valeurs = vectoriser(texte)
+        indices = np.asarray(indices)
+        notes = np.clip(np.asarray(valeurs) @ self.poids[indices] + self.biais, 0, 10)
+        hache = indices[indices < DIMENSION]
+        couverture = float(self.vus[hache].mean()) if len(hache) else 0.0
+        scores = {nom: round(float(n), 1) for nom, n in zip(SOUS_SCORES, notes)}
+        return scores, round(float(notes.mean()) * 10, 1), couverture
+
+    def est_sur(self, a_sem, couverture, bande=None):
+        bas, haut = bande or BANDE_INCERTITUDE
+        return couverture >= COUVERTURE_MIN and not (bas <= a_sem <= haut)
+
+    def analyser(self, texte):
+        """
+        Même structure que analyze_text_semantics (analyse_*, A_sem, modele_utilise),
+        avec en plus 'confiance_locale' : {couverture, sur}.
+        """
+        scores, a_sem, couverture = self.predire(texte)
+        niveau = "FIABLE" if a_sem < 35 else ("SUSPECT" if a_sem > 65 else "DOUTEUX")
+        return {
+            "analyse_subjectivite": {"score": scores["subjectivite"], "details": "Estimation du modèle local."},
+            "analyse_clickbait": {"score": scores["clickbait"], "details": "Estimation du modèle local."},
+            "analyse_preuves": {"score_manque_preuves": scores["manque_preuves"],
+                                "details": "Estimation du modèle local."},
+            "synthese_globale": "Score estimé localement (article proche de cas déjà analysés par l'IA).",
+            "verdict_style": niveau,
+            "modele_utilise": "local",
+            "A_sem": a_sem,
+            "confiance_locale": {"couverture": round(couverture, 3), "sur": self.est_sur(a_sem, couverture)},
+        }
+
+    def sauvegarder(self, chemin=CHEMIN_MODELE):
+        import numpy as np
+        os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+        tmp = f"{chemin}.tmp.npz"
+        np.savez_compressed(tmp, poids=self.poids.astype(np.float32), biais=self.biais,
+                            vus=self.vus, dimension=DIMENSION, alpha=self.alpha)
+        os.replace(tmp, chemin)
+
+    @classmethod
+    def charger(cls, chemin=CHEMIN_MODELE):
+        import numpy as np
+        with np.load(chemin) as f:
+            if int(f["dimension"]) != DIMENSION:
+                raise ValueError(f"Modèle entraîné avec une autre dimension ({int(f['dimension'])})")
+            return cls(f["poids"].astype(np.float64), f["biais"], f["vus"], float(f["alpha"]))
+
+# --- Tri en production ---
+
+_MODELE = {}
+_LOCK = threading.Lock()
+_STATS = {"locales": 0, "escaladees": 0, "controles": 0, "comparaisons": 0, "accords": 0}
+
+def get_local_model():
+    """Modèle chargé une fois (None si absent ou désactivé par FAKELAB_LOCAL_MODEL=0)."""
+    with _LOCK:
+        if "modele" not in _MODELE:
+            modele = None
+            if os.getenv("FAKELAB_LOCAL_MODEL") != "0" and os.path.exists(CHEMIN_MODELE):
+                try:
+                    modele = LocalSemanticModel.charger(CHEMIN_MODELE)
+                except Exception as e:
+                    print(f"⚠️ Modèle local illisible ({CHEMIN_MODELE}) : {e}")
+            _MODELE["modele"] = modele
+        return _MODELE["modele"]
+
+def trier(texte):
+    """
+    Retourne (analyse locale ou None, action) avec action parmi :
+    "local" (résultat sûr, pas d'appel Gemini), "escalade" (incertain),
+    "controle" (sûr, mais tiré au sort pour mesurer l'accord) ou "absent" (pas de modèle).
+    """
+    modele = get_local_model()
+    if modele is None:
+        return None, "absent"
+    analyse = modele.analyser(texte)
+    if not analyse["confiance_locale"]["sur"]:
+        action = "escalade"
+    elif TAUX_CONTROLE and zlib.crc32(texte.encode("utf-8")) % 10000 < TAUX_CONTROLE * 10000:
+        action = "controle"
+    else:
+        action = "local"
+    with _LOCK:
+        _STATS[{"local": "locales", "escalade": "escaladees", "controle": "controles"}[action]] += 1
+    return analyse, action
+
+def comparer(analyse_locale, analyse_gemini):
+    """Enregistre l'accord entre l'estimation locale et la réponse Gemini."""
+    if (analyse_locale is None or "error" in analyse_gemini or "A_sem" not in analyse_gemini
+            or analyse_gemini.get("indisponible")):
+        return None
+    accord = abs(analyse_locale["A_sem"] - analyse_gemini["A_sem"]) <= TOLERANCE_ACCORD
+    with _LOCK:
+        _STATS["comparaisons"] += 1
+        _STATS["accords"] += accord
+    return accord
+
+def stats():
+    """Appels Gemini économisés et taux d'accord local/Gemini (sur les comparaisons faites)."""
+    with _LOCK:
+        s = dict(_STATS)
+    total = s["locales"] + s["escaladees"] + s["controles"]
+    s["appels_economises"] = s["locales"]
+    s["part_locale"] = round(s["locales"] / total, 3) if total else 0.0
+    s["taux_accord"] = round(s["accords"] / s["comparaisons"], 3) if s["comparaisons"] else None
+    return s
+
+# --- Entraînement depuis l'historique ---
+
+def lire_historique(chemins):
+    """(textes, cibles) depuis les JSONL de batch.py : seules les analyses faites par Gemini."""
+    textes, cibles = [], []
+    for chemin in chemins:
+        with open(chemin, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    resultat = json.loads(ligne).get("resultat", {})
+                except json.JSONDecodeError:
+                    continue
+                ia = resultat.get("details_ia") or {}
+                if not resultat.get("contenu") or ia.get("modele_utilise") in (None, "local", "aucun"):
+                    continue
+                try:
+                    cibles.append((float(ia["analyse_subjectivite"]["score"]),
+                                   float(ia["analyse_clickbait"]["score"]),
+                                   float(ia["analyse_preuves"]["score_manque_preuves"])))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                textes.append(resultat["contenu"])
+    return textes, cibles
+
+def evaluer(modele, textes, cibles, bande=None):
+    """Erreur moyenne par sous-score, accord sur A_sem, part des articles traités localement."""
+    import numpy as np
+    predictions = [modele.predire(t) for t in textes]
+    notes = np.asarray([[p[0][n] for n in SOUS_SCORES] for p in predictions])
+    Y = np.asarray(cibles)
+    a_sem_local = np.asarray([p[1] for p in predictions])
+    a_sem_vrai = Y.mean(axis=1) * 10
+    surs = np.asarray([modele.est_sur(p[1], p[2], bande) for p in predictions])
+    accords = np.abs(a_sem_local - a_sem_vrai) <= TOLERANCE_ACCORD
+    return {
+        "articles": len(textes),
+        **{f"mae_{n}": round(float(np.abs(notes[:, k] - Y[:, k]).mean()), 2) for k, n in enumerate(SOUS_SCORES)},
+        "mae_A_sem": round(float(np.abs(a_sem_local - a_sem_vrai).mean()), 1),
+        "taux_accord": round(float(accords.mean()), 3),
+        "part_locale": round(float(surs.mean()), 3),
+        "taux_accord_local": round(float(accords[surs].mean()), 3) if surs.any() else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Modèle sémantique local")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("train", help="Entraîne depuis des JSONL de batch.py")
+    p.add_argument("historique", nargs="+")
+    p.add_argument("-o", "--output", default=CHEMIN_MODELE)
+    p.add_argument("--alpha", type=float, default=1.0, help="Régularisation ridge")
+    p = sous.add_parser("eval", help="Évalue le modèle sur des JSONL de batch.py")
+    p.add_argument("historique", nargs="+")
+    p.add_argument("--bande", help="Bande d'incertitude à tester, ex : 30,70")
+    p = sous.add_parser("predict", help="Score local d'un texte")
+    p.add_argument("texte")
+    args = parser.parse_args()
+
+    if args.commande == "train":
+        textes, cibles = lire_historique(args.historique)
+        if len(textes) < 20:
+            sys.exit(f"Historique trop court : {len(textes)} analyses Gemini (20 minimum).")
+        # Validation sur 20 % de l'historique, puis entraînement final sur tout
+        coupe = len(textes) * 4 // 5
+        essai = LocalSemanticModel.entrainer(textes[:coupe], cibles[:coupe], args.alpha)
+        print(json.dumps(evaluer(essai, textes[coupe:], cibles[coupe:]), ensure_ascii=False, indent=2))
+        LocalSemanticModel.entrainer(textes, cibles, args.alpha).sauvegarder(args.output)
+        print(f"💾 Modèle entraîné sur {len(textes)} analyses : {args.output}")
+    elif args.commande == "eval":
+        textes, cibles = lire_historique(args.historique)
+        bande = tuple(float(x) for x in args.bande.split(",")) if args.bande else None
+        print(json.dumps(evaluer(LocalSemanticModel.charger(), textes, cibles, bande),
+                         ensure_ascii=False, indent=2))
+    else:
+        modele = get_local_model()
+        if modele is None:
+            sys.exit(f"Aucun modèle local ({CHEMIN_MODELE}) : lancer d'abord 'train'.")
+        print(json.dumps(modele.analyser(args.texte), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+File d'envoi des rapports par email.
+
+Un thread d'arrière-plan garde UNE connexion SMTP authentifiée ouverte et
+l'utilise pour tous les messages en attente (envoi groupé), avec nouvelles
+tentatives espacées en cas d'échec. L'appelant reçoit tout de suite un
+EnvoiMail dont il peut suivre l'état.
+
+Serveur configurable (FAKELAB_SMTP_HOST / _PORT / _STARTTLS) : pour tester
+en local, lancer par exemple `python -m aiosmtpd -n -l localhost:8025` puis
+FAKELAB_SMTP_HOST=localhost FAKELAB_SMTP_PORT=8025 FAKELAB_SMTP_STARTTLS=0.
+"""
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+SMTP_HOST = os.getenv("FAKELAB_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("FAKELAB_SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("FAKELAB_SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("FAKELAB_SMTP_TIMEOUT", "20"))
+# Connexion fermée après ce délai sans message (les serveurs coupent les connexions inactives)
+SMTP_INACTIVITE = float(os.getenv("FAKELAB_SMTP_IDLE", "60"))
+
+# Messages envoyés au plus sur la connexion à chaque réveil du thread d'envoi
+TAILLE_LOT = 20
+# Nouvelles tentatives : 2 s, 4 s, 8 s... (+ gigue), puis abandon
+MAX_TENTATIVES = 4
+DELAI_BASE = 2.0
+
+_ARRET = object()  # sentinelle de fin de file (voir Mailer.arreter)
+
+class EnvoiMail:
+    """Suivi d'un message : etat en_attente -> envoye | echec."""
+    def __init__(self, destinataire, sujet, corps):
+        self.destinataire = destinataire
+        self.sujet = sujet
+        self.corps = corps
+        self.etat = "en_attente"
+        self.tentatives = 0
+        self.erreur = None
+        self.prochain_essai = 0.0
+        self._fini = threading.Event()
+
+    @property
+    def termine(self):
+        return self._fini.is_set()
+
+    def attendre(self, timeout=None):
+        """True si le message est parti, False s'il a échoué ou si le délai expire."""
+        self._fini.wait(timeout)
+        return self.etat == "envoye"
+
+    def _terminer(self, etat, erreur=None):
+        self.etat = etat
+        self.erreur = erreur
+        self._fini.set()
+
+class Mailer:
+    def __init__(self, expediteur, mot_de_passe, hote=SMTP_HOST, port=SMTP_PORT, starttls=SMTP_STARTTLS):
+        self.expediteur = expediteur
+        self.mot_de_passe = mot_de_passe
+        self.hote = hote
+        self.port = port
+        self.starttls = starttls
+        self._file = queue.Queue()
+        self._reessais = []  # messages en attente de leur prochaine tentative
+        self._smtp = None
+        self._derniere_activite = 0.0
+        self._lock = threading.Lock()
+        self._arrete = False   # plus de nouveaux messages acceptés
+        self._vidage = False   # le thread a vu la sentinelle : il finit la file puis s'arrête
+        self.stats = {"envoyes": 0, "echecs": 0, "reessais": 0, "connexions": 0}
+        self._thread = threading.Thread(target=self._boucle, daemon=True, name="fakelab-mailer")
+        self._thread.start()
+
+    def envoyer(self, destinataire, sujet, corps):
+        """Met le message en file et rend la main immédiatement."""
+        envoi = EnvoiMail(destinataire, sujet, corps)
+        with self._lock:
+            if self._arrete:
+                envoi._terminer("echec", "File d'envoi arrêtée")
+            else:
+                self._file.put(envoi)
+        return envoi
+
+    def arreter(self):
+        """
+        Refuse les nouveaux messages ; le thread envoie ceux déjà en file
+        (ré-essais compris), ferme la connexion SMTP et s'arrête.
+        """
+        with self._lock:
+            if not self._arrete:
+                self._arrete = True
+                self._file.put(_ARRET)  # dernier élément de la file
+
+    # --- Thread d'envoi ---
+
+    def _boucle(self):
+        while True:
+            if self._vidage and not self._reessais:
+                self._fermer()
+                return
+            lot = self._prochain_lot()
+            if _ARRET in lot:
+                self._vidage = True
+                lot.remove(_ARRET)
+            if not lot:
+                if self._smtp is not None and time.monotonic() - self._derniere_activite > SMTP_INACTIVITE:
+                    self._fermer()
+                continue
+            for envoi in lot:
+                try:
+                    self._envoyer_un(envoi)
+                except Exception as e:  # le thread d'envoi ne doit jamais mourir
+                    self._echec(envoi, f"Erreur interne : {e}")
+            self._derniere_activite = time.monotonic()
+
+    def _prochain_lot(self):
+        """Attend un message (ou l'échéance d'un ré-essai), puis prend tout ce qui est prêt."""
+        maintenant = time.monotonic()
+        prets = [e for e in self._reessais if e.prochain_essai <= maintenant]
+        self._reessais = [e for e in self._reessais if e.prochain_essai > maintenant]
+        if not prets:
+            echeances = [e.prochain_essai - maintenant for e in self._reessais]
+            delai = min(echeances + [SMTP_INACTIVITE if self._smtp is not None else 3600])
+            try:
+                prets.append(self._file.get(timeout=max(0.05, delai)))
+            except queue.Empty:
+                return []
+        while len(prets) < TAILLE_LOT:
+            try:
+                prets.append(self._file.get_nowait())
+            except queue.Empty:
+                break
+        return prets
+
+    def _connexion(self):
+        """Connexion SMTP réutilisée ; vérifiée par NOOP, rouverte si le serveur l'a coupée."""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._fermer()
+        smtp = smtplib.SMTP(self.hote, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.mot_de_passe and smtp.has_extn("auth"):
+                smtp.login(self.expediteur, self.mot_de_passe)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.stats["connexions"] += 1
+        return smtp
+
+    def _envoyer_un(self, envoi):
+        msg = MIMEMultipart()
+        msg['From'] = self.expediteur
+        msg['To'] = envoi.destinataire
+        msg['Subject'] = envoi.sujet
+        msg.attach(MIMEText(envoi.corps, 'plain'))
+        envoi.tentatives += 1
+        try:
+            self._connexion().sendmail(self.expediteur, envoi.destinataire, msg.as_string())
+        except smtplib.SMTPRecipientsRefused as e:
+            # Adresse refusée : inutile de réessayer
+            self._echec(envoi, f"Destinataire refusé : {e.recipients}")
+        except (smtplib.SMTPException, OSError) as e:
+            print(f"Erreur mail (tentative {envoi.tentatives}) : {e}")
+            self._fermer()
+            if isinstance(e, smtplib.SMTPAuthenticationError) or envoi.tentatives >= MAX_TENTATIVES:
+                self._echec(envoi, str(e))
+            else:
+                delai = DELAI_BASE * 2 ** (envoi.tentatives - 1)
+                envoi.prochain_essai = time.monotonic() + delai * random.uniform(0.8, 1.2)
+                self._reessais.append(envoi)
+                self.stats["reessais"] += 1
+        else:
+            self.stats["envoyes"] += 1
+            envoi._terminer("envoye")
+
+    def _echec(self, envoi, erreur):
+        self.stats["echecs"] += 1
+        envoi._terminer("echec", erreur)
+
+    def _fermer(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+_MAILERS = {}
+_MAILERS_LOCK = threading.Lock()
+
+def get_mailer(expediteur, mot_de_passe):
+    """Une file d'envoi (et une connexion SMTP) par compte expéditeur."""
+    with _MAILERS_LOCK:
+        mailer = _MAILERS.get(expediteur)
+        if mailer is None or mailer.mot_de_passe != mot_de_passe:
+            if mailer is not None:
+                mailer.arreter()  # ses messages en file partent encore avec l'ancien mot de passe
+            mailer = _MAILERS[expediteur] = Mailer(expediteur, mot_de_passe)
+        return mailer
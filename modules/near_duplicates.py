@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+
+from modules.cache import chemin_cache
+
+# Signature MinHash : NB_BANDES bandes de LIGNES_PAR_BANDE valeurs (LSH).
+# Avec 16 x 8, deux textes similaires à 80 % tombent dans un même seau avec ~96 % de chances,
+# deux textes à 50 % dans ~6 % des cas seulement.
+NB_BANDES = 16
+LIGNES_PAR_BANDE = 8
+NB_PERMUTATIONS = NB_BANDES * LIGNES_PAR_BANDE
+TAILLE_SHINGLE = 5   # mots par shingle
+MIN_MOTS = 30        # textes plus courts : pas de recherche (trop peu de shingles)
+
+# Similarité (Jaccard estimée) à partir de laquelle une analyse est réutilisée
+SEUIL = float(os.getenv("FAKELAB_DOUBLON_SEUIL", "0.8"))
+# Âge maximal d'une analyse réutilisable
+TTL = int(os.getenv("FAKELAB_DOUBLON_TTL", str(7 * 24 * 3600)))
+# Intervalle minimal entre deux lectures des ajouts faits par d'autres processus
+INTERVALLE_SYNCHRO = 2.0
+
+_MOT = re.compile(r"\w+", re.UNICODE)
+
+def _permutations():
+    """Coefficients (a, b) fixes des NB_PERMUTATIONS fonctions de hachage (multiply-shift)."""
+    import numpy as np
+    rng = np.random.default_rng(20240601)  # fixe : les signatures persistées restent comparables
+    a = rng.integers(1, 2 ** 63, NB_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, NB_PERMUTATIONS, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+class NearDuplicateIndex:
+    """
+    Index MinHash/LSH des textes déjà analysés, pour retrouver en moins d'une
+    milliseconde un article quasi identique (repris mot pour mot sur un autre site).
+    Les seaux LSH sont en mémoire ; les signatures sont persistées dans SQLite
+    et relues de façon incrémentale (ajouts des autres processus inclus).
+    """
+    def __init__(self, chemin=None, seuil=SEUIL, ttl=TTL):
+        self.chemin = chemin or chemin_cache("doublons.sqlite")
+        self.seuil = seuil
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entrees = {}                 # id -> (signature, url, donnees, cree)
+        self._seaux = defaultdict(set)     # (bande, valeurs de la bande) -> ids
+        self._dernier_id = 0
+        self._derniere_synchro = 0.0
+        self._a, self._b = _permutations()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS doublons (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    donnees TEXT NOT NULL,
+                    cree REAL NOT NULL
+                )""")
+            conn.execute("DELETE FROM doublons WHERE cree < ?", (time.time() - self.ttl,))
+        self._synchroniser(force=True)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.chemin, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def signature(self, texte):
+        """Signature MinHash (uint64[NB_PERMUTATIONS]) des shingles de mots, ou None si texte trop court."""
+        import numpy as np
+        mots = _MOT.findall((texte or "").lower())
+        if len(mots) < MIN_MOTS:
+            return None
+        shingles = {zlib.crc32(" ".join(mots[i:i + TAILLE_SHINGLE]).encode("utf-8"))
+                    for i in range(len(mots) - TAILLE_SHINGLE + 1)}
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))[None, :]
+        # h(x) = (a*x + b) >> 32, arithmétique modulo 2^64 (débordement voulu)
+        return ((self._a * x + self._b) >> np.uint64(32)).min(axis=1)
+
+    def _bandes(self, signature):
+        for bande in range(NB_BANDES):
+            yield bande, signature[bande * LIGNES_PAR_BANDE:(bande + 1) * LIGNES_PAR_BANDE].tobytes()
+
+    def chercher(self, texte=None, signature=None):
+        """
+        Analyse antérieure la plus proche au-dessus du seuil :
+        {"url", "similarite", "donnees"} ou None.
+        """
+        if signature is None:
+            signature = self.signature(texte)
+        if signature is None:
+            return None
+        self._synchroniser()
+        limite = time.time() - self.ttl
+        with self._lock:
+            candidats = set()
+            for cle in self._bandes(signature):
+                candidats |= self._seaux.get(cle, set())
+            meilleur, meilleure_sim = None, 0.0
+            for doc_id in candidats:
+                sig, url, donnees, cree = self._entrees[doc_id]
+                if cree < limite:
+                    continue
+                sim = float((sig == signature).mean())
+                if sim >= self.seuil and sim > meilleure_sim:
+                    meilleur, meilleure_sim = (url, donnees), sim
+        if meilleur is None:
+            return None
+        return {"url": meilleur[0], "similarite": round(meilleure_sim, 3), "donnees": meilleur[1]}
+
+    def ajouter(self, url, texte=None, donnees=None, signature=None):
+        """Indexe un texte analysé avec les données réutilisables (fact-check, IA)."""
+        if signature is None:
+            signature = self.signature(texte)
+        if signature is None:
+            return
+        with self._connect() as conn:
+            conn.execute("INSERT INTO doublons (url, signature, donnees, cree) VALUES (?, ?, ?, ?)",
+                         (url, signature.tobytes(), json.dumps(donnees, ensure_ascii=False), time.time()))
+        self._synchroniser(force=True)
+
+    def _synchroniser(self, force=False):
+        """Charge les lignes ajoutées depuis la dernière lecture (par ce processus ou un autre)."""
+        import numpy as np
+        if not force and time.monotonic() - self._derniere_synchro < INTERVALLE_SYNCHRO:
+            return
+        self._derniere_synchro = time.monotonic()
+        with self._connect() as conn:
+            lignes = conn.execute(
+                "SELECT id, url, signature, donnees, cree FROM doublons WHERE id > ? ORDER BY id",
+                (self._dernier_id,)).fetchall()
+        with self._lock:
+            for doc_id, url, blob, donnees, cree in lignes:
+                if doc_id <= self._dernier_id:
+                    continue
+                signature = np.frombuffer(blob, dtype=np.uint64)
+                self._entrees[doc_id] = (signature, url, json.loads(donnees), cree)
+                for cle in self._bandes(signature):
+                    self._seaux[cle].add(doc_id)
+                self._dernier_id = doc_id
+
+    def __len__(self):
+        return len(self._entrees)
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+def get_near_duplicate_index():
+    """Index partagé du processus (None si désactivé par FAKELAB_DOUBLON=0)."""
+    global _INDEX
+    if os.getenv("FAKELAB_DOUBLON") == "0":
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = NearDuplicateIndex()
+        return _INDEX
@@ -1,36 +1,68 @@
 import json
-import tldextract
-import wikipediaapi
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.cache import SQLiteStore, chemin_cache
+from modules.domain_index import get_domain_index
+from modules.resilience import ServiceIndisponible
+from modules.wiki_client import WikipediaClient
+from modules.tracing import TRACE_NULLE
+
+# Durée de vie du résultat Wikipédia d'un domaine dans le cache partagé
+WIKI_CACHE_TTL = int(os.getenv("FAKELAB_REPUTATION_TTL", str(7 * 24 * 3600)))
+
+# Vérifications Wikipédia différées (mode wiki_differe)
+_WIKI_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fakelab-wiki")
+_WIKI_EN_COURS = set()
+_WIKI_LOCK = threading.Lock()
+
+# Réponse neutre quand Wikipédia est indisponible (jamais mise en cache)
+WIKI_INDISPONIBLE = (0.5, "INCONNU", "Wikipédia indisponible",
+                     "Wikipédia ne répond pas : score neutre 0.5 en attendant.")
+
+_REPUTATION_CACHE = None
+
+def get_reputation_cache():
+    """Cache domaine -> résultat Wikipédia, partagé entre requêtes et processus (SQLite)."""
+    global _REPUTATION_CACHE
+    with _WIKI_LOCK:
+        if _REPUTATION_CACHE is None:
+            _REPUTATION_CACHE = SQLiteStore(chemin_cache("reputation.sqlite"), "reputation_wiki")
+        return _REPUTATION_CACHE
 
 class ReputationChecker:
-    def __init__(self):
+    def __init__(self, use_cache=True, wiki_differe=False):
+        """
+        use_cache    : réutilise le résultat Wikipédia déjà calculé pour un domaine.
+        wiki_differe : si le domaine est en liste blanche/noire, on répond tout de suite
+                       et l'analyse croisée Wikipédia se fait en arrière-plan
+                       (ses détails apparaissent aux appels suivants).
+        """
         # Configuration Wikipédia (User-Agent requis par leur politique)
-        self.wiki = wikipediaapi.Wikipedia(
+        # Passe par le client HTTP partagé (connexions réutilisées, timeouts)
+        self.wiki = WikipediaClient(
             user_agent='FakeLabProject/1.0 (contact@fakelab.org)',
             language='fr'
         )
-        self.local_db = self._load_local_db()
-
-    def _load_local_db(self):
-        """
-        Charge la base de données locale (Format simple Whitelist/Blacklist).
-        """
-        try:
-            with open('sources.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Erreur chargement DB : {e}")
-            return {"whitelist": [], "blacklist": []}
+        self.cache = get_reputation_cache() if use_cache else None
+        self.wiki_differe = wiki_differe
 
     def get_domain(self, url):
         """Extrait le domaine principal (ex: 'lemonde.fr' depuis 'http://www.lemonde.fr/article')"""
         # Si c'est déjà juste un domaine, tldextract le gère bien
+        import tldextract  # import différé (chargement de la liste des suffixes publics)
         extracted = tldextract.extract(url)
         if extracted.suffix:
             return f"{extracted.domain}.{extracted.suffix}"
         return extracted.domain # Cas localhost ou sans suffixe
 
+    def get_hostname(self, url):
+        """Nom d'hôte complet (ex: 'news.lemonde.fr' depuis 'https://news.lemonde.fr/a')"""
+        import tldextract
+        extracted = tldextract.extract(url)
+        return ".".join(p for p in (extracted.subdomain, extracted.domain, extracted.suffix) if p)
+
     def check_source(self, url):
         """
         Analyse la réputation du domaine.
@@ -40,7 +72,7 @@ class ReputationChecker:
         domain = self.get_domain(url)
         print(f"🔎 Analyse du domaine : {domain}")
 
-    def check_source(self, url):
+    def check_source(self, url, trace=TRACE_NULLE):
         """
         Analyse la réputation du domaine.
         Combine Base Locale ET Wikipédia pour un résultat robuste.
@@ -53,18 +85,36 @@ class ReputationChecker:
         local_status = None
         local_comment = ""
         
-        if domain in self.local_db.get('blacklist', []):
+        # Index compilé de sources.json, rechargé à chaud si le fichier change.
+        # Recherche sur le nom d'hôte complet : couvre 'news.exemple.com' et les règles '*.gouv.bj'
+        with trace.span("reputation.liste_locale") as span:
+            liste = get_domain_index().lookup(self.get_hostname(url))
+            span.set(liste=liste)
+        if liste == "blacklist":
             local_score = 0.0
             local_status = "DANGEREUX"
             local_comment = "Liste Noire"
-        elif domain in self.local_db.get('whitelist', []):
+        elif liste == "whitelist":
             local_score = 1.0
             local_status = "FIABLE"
             local_comment = "Liste Blanche"
 
-        # 2. Vérification Wikipédia (Toujours exécutée pour cross-check en arrière-plan)
-        print("   ...Interrogation de Wikipédia (Analyse croisée)...")
-        wiki_score, wiki_status, wiki_source, wiki_details = self._check_wikipedia(domain)
+        # 2. Vérification Wikipédia (cross-check, servi par le cache si possible)
+        with trace.span("reputation.wikipedia") as span:
+            wiki = self._wiki_depuis_cache(domain)
+            span.issue = "cache"
+            if wiki is None and local_score is not None and self.wiki_differe and self.cache is not None:
+                # Verdict local immédiat, Wikipédia sera fusionné plus tard via le cache
+                self._lancer_wiki_differe(domain)
+                span.issue = "differe"
+            elif wiki is None:
+                wiki = self._check_wikipedia_et_cache(domain)
+                span.issue = "degrade" if wiki is WIKI_INDISPONIBLE else "appel"
+        if wiki is None:
+            final_details = (f"📍 [LOCAL] {local_comment}. "
+                             f"📚 [WIKIPEDIA] Analyse croisée en cours...")
+            return local_score, local_status, "Locale (Wiki en attente)", final_details
+        wiki_score, wiki_status, wiki_source, wiki_details = wiki
 
         # 3. Consolidation des résultats
         if local_score is not None:
@@ -78,6 +128,48 @@ class ReputationChecker:
         # Sinon, on se base entièrement sur Wikipédia
         return wiki_score, wiki_status, wiki_source, wiki_details
 
+    def _wiki_depuis_cache(self, domain):
+        if self.cache is None:
+            return None
+        try:
+            wiki = self.cache.get(domain)
+        except Exception as e:
+            print(f"Erreur cache réputation : {e}")
+            return None
+        return tuple(wiki) if wiki is not None else None
+
+    def _check_wikipedia_et_cache(self, domain):
+        print("   ...Interrogation de Wikipédia (Analyse croisée)...")
+        try:
+            wiki = self._check_wikipedia(domain)
+        except ServiceIndisponible as e:
+            print(f"⚠️ {e}")
+            return WIKI_INDISPONIBLE
+        if self.cache is not None:
+            try:
+                self.cache.set(domain, list(wiki), ttl=WIKI_CACHE_TTL)
+            except Exception as e:
+                print(f"Erreur cache réputation : {e}")
+        return wiki
+
+    def _lancer_wiki_differe(self, domain):
+        """Une seule vérification en arrière-plan par domaine à la fois."""
+        with _WIKI_LOCK:
+            if domain in _WIKI_EN_COURS:
+                return
+            _WIKI_EN_COURS.add(domain)
+
+        def tache():
+            try:
+                self._check_wikipedia_et_cache(domain)
+            except Exception as e:
+                print(f"Erreur Wikipédia différée ({domain}) : {e}")
+            finally:
+                with _WIKI_LOCK:
+                    _WIKI_EN_COURS.discard(domain)
+
+        _WIKI_EXECUTOR.submit(tache)
+
     def _check_wikipedia(self, domain):
         """
         Cherche le site sur Wikipédia et calcule un score intelligent basé sur le vocabulaire utilisé.
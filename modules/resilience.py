@@ -0,0 +1,301 @@
+"""
+FAKELAB - Résilience des appels aux API externes (Gemini, Fact Check, Wikipédia).
+
+Chaque service a :
+  - un seau à jetons (débit moyen + rafale) calé sur nos quotas : au-delà,
+    l'appel attend son tour au plus FAKELAB_QUOTA_ATTENTE secondes ;
+  - des réessais espacés (0,5 s, 1 s... + gigue), bornés par un budget :
+    sur une fenêtre glissante, pas plus de FAKELAB_BUDGET_REESSAIS (20 %)
+    de réessais par rapport aux appels, pour ne pas amplifier une panne ;
+  - un disjoncteur : après FAKELAB_CIRCUIT_SEUIL pannes consécutives, les
+    appels échouent tout de suite pendant FAKELAB_CIRCUIT_DELAI secondes,
+    puis un seul appel d'essai décide de la refermeture.
+
+Un appel refusé ou en panne lève ServiceIndisponible : l'appelant répond
+alors sa valeur neutre (NOT_FOUND, réputation 0.5, A_sem 50) au lieu
+d'attendre la panne. Seules les pannes (réseau, délai, 429, 5xx) comptent :
+une requête refusée pour une autre raison (clé invalide...) est propagée
+telle quelle.
+
+Quotas : FAKELAB_QUOTA_<SERVICE>="débit par seconde,rafale" ("0" = illimité).
+Métriques (modules.tracing.METRIQUES) : jauge circuit_<service>
+(0 fermé, 1 demi-ouvert, 2 ouvert) et spans api.<service> par issue
+(ok, panne, erreur, circuit_ouvert, quota).
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from modules.tracing import METRIQUES, Span
+
+# Quotas par défaut : (requêtes par seconde, rafale)
+QUOTAS_DEFAUT = {
+    "gemini": "1,10",      # 60 req/min ; 0.25,15 pour le niveau gratuit (15 req/min)
+    "factcheck": "5,10",
+    "wiki": "10,20",       # politesse envers l'API MediaWiki
+}
+ATTENTE_QUOTA = float(os.getenv("FAKELAB_QUOTA_ATTENTE", "10"))
+
+# Réessais : DELAI_BASE * 2 ** (n-1) (+ gigue), dans la limite du budget
+REESSAIS = int(os.getenv("FAKELAB_REESSAIS", "2"))
+DELAI_BASE = float(os.getenv("FAKELAB_REESSAI_DELAI", "0.5"))
+RATIO_REESSAIS = float(os.getenv("FAKELAB_BUDGET_REESSAIS", "0.2"))
+REESSAIS_MIN = 3         # réessais toujours permis par fenêtre (faible trafic)
+FENETRE_BUDGET = 10.0    # secondes
+
+SEUIL_CIRCUIT = int(os.getenv("FAKELAB_CIRCUIT_SEUIL", "5"))
+DELAI_CIRCUIT = float(os.getenv("FAKELAB_CIRCUIT_DELAI", "30"))
+
+FERME, DEMI_OUVERT, OUVERT = range(3)
+ETATS = ("ferme", "demi_ouvert", "ouvert")
+
+# Codes HTTP qui signalent un service en difficulté (et pas une requête fautive)
+CODES_PANNE = {429, 500, 502, 503, 504}
+
+class ServiceIndisponible(RuntimeError):
+    """
+    Appel refusé sans être tenté (refus=True : circuit ouvert, quota)
+    ou abandonné après des pannes répétées (l'exception d'origine en __cause__).
+    """
+    def __init__(self, service, raison, refus=False):
+        super().__init__(f"{service} indisponible ({raison})")
+        self.service = service
+        self.raison = raison
+        self.refus = refus
+
+def est_panne(exc):
+    """Réseau, délai dépassé, surcharge ou erreur serveur. Les exceptions requests sont des OSError."""
+    reponse = getattr(exc, "response", None)
+    code = getattr(reponse, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code in CODES_PANNE
+    return isinstance(exc, (OSError, TimeoutError)) or type(exc).__module__.split(".")[0] == "httpx"
+
+def delai_reessai(tentative):
+    """Attente avant le réessai n° tentative (1, 2...) : exponentielle, gigue ±20 %."""
+    return DELAI_BASE * 2 ** (tentative - 1) * random.uniform(0.8, 1.2)
+
+class SeauJetons:
+    """Débit moyen `debit` jetons/s, jusqu'à `rafale` d'un coup. debit <= 0 : illimité."""
+    def __init__(self, debit, rafale):
+        self.debit = debit
+        self.rafale = max(1.0, rafale)
+        self._jetons = self.rafale
+        self._maj = time.monotonic()
+        self._lock = threading.Lock()
+
+    def prendre(self, attente_max=ATTENTE_QUOTA):
+        """Réserve un jeton, en attendant au besoin. False si le quota ne le permet pas avant attente_max."""
+        if self.debit <= 0:
+            return True
+        with self._lock:
+            maintenant = time.monotonic()
+            self._jetons = min(self.rafale, self._jetons + (maintenant - self._maj) * self.debit)
+            self._maj = maintenant
+            attente = (1 - self._jetons) / self.debit if self._jetons < 1 else 0.0
+            if attente > attente_max:
+                return False
+            # Jeton réservé tout de suite (le solde peut devenir négatif) : les suivants attendent derrière
+            self._jetons -= 1
+        if attente:
+            time.sleep(attente)
+        return True
+
+class BudgetReessais:
+    """Sur les `fenetre` dernières secondes : réessais <= minimum + ratio * appels."""
+    def __init__(self, ratio=RATIO_REESSAIS, minimum=REESSAIS_MIN, fenetre=FENETRE_BUDGET):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.fenetre = fenetre
+        self._appels = deque()
+        self._reessais = deque()
+        self._lock = threading.Lock()
+
+    def _purger(self, maintenant):
+        for file in (self._appels, self._reessais):
+            while file and maintenant - file[0] > self.fenetre:
+                file.popleft()
+
+    def appel(self):
+        with self._lock:
+            maintenant = time.monotonic()
+            self._purger(maintenant)
+            self._appels.append(maintenant)
+
+    def reessayer(self):
+        """Réserve un réessai si le budget le permet."""
+        with self._lock:
+            maintenant = time.monotonic()
+            self._purger(maintenant)
+            if len(self._reessais) >= self.minimum + self.ratio * len(self._appels):
+                return False
+            self._reessais.append(maintenant)
+            return True
+
+class Disjoncteur:
+    """Fermé -> ouvert après `seuil` pannes consécutives -> demi-ouvert après `delai` s (un seul essai)."""
+    def __init__(self, nom, seuil=SEUIL_CIRCUIT, delai=DELAI_CIRCUIT):
+        self.nom = nom
+        self.seuil = seuil
+        self.delai = delai
+        self.etat = FERME
+        self.pannes = 0
+        self.ouvertures = 0
+        self._ouvert_depuis = 0.0
+        self._essai_en_cours = False
+        self._lock = threading.Lock()
+        METRIQUES.jauge(f"circuit_{nom}", FERME)
+
+    def autoriser(self):
+        with self._lock:
+            if self.etat == OUVERT:
+                if time.monotonic() - self._ouvert_depuis < self.delai:
+                    return False
+                self._changer(DEMI_OUVERT)
+            if self.etat == DEMI_OUVERT:
+                if self._essai_en_cours:
+                    return False
+                self._essai_en_cours = True
+            return True
+
+    def abandonner(self):
+        """L'appel autorisé n'a finalement pas eu lieu (quota) ou a été interrompu."""
+        with self._lock:
+            self._essai_en_cours = False
+
+    def succes(self):
+        with self._lock:
+            self.pannes = 0
+            self._essai_en_cours = False
+            if self.etat != FERME:
+                self._changer(FERME)
+
+    def panne(self):
+        with self._lock:
+            self.pannes += 1
+            self._essai_en_cours = False
+            if self.etat == DEMI_OUVERT or (self.etat == FERME and self.pannes >= self.seuil):
+                self._ouvert_depuis = time.monotonic()
+                self.ouvertures += 1
+                self._changer(OUVERT)
+
+    def _changer(self, etat):
+        self.etat = etat
+        METRIQUES.jauge(f"circuit_{self.nom}", etat)
+        print(f"⚡ Circuit {self.nom} : {ETATS[etat]}")
+
+class Service:
+    """Quota, budget de réessais et disjoncteur d'une API externe."""
+    def __init__(self, nom, debit, rafale, reessais=REESSAIS):
+        self.nom = nom
+        self.seau = SeauJetons(debit, rafale)
+        self.budget = BudgetReessais()
+        self.disjoncteur = Disjoncteur(nom)
+        self.reessais = reessais
+        self._lock = threading.Lock()
+        self.compteurs = {"appels": 0, "succes": 0, "pannes": 0, "erreurs": 0, "reessais": 0,
+                          "rejets_circuit": 0, "rejets_quota": 0}
+
+    def _compter(self, nom):
+        with self._lock:
+            self.compteurs[nom] += 1
+
+    def _observer(self, duree, issue):
+        span = Span(f"api.{self.nom}")
+        span.duree = duree
+        span.issue = issue
+        METRIQUES.observer(span)
+
+    def nouvel_appel(self):
+        """Compte un appel logique (ses réessais éventuels sont pris sur le budget qu'il alimente)."""
+        self._compter("appels")
+        self.budget.appel()
+
+    def reessai_permis(self):
+        """Réserve un réessai sur le budget ; False s'il est épuisé."""
+        if not self.budget.reessayer():
+            return False
+        self._compter("reessais")
+        return True
+
+    def essayer(self, fn, *args, **kwargs):
+        """Une tentative sous disjoncteur et quota (sans réessai)."""
+        if not self.disjoncteur.autoriser():
+            self._compter("rejets_circuit")
+            self._observer(0.0, "circuit_ouvert")
+            raise ServiceIndisponible(self.nom, "circuit ouvert", refus=True)
+        try:
+            jeton = self.seau.prendre()
+        except BaseException:  # Ctrl-C pendant l'attente du quota
+            self.disjoncteur.abandonner()
+            raise
+        if not jeton:
+            self.disjoncteur.abandonner()
+            self._compter("rejets_quota")
+            self._observer(0.0, "quota")
+            raise ServiceIndisponible(self.nom, "quota dépassé", refus=True)
+        debut = time.perf_counter()
+        try:
+            resultat = fn(*args, **kwargs)
+        except Exception as e:
+            if not est_panne(e):
+                # Le service a répondu : c'est la requête qui est refusée
+                self.disjoncteur.succes()
+                self._compter("erreurs")
+                self._observer(time.perf_counter() - debut, "erreur")
+                raise
+            self.disjoncteur.panne()
+            self._compter("pannes")
+            self._observer(time.perf_counter() - debut, "panne")
+            raise ServiceIndisponible(self.nom, str(e)) from e
+        except BaseException:
+            # KeyboardInterrupt, SystemExit... : ni succès ni panne, mais l'essai
+            # demi-ouvert doit être libéré sinon le circuit ne se referme jamais
+            self.disjoncteur.abandonner()
+            raise
+        self.disjoncteur.succes()
+        self._compter("succes")
+        self._observer(time.perf_counter() - debut, "ok")
+        return resultat
+
+    def appeler(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs) avec réessais espacés en cas de panne.
+        Lève ServiceIndisponible (refus ou pannes répétées) ; les autres erreurs de fn sont propagées.
+        """
+        self.nouvel_appel()
+        tentative = 0
+        while True:
+            try:
+                return self.essayer(fn, *args, **kwargs)
+            except ServiceIndisponible as e:
+                tentative += 1
+                if e.refus or tentative > self.reessais or not self.reessai_permis():
+                    raise
+            time.sleep(delai_reessai(tentative))
+
+    def stats(self):
+        with self._lock:
+            compteurs = dict(self.compteurs)
+        return dict(compteurs, circuit=ETATS[self.disjoncteur.etat], ouvertures=self.disjoncteur.ouvertures)
+
+_SERVICES = {}
+_SERVICES_LOCK = threading.Lock()
+
+def get_service(nom):
+    """Service partagé du processus, configuré au premier appel (FAKELAB_QUOTA_<NOM>)."""
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(nom)
+        if service is None:
+            quota = os.getenv(f"FAKELAB_QUOTA_{nom.upper()}", QUOTAS_DEFAUT.get(nom, "0"))
+            debit, _, rafale = quota.partition(",")
+            service = _SERVICES[nom] = Service(nom, float(debit), float(rafale or 1))
+        return service
+
+def stats():
+    """{service: compteurs + état du circuit} pour les services déjà utilisés."""
+    with _SERVICES_LOCK:
+        services = dict(_SERVICES)
+    return {nom: s.stats() for nom, s in sorted(services.items())}
@@ -0,0 +1,98 @@
+import copy
+import os
+import threading
+
+from modules.cache import LRUCache, SQLiteStore, chemin_cache
+from modules.url_utils import canonicaliser_url
+
+# Durée de vie (secondes) d'un verdict en cache : un fake avéré ne change plus,
+# un article douteux mérite d'être ré-analysé plus vite.
+TTL_PAR_VERDICT = {
+    "FAUX (Avéré)": 7 * 24 * 3600,
+    "TROMPEUR / FAUX": 24 * 3600,
+    "FIABLE": 24 * 3600,
+    "DOUTEUX": 6 * 3600,
+}
+TTL_DEFAUT = 6 * 3600
+
+class ResultCache:
+    """
+    Cache des verdicts complets du pipeline, à deux niveaux :
+    LRU en mémoire devant une table SQLite sur disque.
+    Clé = URL canonique ; une entrée n'est valide que si la page n'a pas changé :
+    même HTML téléchargé, ou même texte extrait (pages dont seul l'habillage
+    varie). Un article modifié est donc ré-analysé, et une page inchangée reste
+    valide même si un autre parser en a tiré le texte.
+    """
+    def __init__(self, chemin=None, max_memoire=256, max_octets_disque=200 * 1024 * 1024,
+                 ttl_par_verdict=None):
+        self.ttl_par_verdict = dict(TTL_PAR_VERDICT, **(ttl_par_verdict or {}))
+        self.memoire = LRUCache(max_memoire)
+        self.disque = SQLiteStore(chemin or chemin_cache("resultats.sqlite"), "resultats",
+                                  max_bytes=max_octets_disque)
+        self._lock = threading.Lock()
+        self.compteurs = {"hits_memoire": 0, "hits_disque": 0, "misses": 0, "perimes": 0}
+
+    def _compter(self, nom):
+        with self._lock:
+            self.compteurs[nom] += 1
+
+    def get(self, url, empreinte_texte, empreinte_html=None):
+        """Retourne une copie du résultat en cache, ou None."""
+        cle = canonicaliser_url(url)
+        entree = self.memoire.get(cle)
+        niveau = "hits_memoire"
+        if entree is None:
+            entree = self.disque.get(cle)
+            niveau = "hits_disque"
+            if entree is not None:
+                self.memoire.set(cle, entree, self._ttl(entree["resultats"]))
+
+        if entree is None:
+            self._compter("misses")
+            return None
+        meme_html = empreinte_html is not None and entree.get("empreinte_html") == empreinte_html
+        if entree["empreinte"] != empreinte_texte and not meme_html:
+            # La page a changé depuis l'analyse : on invalide
+            self._compter("perimes")
+            self.memoire.delete(cle)
+            self.disque.delete(cle)
+            return None
+
+        self._compter(niveau)
+        return copy.deepcopy(entree["resultats"])
+
+    def set(self, url, empreinte_texte, resultats, empreinte_html=None):
+        """Stocke un résultat complet (les erreurs ne sont jamais mises en cache)."""
+        if "error" in resultats:
+            return
+        cle = canonicaliser_url(url)
+        entree = {"empreinte": empreinte_texte, "empreinte_html": empreinte_html,
+                  "resultats": copy.deepcopy(resultats)}
+        ttl = self._ttl(resultats)
+        self.memoire.set(cle, entree, ttl)
+        self.disque.set(cle, entree, ttl)
+
+    def _ttl(self, resultats):
+        return self.ttl_par_verdict.get(resultats.get("verdict"), TTL_DEFAUT)
+
+    def stats(self):
+        hits = self.compteurs["hits_memoire"] + self.compteurs["hits_disque"]
+        total = hits + self.compteurs["misses"] + self.compteurs["perimes"]
+        return dict(self.compteurs,
+                    hit_ratio=round(hits / total, 3) if total else 0.0,
+                    entrees_memoire=len(self.memoire),
+                    disque=self.disque.stats())
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+def get_result_cache():
+    """Cache partagé par tout le processus (désactivable avec FAKELAB_RESULT_CACHE=0)."""
+    global _CACHE
+    if os.getenv("FAKELAB_RESULT_CACHE", "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResultCache()
+        return _CACHE
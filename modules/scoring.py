@@ -0,0 +1,184 @@
+"""
+FAKELAB - Score final et verdict, à l'unité ou en lot (NumPy).
+
+S_final = alpha * R_source + beta * Score_V + gamma * (100 - A_sem)
+Score_V : 0 si FOUND_FAKE, 100 si FOUND_TRUE, 50 sinon.
+Verdict : "FAUX (Avéré)" si FOUND_FAKE, sinon FIABLE / DOUTEUX / TROMPEUR / FAUX
+selon les seuils (75 et 40 par défaut).
+
+Le calcul en lot prend des colonnes (R_source, V_fact, A_sem) et traite des
+millions d'analyses en une passe : utile pour mesurer l'effet d'un nouveau
+jeu de poids sur l'historique avant de le mettre en production.
+
+    python -m modules.scoring rescore [resultats.jsonl] --poids 0.4,0.4,0.2 [--seuils 70,40]
+    python -m modules.scoring bench 5000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+def _lire_triplet(valeur, defaut):
+    return tuple(float(x) for x in (valeur or defaut).split(","))
+
+# Poids (alpha, beta, gamma) et seuils (FIABLE, DOUTEUX) du pipeline, surchargeables pour essai
+POIDS = dict(zip(("alpha", "beta", "gamma"), _lire_triplet(os.getenv("FAKELAB_POIDS"), "0.5,0.3,0.2")))
+SEUILS = _lire_triplet(os.getenv("FAKELAB_SEUILS"), "75,40")
+
+# Codes des verdicts dans les calculs en lot (int8)
+VERDICTS = ("FAUX (Avéré)", "TROMPEUR / FAUX", "DOUTEUX", "FIABLE")
+FAUX_AVERE, TROMPEUR, DOUTEUX, FIABLE = range(4)
+
+# Valeurs de V_fact en lot : codes, ou chaînes converties par coder_v_fact
+V_FAKE, V_INCONNU, V_VRAI = 0, 1, 2
+SCORE_V = (0.0, 50.0, 100.0)
+
+def poids_depuis(texte):
+    """'0.4,0.4,0.2' -> {'alpha': 0.4, 'beta': 0.4, 'gamma': 0.2}"""
+    alpha, beta, gamma = _lire_triplet(texte, "")
+    return {"alpha": alpha, "beta": beta, "gamma": gamma}
+
+def score_final(R_source, V_fact, A_sem, poids=None):
+    """S_final d'une analyse. R_source est déjà sur 100."""
+    poids = poids or POIDS
+    # Fact-Checking : le texte devient une note sur 100
+    if V_fact == "FOUND_FAKE":
+        score_v = 0.0      # C'est prouvé faux -> 0/100
+    elif V_fact == "FOUND_TRUE":
+        score_v = 100.0    # C'est prouvé vrai -> 100/100
+    else:
+        score_v = 50.0     # On ne sait pas (NOT_FOUND) -> 50/100 (Neutre)
+    # A_sem est un score de RISQUE (100 = mauvais) : on le transforme en FIABILITÉ
+    s = poids["alpha"] * R_source + poids["beta"] * score_v + poids["gamma"] * (100 - A_sem)
+    return round(s, 1)
+
+def verdict(s_final, seuils=None):
+    fiable, douteux = seuils or SEUILS
+    if s_final >= fiable:
+        return "FIABLE"
+    if s_final >= douteux:
+        return "DOUTEUX"
+    return "TROMPEUR / FAUX"
+
+def coder_v_fact(v_fact):
+    """Colonne de V_fact (chaînes) -> codes int8 V_FAKE / V_INCONNU / V_VRAI."""
+    import numpy as np
+    v = np.asarray(v_fact)
+    if v.dtype.kind in "iu":
+        return v.astype(np.int8, copy=False)
+    codes = np.full(v.shape, V_INCONNU, dtype=np.int8)
+    codes[v == "FOUND_FAKE"] = V_FAKE
+    codes[v == "FOUND_TRUE"] = V_VRAI
+    return codes
+
+def scorer_lot(R_source, V_fact, A_sem, poids=None, seuils=None):
+    """
+    Version vectorisée de score_final + verdict, au même arrondi.
+    Retourne (S_final float64, codes de verdict int8 -> VERDICTS).
+    """
+    import numpy as np
+    poids = poids or POIDS
+    fiable, douteux = seuils or SEUILS
+    r = np.asarray(R_source, dtype=np.float64)
+    v = coder_v_fact(V_fact)
+    a = np.asarray(A_sem, dtype=np.float64)
+
+    s = poids["alpha"] * r + poids["beta"] * np.take(SCORE_V, v) + poids["gamma"] * (100 - a)
+    # Arrondi à 0.1 comme round(s, 1) : les seuils s'appliquent au score affiché.
+    # Près d'un x,x5 np.round (qui multiplie par 10) peut diverger de round() : ces rares cas sont refaits un à un.
+    s10 = s * 10
+    limites = np.flatnonzero(np.abs(s10 - np.floor(s10) - 0.5) < 1e-6)
+    arrondis = [round(x, 1) for x in s[limites].tolist()]
+    s = np.round(s10) / 10
+    s[limites] = arrondis
+    fake = v == V_FAKE
+    s[fake] = 0.0
+
+    codes = np.full(s.shape, TROMPEUR, dtype=np.int8)
+    codes[s >= douteux] = DOUTEUX
+    codes[s >= fiable] = FIABLE
+    codes[fake] = FAUX_AVERE
+    return s, codes
+
+def comparer_poids(R_source, V_fact, A_sem, poids_proposes, seuils_proposes=None,
+                   poids_actuels=None, seuils_actuels=None):
+    """
+    Verdicts qui changeraient avec un autre jeu de poids / seuils :
+    {analyses, bascules, part_bascules, transitions {"FIABLE -> DOUTEUX": n}, repartition, ecart_moyen}.
+    """
+    import numpy as np
+    v = coder_v_fact(V_fact)  # une seule conversion pour les deux passes
+    s_avant, avant = scorer_lot(R_source, v, A_sem, poids_actuels, seuils_actuels)
+    s_apres, apres = scorer_lot(R_source, v, A_sem, poids_proposes, seuils_proposes)
+    n = len(VERDICTS)
+    matrice = np.bincount(avant.astype(np.intp) * n + apres, minlength=n * n).reshape(n, n)
+    bascules = int(matrice.sum() - np.trace(matrice))
+    total = int(avant.size)
+    return {
+        "analyses": total,
+        "bascules": bascules,
+        "part_bascules": round(bascules / total, 4) if total else 0.0,
+        "transitions": {f"{VERDICTS[i]} -> {VERDICTS[j]}": int(matrice[i, j])
+                        for i in range(n) for j in range(n) if i != j and matrice[i, j]},
+        "repartition": {VERDICTS[i]: {"avant": int(matrice[i].sum()), "apres": int(matrice[:, i].sum())}
+                        for i in range(n)},
+        "ecart_moyen": round(float(np.mean(s_apres - s_avant)), 2) if total else 0.0,
+    }
+
+def lire_colonnes(chemins):
+    """(R_source, V_fact codé, A_sem) depuis les JSONL de batch.py (analyses abouties seulement)."""
+    import numpy as np
+    r, v, a = [], [], []
+    codes = {"FOUND_FAKE": V_FAKE, "FOUND_TRUE": V_VRAI}
+    for chemin in chemins:
+        with open(chemin, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    resultat = json.loads(ligne).get("resultat", {})
+                except json.JSONDecodeError:
+                    continue
+                if "R_source" not in resultat or "A_sem" not in resultat:
+                    continue
+                r.append(resultat["R_source"])
+                v.append(codes.get(resultat.get("V_fact"), V_INCONNU))
+                a.append(resultat["A_sem"])
+    return (np.asarray(r, dtype=np.float64), np.asarray(v, dtype=np.int8),
+            np.asarray(a, dtype=np.float64))
+
+def main():
+    parser = argparse.ArgumentParser(description="FAKELAB - Re-calcul des verdicts en lot")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("rescore", help="Verdicts qui changeraient avec d'autres poids")
+    p.add_argument("historique", nargs="*", help="JSONL de batch.py (défaut : l'historique SQLite)")
+    p.add_argument("--poids", required=True, help="alpha,beta,gamma proposés, ex : 0.4,0.4,0.2")
+    p.add_argument("--seuils", help="Seuils FIABLE,DOUTEUX proposés (défaut : les actuels)")
+    p = sous.add_parser("bench", help="Débit du calcul en lot sur des données aléatoires")
+    p.add_argument("lignes", type=int, nargs="?", default=1_000_000)
+    args = parser.parse_args()
+
+    import numpy as np
+    if args.commande == "rescore":
+        if args.historique:
+            r, v, a = lire_colonnes(args.historique)
+        else:
+            from modules.history_store import HistoryStore
+            r, v, a = (np.asarray(c) for c in HistoryStore().colonnes())
+        if not r.size:
+            sys.exit("Aucune analyse complète dans l'historique.")
+        seuils = _lire_triplet(args.seuils, "") if args.seuils else None
+        print(json.dumps(comparer_poids(r, v, a, poids_depuis(args.poids), seuils),
+                         ensure_ascii=False, indent=2))
+    else:
+        rng = np.random.default_rng(0)
+        r = rng.uniform(0, 100, args.lignes)
+        v = rng.choice(np.array([V_FAKE, V_INCONNU, V_VRAI], dtype=np.int8), args.lignes, p=[0.05, 0.9, 0.05])
+        a = rng.uniform(0, 100, args.lignes)
+        debut = time.perf_counter()
+        rapport = comparer_poids(r, v, a, poids_depuis("0.4,0.4,0.2"))
+        duree = time.perf_counter() - debut
+        print(f"{args.lignes} analyses re-scorées deux fois en {duree:.2f}s "
+              f"({2 * args.lignes / duree / 1e6:.1f} M lignes/s) : {rapport['bascules']} bascule(s)")
+
+if __name__ == "__main__":
+    main()
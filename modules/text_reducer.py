@@ -0,0 +1,163 @@
+import html
+import math
+import os
+import re
+
+# Budget de tokens du texte envoyé à Gemini (le reste du prompt fait ~200 tokens)
+BUDGET_TOKENS = int(os.getenv("FAKELAB_PROMPT_TOKENS", "1500"))
+# Au-delà de ce nombre de tokens, l'article est découpé et analysé par morceaux (map-reduce)
+SEUIL_MAP_REDUCE = int(os.getenv("FAKELAB_MAP_REDUCE_TOKENS", "12000"))
+# Nombre maximal de morceaux analysés pour un article (les suivants sont ignorés)
+MAX_MORCEAUX = 8
+
+_BALISES_INUTILES = re.compile(r"<(script|style|noscript|iframe|svg)\b.*?</\1\s*>", re.S | re.I)
+_BALISES_BLOC = re.compile(r"</?(p|div|br|li|h[1-6]|article|section|blockquote|tr|ul|ol)\b[^>]*>", re.I)
+_BALISES = re.compile(r"<[^>]+>")
+_COMMENTAIRES = re.compile(r"<!--.*?-->", re.S)
+_FIN_PHRASE = re.compile(r"(?<=[.!?…»])\s+(?=[«\"A-ZÀ-ÖØ-Þ0-9])")
+
+_CITATION = re.compile(r"[«\"“].{15,}?[»\"”]")
+_CHIFFRE = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|€|\$|millions?|milliards?|ans|fois|personnes|morts)?", re.I)
+_ATTRIBUTION = re.compile(
+    r"\b(selon|d'après|a (?:déclaré|affirmé|indiqué|précisé|expliqué|annoncé)|"
+    r"affirme|déclare|rapporte|indique|estime|source|étude|rapport|communiqué|porte-parole)\b", re.I)
+
+def nettoyer_texte(texte):
+    """Retire le HTML (sortie Readability) et normalise les espaces ; garde les paragraphes."""
+    texte = texte or ""
+    if "<" in texte and ">" in texte:
+        texte = _COMMENTAIRES.sub(" ", texte)
+        texte = _BALISES_INUTILES.sub(" ", texte)
+        texte = _BALISES_BLOC.sub("\n", texte)
+        texte = _BALISES.sub(" ", texte)
+    texte = html.unescape(texte)
+    lignes = (" ".join(l.split()) for l in texte.splitlines())
+    return "\n".join(l for l in lignes if l)
+
+def estimer_tokens(texte):
+    """Estimation rapide (~4 caractères par token pour du français), sans tokenizer."""
+    return math.ceil(len(texte) / 4)
+
+def decouper_phrases(texte):
+    phrases = []
+    for paragraphe in texte.split("\n"):
+        phrases.extend(p.strip() for p in _FIN_PHRASE.split(paragraphe) if p.strip())
+    return phrases
+
+def tronquer(texte, budget):
+    """Début du texte tenant dans `budget` tokens, coupé sur un espace si possible."""
+    limite = max(1, budget) * 4
+    if len(texte) <= limite:
+        return texte
+    coupe = texte.rfind(" ", 0, limite + 1)
+    return texte[:coupe if coupe > limite // 2 else limite].rstrip()
+
+def _decouper_phrase(phrase, budget):
+    """Phrase plus longue que le budget (texte sans ponctuation) : morceaux d'au plus `budget` tokens."""
+    while estimer_tokens(phrase) > budget:
+        debut = tronquer(phrase, budget)
+        yield debut
+        phrase = phrase[len(debut):].lstrip()
+    if phrase:
+        yield phrase
+
+def _score_phrase(phrase, position):
+    """Informativité d'une phrase : début d'article, citations, chiffres, sources citées."""
+    score = 0.0
+    if position < 3:
+        score += 3.0 - position  # chapeau / attaque
+    score += 2.0 * len(_CITATION.findall(phrase))
+    score += 1.0 * min(3, len(_CHIFFRE.findall(phrase)))
+    score += 2.0 * bool(_ATTRIBUTION.search(phrase))
+    if len(phrase) < 30:
+        score -= 1.0  # intertitres, légendes
+    return score
+
+def reduire(texte, budget=BUDGET_TOKENS, titre=None):
+    """
+    Texte nettoyé tenant dans `budget` tokens. S'il est trop long, on garde le titre
+    puis les phrases les plus informatives (dans l'ordre du texte), les coupures étant
+    marquées par « […] ». Si aucune phrase ne tient, le début du texte, coupé au budget.
+    """
+    texte = nettoyer_texte(texte)
+    if estimer_tokens(texte) <= budget:
+        return texte
+
+    phrases = decouper_phrases(texte)
+    restant = budget - (estimer_tokens(titre) + 2 if titre else 0)
+    gardees = set()
+    for i in sorted(range(len(phrases)), key=lambda i: (-_score_phrase(phrases[i], i), i)):
+        cout = estimer_tokens(phrases[i]) + 1
+        if cout <= restant:
+            gardees.add(i)
+            restant -= cout
+        if restant <= 10:
+            break
+
+    morceaux = [f"Titre : {titre}"] if titre else []
+    if not gardees:
+        # Aucune phrase ne tient (texte sans ponctuation, phrase géante) : coupe franche
+        morceaux += [tronquer(texte, restant - 2), "[…]"]
+        return " ".join(morceaux)
+    precedente = -1
+    for i in sorted(gardees):
+        if i != precedente + 1:
+            morceaux.append("[…]")
+        morceaux.append(phrases[i])
+        precedente = i
+    return " ".join(morceaux)
+
+def decouper_morceaux(texte, budget=BUDGET_TOKENS, max_morceaux=MAX_MORCEAUX):
+    """Découpe un texte nettoyé en morceaux d'environ `budget` tokens, sur des fins de phrase."""
+    morceaux, courant, taille = [], [], 0
+    phrases = (p for phrase in decouper_phrases(texte) for p in _decouper_phrase(phrase, budget))
+    for phrase in phrases:
+        cout = estimer_tokens(phrase) + 1
+        if courant and taille + cout > budget:
+            morceaux.append(" ".join(courant))
+            courant, taille = [], 0
+            if len(morceaux) == max_morceaux:
+                return morceaux
+        courant.append(phrase)
+        taille += cout
+    if courant:
+        morceaux.append(" ".join(courant))
+    return morceaux
+
+def agreger_analyses(analyses, poids):
+    """
+    Combine les analyses Gemini de plusieurs morceaux en une seule, au même format.
+    Subjectivité et manque de preuves : moyenne pondérée par la taille du morceau ;
+    clickbait : celui du premier morceau (titre + chapeau) ; synthèse et verdict
+    du morceau le plus risqué.
+    """
+    valides = [(a, p) for a, p in zip(analyses, poids) if "error" not in a]
+    if not valides:
+        return analyses[0]
+    total = sum(p for _, p in valides)
+
+    def moyenne(extraire):
+        return round(sum(extraire(a) * p for a, p in valides) / total, 1)
+
+    def note(a, cle, champ):
+        return float(a.get(cle, {}).get(champ, 5))
+
+    pire = max(valides, key=lambda v: v[0].get('A_sem', 0))[0]
+    premier = valides[0][0]
+    return {
+        "analyse_subjectivite": {
+            "score": moyenne(lambda a: note(a, 'analyse_subjectivite', 'score')),
+            "details": pire.get('analyse_subjectivite', {}).get('details', ""),
+        },
+        "analyse_clickbait": {
+            "score": note(premier, 'analyse_clickbait', 'score'),
+            "details": premier.get('analyse_clickbait', {}).get('details', ""),
+        },
+        "analyse_preuves": {
+            "score_manque_preuves": moyenne(lambda a: note(a, 'analyse_preuves', 'score_manque_preuves')),
+            "details": pire.get('analyse_preuves', {}).get('details', ""),
+        },
+        "synthese_globale": f"{pire.get('synthese_globale', '')} (article long analysé en {len(analyses)} parties)",
+        "verdict_style": pire.get('verdict_style', "DOUTEUX"),
+        "morceaux_analyses": len(valides),
+    }
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Bornes (secondes) des histogrammes Prometheus
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+# Nombre de mesures gardées par étape pour calculer p50/p95/p99
+TAILLE_RESERVOIR = 10000
+
+class Span:
+    """Une étape chronométrée : nom, durée, issue et attributs (octets, tentatives...)."""
+    def __init__(self, nom, **attrs):
+        self.nom = nom
+        self.debut = time.time()
+        self.duree = None
+        self.issue = "ok"
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return dict({"etape": self.nom, "duree_ms": round((self.duree or 0) * 1000, 1),
+                     "issue": self.issue}, **self.attrs)
+
+class Trace:
+    """Ensemble des spans d'une analyse. Utilisable depuis plusieurs threads."""
+    def __init__(self, url=None):
+        self.url = url
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, nom, **attrs):
+        s = Span(nom, **attrs)
+        debut = time.perf_counter()
+        try:
+            yield s
+        except Exception as e:
+            s.issue = "erreur"
+            s.set(erreur=str(e)[:200])
+            raise
+        finally:
+            s.duree = time.perf_counter() - debut
+            self._enregistrer(s)
+
+    def ajouter(self, nom, duree, issue="ok", **attrs):
+        """Enregistre un span mesuré ailleurs (ex : parser exécuté dans un autre thread)."""
+        s = Span(nom, **attrs)
+        s.duree = duree
+        s.issue = issue
+        self._enregistrer(s)
+
+    def _enregistrer(self, s):
+        with self._lock:
+            self.spans.append(s)
+        METRIQUES.observer(s)
+
+    def to_dict(self):
+        with self._lock:
+            return [s.to_dict() for s in self.spans]
+
+class _TraceNulle:
+    """Remplace une Trace absente : les appels ne font rien."""
+    spans = ()
+
+    @contextmanager
+    def span(self, nom, **attrs):
+        yield Span(nom, **attrs)
+
+    def ajouter(self, *args, **kwargs):
+        pass
+
+TRACE_NULLE = _TraceNulle()
+
+class MetricsRegistry:
+    """Agrège les spans de tout le processus par étape : compteurs, histogrammes, percentiles."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reservoirs = defaultdict(lambda: deque(maxlen=TAILLE_RESERVOIR))
+        self.buckets = defaultdict(lambda: [0] * len(BUCKETS))
+        self.sommes = defaultdict(float)
+        self.compteurs = defaultdict(int)
+        self.issues = defaultdict(int)
+        self.jauges = {}  # valeurs instantanées (ex : profondeur d'une file)
+
+    def jauge(self, nom, valeur):
+        with self._lock:
+            self.jauges[nom] = valeur
+
+    def observer(self, span):
+        duree = span.duree or 0.0
+        with self._lock:
+            self.reservoirs[span.nom].append(duree)
+            self.sommes[span.nom] += duree
+            self.compteurs[span.nom] += 1
+            self.issues[(span.nom, span.issue)] += 1
+            compteurs = self.buckets[span.nom]
+            for i, borne in enumerate(BUCKETS):
+                if duree <= borne:
+                    compteurs[i] += 1
+
+    def percentiles(self, nom, quantiles=(0.5, 0.95, 0.99)):
+        with self._lock:
+            valeurs = sorted(self.reservoirs.get(nom, ()))
+        if not valeurs:
+            return {}
+        return {q: valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))] for q in quantiles}
+
+    def resume(self):
+        """{étape: {count, p50_ms, p95_ms, p99_ms}} pour affichage rapide."""
+        resume = {}
+        for nom in list(self.compteurs):
+            p = self.percentiles(nom)
+            resume[nom] = {"count": self.compteurs[nom],
+                           **{f"p{int(q * 100)}_ms": round(v * 1000, 1) for q, v in p.items()}}
+        return resume
+
+    def prometheus(self):
+        """Texte au format d'exposition Prometheus."""
+        lignes = [
+            "# HELP fakelab_stage_duration_seconds Durée des étapes du pipeline FAKELAB.",
+            "# TYPE fakelab_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            noms = sorted(self.compteurs)
+            for nom in noms:
+                # Les buckets sont déjà cumulatifs (duree <= borne)
+                for borne, n in zip(BUCKETS, self.buckets[nom]):
+                    lignes.append(f'fakelab_stage_duration_seconds_bucket{{stage="{nom}",le="{borne}"}} {n}')
+                lignes.append(f'fakelab_stage_duration_seconds_bucket{{stage="{nom}",le="+Inf"}} {self.compteurs[nom]}')
+                lignes.append(f'fakelab_stage_duration_seconds_sum{{stage="{nom}"}} {self.sommes[nom]:.6f}')
+                lignes.append(f'fakelab_stage_duration_seconds_count{{stage="{nom}"}} {self.compteurs[nom]}')
+            issues = sorted(self.issues.items())
+
+        lignes += [
+            "# HELP fakelab_stage_latency_seconds Percentiles récents des durées d'étape.",
+            "# TYPE fakelab_stage_latency_seconds gauge",
+        ]
+        for nom in noms:
+            for q, v in self.percentiles(nom).items():
+                lignes.append(f'fakelab_stage_latency_seconds{{stage="{nom}",quantile="{q}"}} {v:.6f}')
+
+        lignes += [
+            "# HELP fakelab_stage_total Nombre d'exécutions par étape et par issue.",
+            "# TYPE fakelab_stage_total counter",
+        ]
+        for (nom, issue), n in issues:
+            lignes.append(f'fakelab_stage_total{{stage="{nom}",outcome="{issue}"}} {n}')
+
+        with self._lock:
+            jauges = sorted(self.jauges.items())
+        for nom, valeur in jauges:
+            lignes += [f"# TYPE fakelab_{nom} gauge", f"fakelab_{nom} {valeur}"]
+        return "\n".join(lignes) + "\n"
+
+METRIQUES = MetricsRegistry()
+
+_EXPORT_LOCK = threading.Lock()
+_DERNIER_EXPORT = [0.0]
+
+def exporter_jsonl(trace, chemin):
+    """Ajoute chaque span de la trace comme une ligne JSON (avec l'URL et l'horodatage)."""
+    horodatage = time.time()
+    with _EXPORT_LOCK, open(chemin, "a", encoding="utf-8") as f:
+        for span in trace.to_dict():
+            f.write(json.dumps(dict(span, url=trace.url, ts=horodatage), ensure_ascii=False) + "\n")
+
+def exporter_prometheus(chemin):
+    """Réécrit le fichier de métriques (lisible par le textfile collector de node_exporter)."""
+    tmp = f"{chemin}.tmp"
+    with _EXPORT_LOCK:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(METRIQUES.prometheus())
+        os.replace(tmp, chemin)
+
+def exporter_depuis_env(trace, intervalle=10.0):
+    """
+    Exports automatiques selon l'environnement :
+    FAKELAB_TRACE_JSONL (spans de chaque analyse) et
+    FAKELAB_METRICS_FILE (fichier Prometheus, réécrit au plus toutes les `intervalle` s).
+    """
+    chemin_jsonl = os.getenv("FAKELAB_TRACE_JSONL")
+    if chemin_jsonl:
+        exporter_jsonl(trace, chemin_jsonl)
+    chemin_prom = os.getenv("FAKELAB_METRICS_FILE")
+    if chemin_prom and time.monotonic() - _DERNIER_EXPORT[0] >= intervalle:
+        _DERNIER_EXPORT[0] = time.monotonic()
+        exporter_prometheus(chemin_prom)
@@ -0,0 +1,37 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Paramètres de suivi qui ne changent pas le contenu de la page
+PREFIXES_TRACKING = ("utm_",)
+PARAMS_TRACKING = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref"}
+
+def canonicaliser_url(url):
+    """
+    Forme canonique d'une URL pour servir de clé de cache :
+    schéma/hôte en minuscules, sans 'www.', sans fragment, sans paramètres de suivi,
+    paramètres triés et sans '/' final.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    parts = urlsplit(url)
+    hote = (parts.hostname or "").lower()
+    if hote.startswith("www."):
+        hote = hote[4:]
+    if parts.port and parts.port not in (80, 443):
+        hote = f"{hote}:{parts.port}"
+
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+              if not (k.lower().startswith(PREFIXES_TRACKING) or k.lower() in PARAMS_TRACKING)]
+    chemin = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme,
+                       hote, chemin, urlencode(sorted(params)), ""))
+
+def domaine(url):
+    """Hôte de l'URL canonique ('www.' retiré, port gardé s'il n'est pas standard)."""
+    return urlsplit(canonicaliser_url(url)).netloc
+
+def hash_texte(texte):
+    """Empreinte du texte extrait (espaces normalisés) pour détecter un article modifié."""
+    normalise = " ".join((texte or "").split())
+    return hashlib.sha256(normalise.encode("utf-8")).hexdigest()
@@ -0,0 +1,50 @@
+import os
+
+from modules import http_client
+from modules.resilience import get_service
+
+class WikiPage:
+    """Page Wikipédia minimale : même interface que wikipediaapi (exists() / summary)."""
+    def __init__(self, title, summary=None):
+        self.title = title
+        self._exists = summary is not None
+        self.summary = summary or ""
+
+    def exists(self):
+        return self._exists
+
+class WikipediaClient:
+    """
+    Client Wikipédia branché sur le client HTTP partagé (keep-alive, timeouts).
+    Un seul appel à l'API MediaWiki par page : existence + résumé (intro) + redirections.
+    L'URL de l'API est surchargeable (WIKIPEDIA_API_URL) pour viser un serveur local.
+    Les appels passent par modules.resilience (service "wiki") : page() lève
+    ServiceIndisponible quand Wikipédia est en panne ou le quota dépassé.
+    """
+    def __init__(self, user_agent, language="fr", api_url=None):
+        self.user_agent = user_agent
+        self.language = language
+        self.api_url = (api_url or os.getenv("WIKIPEDIA_API_URL")
+                        or f"https://{language}.wikipedia.org/w/api.php")
+
+    def page(self, title):
+        return get_service("wiki").appeler(self._page, title)
+
+    def _page(self, title):
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "prop": "extracts",
+            "exintro": "1",
+            "explaintext": "1",
+            "redirects": "1",
+            "titles": title,
+        }
+        response = http_client.get(self.api_url, params=params,
+                                   headers={"User-Agent": self.user_agent})
+        response.raise_for_status()
+        pages = response.json().get("query", {}).get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            return WikiPage(title)
+        return WikiPage(pages[0].get("title", title), pages[0].get("extract", ""))
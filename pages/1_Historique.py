@@ -0,0 +1,99 @@
+import time
+
+import pandas as pd
+import streamlit as st
+from dotenv import load_dotenv
+
+from modules.history_store import get_history_store, VERDICTS_SUSPECTS
+from modules.scoring import VERDICTS
+
+load_dotenv()
+
+st.set_page_config(page_title="FAKELAB - Historique", page_icon="📊", layout="wide")
+st.title("📊 Historique des analyses")
+
+historique = get_history_store()
+if historique is None:
+    st.info("Historique désactivé (FAKELAB_HISTORIQUE=0).")
+    st.stop()
+
+# --- FILTRES (appliqués par SQLite : rien n'est chargé en entier en mémoire) ---
+with st.sidebar:
+    st.header("Filtres")
+    jours = st.slider("Période (jours)", 1, 365, 30)
+    domaine_filtre = st.text_input("Domaine", placeholder="exemple.com").strip()
+    verdicts_filtre = st.multiselect("Verdicts", VERDICTS)
+    taille_page = st.selectbox("Analyses par page", [25, 50, 100], index=0)
+
+filtres = {"dom": domaine_filtre or None, "verdicts": verdicts_filtre or None,
+           "depuis": time.time() - jours * 86400}
+
+# Pagination par curseur : pile des curseurs des pages déjà vues (retour arrière)
+signature = (jours, domaine_filtre, tuple(verdicts_filtre), taille_page)
+if st.session_state.get("historique_filtres") != signature:
+    st.session_state.historique_filtres = signature
+    st.session_state.historique_curseurs = [None]
+
+# --- INDICATEURS ---
+comptes = historique.compter(**filtres)
+total = sum(comptes.values())
+colonnes = st.columns(len(VERDICTS) + 1)
+colonnes[0].metric("Analyses", total)
+for colonne, verdict in zip(colonnes[1:], VERDICTS):
+    colonne.metric(verdict, comptes.get(verdict, 0))
+
+if not total:
+    st.info("Aucune analyse pour ces filtres.")
+    st.stop()
+
+# --- TENDANCES ---
+col_graphe, col_suspects = st.columns([3, 2])
+with col_graphe:
+    st.subheader("Verdicts par jour")
+    lignes = historique.verdicts_par_jour(jours, dom=filtres["dom"])
+    par_jour = pd.DataFrame(lignes, columns=["jour", "domaine", "verdict", "analyses"])
+    if verdicts_filtre:
+        par_jour = par_jour[par_jour["verdict"].isin(verdicts_filtre)]
+    st.bar_chart(par_jour.pivot_table(index="jour", columns="verdict", values="analyses",
+                                      aggfunc="sum", fill_value=0))
+with col_suspects:
+    st.subheader("Domaines les plus suspects")
+    st.caption(f"Part de verdicts {' / '.join(VERDICTS_SUSPECTS)} (3 analyses minimum)")
+    suspects = historique.domaines_suspects(jours)
+    if suspects:
+        st.dataframe(pd.DataFrame(suspects).drop(columns=["derniere"]), hide_index=True,
+                     use_container_width=True)
+    else:
+        st.caption("Pas encore assez d'analyses par domaine.")
+
+# --- LISTE PAGINÉE ---
+st.subheader("Analyses")
+curseurs = st.session_state.historique_curseurs
+analyses, suivant = historique.page(taille_page, curseurs[-1], **filtres)
+tableau = pd.DataFrame(analyses)
+tableau["date"] = pd.to_datetime(tableau["cree"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+st.dataframe(tableau[["id", "date", "domaine", "titre", "verdict", "S_final", "R_source", "V_fact", "A_sem",
+                      "methode_extraction", "url"]],
+             hide_index=True, use_container_width=True)
+
+col_prec, col_page, col_suiv = st.columns([1, 2, 1])
+with col_prec:
+    if st.button("◀ Précédentes", disabled=len(curseurs) == 1):
+        curseurs.pop()
+        st.rerun()
+with col_page:
+    debut = (len(curseurs) - 1) * taille_page
+    st.caption(f"Analyses {debut + 1} à {debut + len(analyses)} sur {total}")
+with col_suiv:
+    if st.button("Suivantes ▶", disabled=suivant is None):
+        curseurs.append(suivant)
+        st.rerun()
+
+# --- DÉTAIL D'UNE ANALYSE (résultat complet décompressé à la demande) ---
+choix = st.selectbox("Voir le détail d'une analyse", [None] + [a["id"] for a in analyses],
+                     format_func=lambda i: "—" if i is None else
+                     next(f"#{a['id']} · {a['titre'] or a['url']}" for a in analyses if a["id"] == i))
+if choix is not None:
+    detail = historique.detail(choix)
+    detail.pop("contenu", None)
+    st.json(detail, expanded=False)
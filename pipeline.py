@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
 # --- IMPORTS DES VRAIS MODULES ---
@@ -8,88 +11,107 @@ from modules.extractor import RobustExtractor
 # Le nom du fichier est 'reputation', la classe dedans est 'ReputationChecker'
 from modules.reputation_checker import ReputationChecker
 
-# Le nom du fichier est 'factcheck', la fonction est 'check_google_facts'
-from modules.fact_checker import check_google_facts
+# Index local des vérifications d'abord, l'API Google Fact Check en secours
+from modules.fact_checker import rechercher_verifications
+from modules.claim_index import pertinents
 
 # Le nom du fichier est 'semantic', la fonction est 'analyze_text_semantics'
-from modules.gemini_analyzer import analyze_text_semantics
+from modules.gemini_analyzer import analyze_text_semantics, analyze_text_semantics_groupe
+
+from modules.gemini_analyzer import MODELE_SECOURS
+from modules.near_duplicates import get_near_duplicate_index
+from modules.local_model import trier as trier_localement, comparer as comparer_local_gemini
+from modules.result_cache import get_result_cache
+from modules.history_store import get_history_store
+from modules.tracing import Trace, TRACE_NULLE, exporter_depuis_env
+from modules.url_utils import hash_texte
+from modules.scoring import score_final, verdict as verdict_du_score
 
 load_dotenv()
 
-def calculer_score_final(R_source, V_fact, A_sem):
+def calculer_score_final(R_source, V_fact, A_sem, poids=None):
     """
     Applique la formule mathématique stricte du PDF (Page 7).
     S_final = alpha * R + beta * V + gamma * A
+    Poids et normalisation : modules/scoring.py (partagés avec le re-calcul en lot).
     """
-    
-    # --- 1. Définition des Poids (Coefficients) ---
-    # La somme doit faire 1.0
-    alpha = 0.50  # Poids de la Réputation (R_source)
-    beta  = 0.3  # Poids du Fact-Checking (V_fact)
-    gamma = 0.2  # Poids de l'Analyse Sémantique (A_sem)
-    
-    # --- 2. Normalisation des valeurs sur 100 ---
-    
-    # A. Réputation (R) : Déjà sur 100 via ton module reputation.py
-    Score_R = R_source
-    
-    # B. Fact-Checking (V) : On doit transformer le texte en note sur 100
-    if V_fact == "FOUND_FAKE":
-        Score_V = 0.0      # C'est prouvé faux -> 0/100
-    elif V_fact == "FOUND_TRUE":
-        Score_V = 100.0    # C'est prouvé vrai -> 100/100
-    else:
-        Score_V = 50.0     # On ne sait pas (NOT_FOUND) -> 50/100 (Neutre)
-        
-    # C. Sémantique (A) : Attention, A_sem est un score de RISQUE (100 = Mauvais).
-    # On doit le transformer en score de FIABILITÉ (100 = Bon).
-    Score_A = 100 - A_sem
+    return score_final(R_source, V_fact, A_sem, poids)
 
-    # --- 3. Application de la Formule ---
-    # S_final = (0.25 * R) + (0.35 * V) + (0.40 * A)
-    S_final = (alpha * Score_R) + (beta * Score_V) + (gamma * Score_A)
-    
-    return round(S_final, 1)
+# Composants construits UNE fois par processus et réutilisés d'un appel à l'autre
+_COMPOSANTS = {}
+_COMPOSANTS_LOCK = threading.Lock()
+
+def get_extractor():
+    with _COMPOSANTS_LOCK:
+        if 'extractor' not in _COMPOSANTS:
+            _COMPOSANTS['extractor'] = RobustExtractor()
+        return _COMPOSANTS['extractor']
+
+def get_reputation_checker():
+    with _COMPOSANTS_LOCK:
+        if 'reputation' not in _COMPOSANTS:
+            # FAKELAB_WIKI_DIFFERE=1 : verdict liste blanche/noire immédiat, Wikipédia en arrière-plan
+            _COMPOSANTS['reputation'] = ReputationChecker(
+                wiki_differe=os.getenv("FAKELAB_WIKI_DIFFERE") == "1")
+        return _COMPOSANTS['reputation']
+
+# Pool partagé pour les étapes réseau (extraction, réputation, fact-check, IA).
+# Les étapes ne soumettent jamais elles-mêmes de tâches ici : pas de risque d'interblocage.
+_STAGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FAKELAB_STAGE_WORKERS", "16")),
+    thread_name_prefix="fakelab-etape"
+)
 
-def run_fakelab_pipeline(url, api_key_gemini):
+def _etape_extraction(url, trace=TRACE_NULLE):
     """
-    Orchestre tout le processus FAKELAB avec tes vrais modules.
+    ÉTAPE 1 : EXTRACTION (Web Scraping).
+    Retourne (champs, erreur) : un seul des deux est renseigné.
     """
-    resultats = {}
-    print(f"Lancement du pipeline pour : {url}")
-
-    # ---------------------------------------------------------
-    # ÉTAPE 1 : EXTRACTION (Web Scraping)
-    # ---------------------------------------------------------
     try:
-        extractor = RobustExtractor()  # On initialise ta classe
-        data_article, method = extractor.extract(url)
+        extractor = get_extractor()  # Instance partagée
+        with trace.span("extraction") as span:
+            data_article, method = extractor.extract(url, trace)
+            stats_extraction = (data_article or {}).get('stats_extraction', {})
+            span.set(methode=method, octets=stats_extraction.get('octets', 0),
+                     routage=stats_extraction.get('routage', {}).get('mode'))
+            if not data_article:
+                span.issue = "echec"
         
         if not data_article:
-            return {"error": "Impossible d'extraire le contenu de cette page."}
+            return None, {"error": "Impossible d'extraire le contenu de cette page."}
             
-        resultats['titre'] = data_article['titre']
-        resultats['contenu'] = data_article['texte']
-        resultats['methode_extraction'] = method
+        champs = {
+            'titre': data_article['titre'],
+            'contenu': data_article['texte'],
+            'methode_extraction': method,
+            # HTML dont le texte a été tiré, pour valider le cache. Pas avec Selenium : le squelette
+            # téléchargé peut rester identique quand le contenu chargé en JavaScript change
+            'empreinte_html': stats_extraction.get('empreinte_html') if method != "Selenium" else None
+        }
         print("✅ Extraction terminée.")
+        return champs, None
 
     except Exception as e:
-        return {"error": f"Erreur lors de l'extraction : {str(e)}"}
+        return None, {"error": f"Erreur lors de l'extraction : {str(e)}"}
 
-    # ---------------------------------------------------------
-    # ÉTAPE 2 : RÉPUTATION (Source Scoring)
-    # ---------------------------------------------------------
+def _etape_reputation(url, trace=TRACE_NULLE):
+    """
+    ÉTAPE 2 : RÉPUTATION (Source Scoring).
+    N'a besoin que de l'URL : peut tourner en même temps que l'extraction.
+    """
+    champs = {}
     try:
-        rep_checker = ReputationChecker() # On initialise ta classe
+        rep_checker = get_reputation_checker() # Instance partagée
         # Ton module renvoie 4 valeurs (score, status, source, details)
         # Note : Ton module renvoie un score entre 0.0 et 1.0
-        r_score_brut, r_status, r_source, r_details = rep_checker.check_source(url)
+        with trace.span("reputation"):
+            r_score_brut, r_status, r_source, r_details = rep_checker.check_source(url, trace)
         
         # Conversion du score sur 100 pour le calcul final
         r_score_100 = r_score_brut * 100
         
-        resultats['R_source'] = r_score_100
-        resultats['details_reputation'] = {
+        champs['R_source'] = r_score_100
+        champs['details_reputation'] = {
             "status": r_status,
             "source": r_source,
             "details": r_details
@@ -98,40 +120,98 @@ def run_fakelab_pipeline(url, api_key_gemini):
 
     except Exception as e:
         print(f"⚠️ Erreur réputation : {e}")
-        resultats['R_source'] = 50.0 # Valeur neutre par défaut
+        champs['R_source'] = 50.0 # Valeur neutre par défaut
+
+    return champs
 
-    # ---------------------------------------------------------
-    # ÉTAPE 3 : FACT-CHECKING (Google API)
-    # ---------------------------------------------------------
+def _etape_factcheck(titre, trace=TRACE_NULLE):
+    """
+    ÉTAPE 3 : FACT-CHECKING (index local, puis Google API).
+    N'a besoin que du titre extrait.
+    """
     api_key_factcheck = os.getenv("GOOGLE_FACT_CHECK_API_KEY")
-    resultats['V_fact'] = "NOT_FOUND" # Par défaut
-    resultats['preuves_factcheck'] = []
+    champs = {
+        'V_fact': "NOT_FOUND", # Par défaut
+        'preuves_factcheck': []
+    }
 
-    if api_key_factcheck:
-        try:
-            print("🔍 Recherche Fact-Checking...")
-            # On cherche avec le titre de l'article extrait
-            claims = check_google_facts(resultats['titre'], api_key_factcheck)
-            
-            if claims:
-                # Si on trouve des résultats, on regarde s'ils parlent de "Faux"
-                # On prend le premier résultat pertinent
-                premier_claim = claims[0]
-                review = premier_claim.get('claimReview', [])[0]
-                rating = review.get('textualRating', '').lower()
-                
-                resultats['preuves_factcheck'] = claims # On garde tout pour l'affichage
-                
-                # Si le rating contient "faux", "fake", "incorrect"
-                mots_cles_faux = ['faux', 'fake', 'incorrect', 'trompeur', 'false']
-                if any(mot in rating for mot in mots_cles_faux):
-                    resultats['V_fact'] = "FOUND_FAKE"
-                    print("🚨 FACT-CHECKING : C'est une FAKE NEWS connue !")
-        except Exception as e:
-            print(f"⚠️ Erreur Fact-Check : {e}")
-    else:
-        print("⚠️ Pas de clé API Fact Check trouvée (.env)")
+    try:
+        print("🔍 Recherche Fact-Checking...")
+        # Index local d'abord, puis l'API avec le titre de l'article extrait
+        with trace.span("factcheck") as span:
+            claims, source = rechercher_verifications(titre, api_key_factcheck)
+            span.set(claims=len(claims or []), source=source)
+            if claims is None:
+                # API en erreur ou indisponible : NOT_FOUND par défaut, verdict à ne pas garder en cache
+                span.issue = "degrade"
+        if source == "aucune":
+            print("⚠️ Pas de clé API Fact Check trouvée (.env)")
+
+        if claims:
+            champs['preuves_factcheck'] = claims # Classés par pertinence, on garde tout pour l'affichage
+
+            # Si une vérification pertinente contient "faux", "fake", "incorrect"...
+            mots_cles_faux = ['faux', 'fake', 'incorrect', 'trompeur', 'false']
+            ratings = [review.get('textualRating', '').lower()
+                       for claim in pertinents(claims)
+                       for review in claim.get('claimReview', [])]
+            if any(mot in rating for rating in ratings for mot in mots_cles_faux):
+                champs['V_fact'] = "FOUND_FAKE"
+                print("🚨 FACT-CHECKING : C'est une FAKE NEWS connue !")
+    except Exception as e:
+        print(f"⚠️ Erreur Fact-Check : {e}")
+
+    return champs
+
+def _etape_semantique(contenu, api_key_gemini, trace=TRACE_NULLE, titre=None):
+    """ÉTAPE 4 : ANALYSE SÉMANTIQUE (IA Gemini)."""
+    print("🤖 Analyse IA en cours...")
+    with trace.span("semantique") as span:
+        # Tri local : si le modèle entraîné sur l'historique Gemini est sûr de lui, pas d'appel
+        analyse_locale, action = trier_localement(contenu)
+        span.set(source=action)
+        if action == "local":
+            span.set(tentatives=0)
+            return analyse_locale
+
+        # FAKELAB_GEMINI_BATCH_MS > 0 : les analyses simultanées partagent une requête Gemini
+        fenetre_ms = int(os.getenv("FAKELAB_GEMINI_BATCH_MS", "0"))
+        if fenetre_ms > 0:
+            gemini_data = analyze_text_semantics_groupe(contenu, api_key_gemini, fenetre_ms / 1000, titre=titre)
+        else:
+            gemini_data = analyze_text_semantics(contenu, api_key_gemini, titre=titre)
+        if gemini_data.get('indisponible'):
+            # Gemini en panne (modules.resilience) : l'estimation locale vaut mieux que le score neutre
+            span.set(tentatives=0)
+            span.issue = "degrade"
+            return analyse_locale if analyse_locale is not None else gemini_data
+        # Le modèle de secours signifie qu'un second appel a été nécessaire
+        span.set(tentatives=2 if gemini_data.get('modele_utilise') == MODELE_SECOURS else 1)
+        if "error" in gemini_data:
+            span.issue = "erreur"
+        comparer_local_gemini(analyse_locale, gemini_data)
+    return gemini_data
+
+def _finaliser(resultats, gemini_data, trace=TRACE_NULLE):
+    """
+    ÉTAPE 5 : CALCUL FINAL.
+    gemini_data vaut None quand le Fact-Checking a déjà tranché (FOUND_FAKE).
+    """
+    with trace.span("score"):
+        resultats = _calculer_verdict(resultats, gemini_data)
+    # Étapes servies par une valeur neutre (API en panne) : le verdict n'est gardé ni en cache ni
+    # dans l'index des doublons, il sera recalculé quand les services seront revenus
+    spans = list(trace.spans)
+    degradees = sorted({s.nom for s in spans if s.issue == "degrade"})
+    if degradees and "error" not in resultats:
+        resultats['services_degrades'] = degradees
+    # Wikipédia différé (wiki_differe) : la réputation sans analyse croisée est provisoire,
+    # le verdict n'est pas mis en cache pour que l'appel suivant affiche les détails Wikipédia
+    if any(s.nom == "reputation.wikipedia" and s.issue == "differe" for s in spans) and "error" not in resultats:
+        resultats['reputation_provisoire'] = True
+    return resultats
 
+def _calculer_verdict(resultats, gemini_data):
     # Si le Fact-Checking a déjà prouvé que c'est faux, on skip l'IA pour économiser
     if resultats['V_fact'] == "FOUND_FAKE":
         resultats['A_sem'] = 100 # Risque maximal
@@ -139,36 +219,267 @@ def run_fakelab_pipeline(url, api_key_gemini):
         s_final = 0.0
         verdict = "FAUX (Avéré)"
     else:
-        # ---------------------------------------------------------
-        # ÉTAPE 4 : ANALYSE SÉMANTIQUE (IA Gemini)
-        # ---------------------------------------------------------
-        print("🤖 Analyse IA en cours...")
-        gemini_data = analyze_text_semantics(resultats['contenu'], api_key_gemini)
-        
         if "error" in gemini_data:
             return {"error": gemini_data["error"]}
         
         resultats['A_sem'] = gemini_data.get('A_sem', 50) # Score de risque
         resultats['details_ia'] = gemini_data
         
-        # ---------------------------------------------------------
-        # ÉTAPE 5 : CALCUL FINAL
-        # ---------------------------------------------------------
         s_final = calculer_score_final(
             R_source=resultats['R_source'],
             V_fact=resultats['V_fact'],
             A_sem=resultats['A_sem']
         )
         
-        # Détermination du verdict textuel
-        if s_final >= 75:
-            verdict = "FIABLE"
-        elif s_final >= 40:
-            verdict = "DOUTEUX"
-        else:
-            verdict = "TROMPEUR / FAUX"
+        # Détermination du verdict textuel (seuils 75 / 40 par défaut)
+        verdict = verdict_du_score(s_final)
 
     resultats['S_final'] = s_final
     resultats['verdict'] = verdict
     
-    return resultats
\ No newline at end of file
+    return resultats
+
+def run_fakelab_pipeline(url, api_key_gemini, concurrent=True, use_cache=True, timings=False):
+    """
+    Orchestre tout le processus FAKELAB avec tes vrais modules.
+    
+    concurrent=True : la réputation démarre en même temps que l'extraction,
+    puis Fact-Check et Gemini tournent côte à côte. On paie alors la latence
+    la plus longue au lieu de la somme. Le dictionnaire renvoyé est identique
+    à celui du mode séquentiel (concurrent=False).
+    
+    use_cache=True : après l'extraction, un verdict déjà calculé pour la même URL
+    (canonique) ET le même texte est renvoyé tel quel, sans Wikipédia / Fact-Check / IA.
+    
+    timings=True : ajoute resultats['timings'], la liste des étapes chronométrées
+    (durée, issue, octets, tentatives). Les métriques sont de toute façon agrégées
+    dans modules.tracing.METRIQUES et exportées selon FAKELAB_TRACE_JSONL / FAKELAB_METRICS_FILE.
+    
+    Version bloquante de iter_fakelab_pipeline : ne renvoie que le résultat final.
+    """
+    for etape, donnees in iter_fakelab_pipeline(url, api_key_gemini, concurrent, use_cache, timings):
+        if etape == "resultat":
+            return donnees
+
+def iter_fakelab_pipeline(url, api_key_gemini, concurrent=True, use_cache=True, timings=False):
+    """
+    Même pipeline, mais publie chaque étape dès qu'elle est terminée.
+    Génère des couples (etape, donnees) :
+        "reputation" -> {R_source, details_reputation}   (souvent la première prête)
+        "extraction" -> {titre, contenu, methode_extraction}
+        "factcheck"  -> {V_fact, preuves_factcheck}
+        "semantique" -> analyse Gemini (A_sem, analyse_*...) ou {"error": ...}
+        "resultat"   -> dictionnaire final, identique à run_fakelab_pipeline (toujours en dernier)
+                        avec 'services_degrades' si une API en panne a été remplacée par sa valeur neutre
+                        et 'reputation_provisoire' si l'analyse Wikipédia a été différée
+    Une étape peut manquer (erreur d'extraction, verdict en cache, fake avéré qui rend l'IA inutile).
+    """
+    print(f"Lancement du pipeline pour : {url}")
+    cache = get_result_cache() if use_cache else None
+    trace = Trace(url)
+    if concurrent:
+        etapes = _iter_concurrent(url, api_key_gemini, cache, trace)
+    else:
+        etapes = _iter_sequentiel(url, api_key_gemini, cache, trace)
+
+    debut = time.perf_counter()
+    for etape, donnees in etapes:
+        if etape == "resultat":
+            # Avant le dernier yield : l'appelant peut s'arrêter dès qu'il a le résultat
+            trace.ajouter("pipeline", time.perf_counter() - debut,
+                          issue="erreur" if "error" in donnees else "ok")
+            _vers_historique(url, donnees, trace, time.perf_counter() - debut)
+            if timings:
+                donnees['timings'] = trace.to_dict()
+            try:
+                exporter_depuis_env(trace)
+            except OSError as e:
+                print(f"⚠️ Export des métriques impossible : {e}")
+        yield etape, donnees
+
+def _vers_historique(url, resultats, trace, duree):
+    """Enregistre une analyse réussie (les verdicts servis par le cache y sont déjà)."""
+    if "error" in resultats or any(s.nom == "cache" and s.issue == "hit" for s in trace.spans):
+        return
+    try:
+        historique = get_history_store()
+        if historique is not None:
+            historique.enregistrer(url, resultats, duree)
+    except Exception as e:
+        print(f"⚠️ Erreur historique : {e}")
+
+def _depuis_cache(cache, url, champs_extraction, trace=TRACE_NULLE):
+    """Retourne (résultat en cache ou None, empreintes (texte extrait, HTML))."""
+    if cache is None:
+        return None, None
+    empreinte = (hash_texte(champs_extraction['contenu']), champs_extraction.get('empreinte_html'))
+    with trace.span("cache") as span:
+        try:
+            en_cache = cache.get(url, *empreinte)
+        except Exception as e:
+            print(f"⚠️ Erreur cache : {e}")
+            span.issue = "erreur"
+            return None, empreinte
+        span.issue = "hit" if en_cache is not None else "miss"
+    if en_cache is not None:
+        print("⚡ Verdict servi depuis le cache.")
+    return en_cache, empreinte
+
+def _vers_cache(cache, url, empreinte, resultats):
+    if cache is not None and "services_degrades" not in resultats and "reputation_provisoire" not in resultats:
+        try:
+            cache.set(url, empreinte[0], resultats, empreinte_html=empreinte[1])
+        except Exception as e:
+            print(f"⚠️ Erreur cache : {e}")
+    return resultats
+
+def _chercher_doublon(contenu, trace=TRACE_NULLE):
+    """
+    Texte quasi identique déjà analysé (reprise sur un autre site) ?
+    Retourne (doublon ou None, signature MinHash à indexer ensuite).
+    """
+    index = get_near_duplicate_index()
+    if index is None:
+        return None, None
+    with trace.span("doublon") as span:
+        try:
+            signature = index.signature(contenu)
+            doublon = index.chercher(signature=signature)
+        except Exception as e:
+            print(f"⚠️ Erreur index des doublons : {e}")
+            span.issue = "erreur"
+            return None, None
+        span.issue = "trouve" if doublon else "absent"
+        if doublon:
+            span.set(similarite=doublon['similarite'])
+            print(f"♻️ Article quasi identique déjà analysé ({doublon['similarite']:.0%}) : {doublon['url']}")
+    return doublon, signature
+
+def _indexer_doublon(url, signature, champs_fact, gemini_data, resultats):
+    """Rend le Fact-Check et l'analyse IA de cet article réutilisables par ses copies."""
+    if signature is None or "error" in resultats or "services_degrades" in resultats:
+        return
+    try:
+        get_near_duplicate_index().ajouter(url, signature=signature,
+                                           donnees={"factcheck": champs_fact, "semantique": gemini_data})
+    except Exception as e:
+        print(f"⚠️ Erreur index des doublons : {e}")
+
+def _iter_doublon(doublon):
+    """Étapes publiées quand Fact-Check et IA sont repris d'un quasi-doublon."""
+    yield "doublon", {"url": doublon['url'], "similarite": doublon['similarite']}
+    yield "factcheck", doublon['donnees']['factcheck']
+    if doublon['donnees']['semantique'] is not None:
+        yield "semantique", doublon['donnees']['semantique']
+
+def _iter_concurrent(url, api_key_gemini, cache, trace=TRACE_NULLE):
+    # ÉTAPES 1 + 2 en parallèle (la réputation n'a besoin que de l'URL)
+    futur_reputation = _STAGE_EXECUTOR.submit(_etape_reputation, url, trace)
+    futur_extraction = _STAGE_EXECUTOR.submit(_etape_extraction, url, trace)
+    termines, _ = wait([futur_reputation, futur_extraction], return_when=FIRST_COMPLETED)
+    reputation_publiee = futur_extraction not in termines
+    if reputation_publiee:
+        # Réputation prête avant l'extraction : on la montre tout de suite
+        yield "reputation", futur_reputation.result()
+
+    champs_extraction, erreur = futur_extraction.result()
+    if erreur:
+        futur_reputation.cancel()
+        yield "resultat", erreur
+        return
+    yield "extraction", champs_extraction
+
+    en_cache, empreinte = _depuis_cache(cache, url, champs_extraction, trace)
+    if en_cache is not None:
+        futur_reputation.cancel()
+        yield "resultat", en_cache
+        return
+
+    doublon, signature = _chercher_doublon(champs_extraction['contenu'], trace)
+    if doublon is not None:
+        # Même texte qu'un article déjà analysé : seule la réputation (propre au site) est recalculée
+        yield from _iter_doublon(doublon)
+        resultats = {}
+        resultats.update(champs_extraction)
+        resultats.update(futur_reputation.result())
+        if not reputation_publiee:
+            yield "reputation", futur_reputation.result()
+        resultats.update(doublon['donnees']['factcheck'])
+        resultats['doublon_proche'] = {"url": doublon['url'], "similarite": doublon['similarite']}
+        yield "resultat", _vers_cache(cache, url, empreinte,
+                                      _finaliser(resultats, doublon['donnees']['semantique'], trace))
+        return
+
+    # ÉTAPES 3 + 4 en parallèle (elles n'ont besoin que du titre / texte)
+    futur_fact = _STAGE_EXECUTOR.submit(_etape_factcheck, champs_extraction['titre'], trace)
+    futur_ia = _STAGE_EXECUTOR.submit(_etape_semantique, champs_extraction['contenu'], api_key_gemini, trace,
+                                      titre=champs_extraction['titre'])
+
+    # Publication dans l'ordre d'arrivée
+    en_cours = {futur_fact: "factcheck", futur_ia: "semantique"}
+    if not reputation_publiee:
+        en_cours[futur_reputation] = "reputation"
+    fake_avere = False
+    while en_cours:
+        termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+        # Le Fact-Check d'abord : s'il tranche, la réponse IA arrivée en même temps est ignorée
+        for futur in sorted(termines, key=lambda f: f is not futur_fact):
+            etape = en_cours.pop(futur, None)  # l'appel IA a pu être retiré juste avant (fake avéré)
+            if etape == "factcheck" and futur.result()['V_fact'] == "FOUND_FAKE":
+                # Fake avéré : on annule l'appel IA s'il n'a pas démarré, sinon on ignore sa réponse
+                fake_avere = True
+                futur_ia.cancel()
+                en_cours.pop(futur_ia, None)
+            if etape is None or etape == "semantique" and fake_avere:
+                continue
+            yield etape, futur.result()
+
+    resultats = {}
+    resultats.update(champs_extraction)
+    resultats.update(futur_reputation.result())
+    resultats.update(futur_fact.result())
+    gemini_data = None if fake_avere else futur_ia.result()
+    resultats = _finaliser(resultats, gemini_data, trace)
+    _indexer_doublon(url, signature, futur_fact.result(), gemini_data, resultats)
+    yield "resultat", _vers_cache(cache, url, empreinte, resultats)
+
+def _iter_sequentiel(url, api_key_gemini, cache, trace=TRACE_NULLE):
+    """Ancien mode : chaque étape attend la précédente."""
+    resultats = {}
+
+    champs_extraction, erreur = _etape_extraction(url, trace)
+    if erreur:
+        yield "resultat", erreur
+        return
+    yield "extraction", champs_extraction
+
+    en_cache, empreinte = _depuis_cache(cache, url, champs_extraction, trace)
+    if en_cache is not None:
+        yield "resultat", en_cache
+        return
+    resultats.update(champs_extraction)
+
+    champs = _etape_reputation(url, trace)
+    resultats.update(champs)
+    yield "reputation", champs
+
+    doublon, signature = _chercher_doublon(resultats['contenu'], trace)
+    if doublon is not None:
+        yield from _iter_doublon(doublon)
+        resultats.update(doublon['donnees']['factcheck'])
+        resultats['doublon_proche'] = {"url": doublon['url'], "similarite": doublon['similarite']}
+        yield "resultat", _vers_cache(cache, url, empreinte,
+                                      _finaliser(resultats, doublon['donnees']['semantique'], trace))
+        return
+
+    champs_fact = _etape_factcheck(resultats['titre'], trace)
+    resultats.update(champs_fact)
+    yield "factcheck", champs_fact
+
+    gemini_data = None
+    if resultats['V_fact'] != "FOUND_FAKE":
+        gemini_data = _etape_semantique(resultats['contenu'], api_key_gemini, trace, titre=resultats['titre'])
+        yield "semantique", gemini_data
+    resultats = _finaliser(resultats, gemini_data, trace)
+    _indexer_doublon(url, signature, champs_fact, gemini_data, resultats)
+    yield "resultat", _vers_cache(cache, url, empreinte, resultats)
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Les modules se lancent depuis la racine du dépôt (comme app.py et batch.py)
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+# Caches persistants dans un dossier jetable (lu à l'import de modules.cache)
+os.environ.setdefault("FAKELAB_CACHE_DIR", tempfile.mkdtemp(prefix="fakelab-tests-"))
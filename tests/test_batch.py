@@ -0,0 +1,38 @@
+import json
+import threading
+
+import pytest
+
+import batch
+from batch import BatchRunner, urls_deja_traitees
+
+def test_reprise_ignore_les_erreurs(tmp_path):
+    sortie = tmp_path / "resultats.jsonl"
+    lignes = [
+        {"url": "https://a.fr/ok", "resultat": {"verdict": "FIABLE"}},
+        {"url": "https://a.fr/panne", "resultat": {"error": "Erreur lors de l'extraction : timeout"}},
+    ]
+    sortie.write_text("".join(json.dumps(l) + "\n" for l in lignes) + '{"url": "https://a.fr/tron', encoding="utf-8")
+    faites = urls_deja_traitees(str(sortie), None)
+    assert faites == {"https://a.fr/ok"}
+
+def test_ctrl_c_termine_et_ecrit_les_analyses_en_cours(monkeypatch):
+    demarrees = threading.Barrier(3)
+
+    def analyser(url, api_key, use_cache):
+        demarrees.wait(timeout=5)  # les trois analyses tournent en même temps
+        return {"url": url, "duree": 0.0, "resultat": {"verdict": "FIABLE"}}
+
+    monkeypatch.setattr(batch, "analyser", analyser)
+    ecrites = []
+
+    def on_result(ligne):
+        ecrites.append(ligne["url"])
+        if len(ecrites) == 1:
+            raise KeyboardInterrupt
+
+    urls = [f"https://site{i}.fr/a" for i in range(6)]
+    with pytest.raises(KeyboardInterrupt):
+        BatchRunner(None, concurrency=3, per_host=1).run(urls, on_result)
+    # La première a provoqué l'arrêt, les deux autres en cours ont été écrites, rien de nouveau n'a démarré
+    assert sorted(ecrites) == sorted(urls[:3])
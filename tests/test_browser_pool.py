@@ -0,0 +1,129 @@
+"""BrowserPool contre un serveur HTTP local qui sert une page rendue en JavaScript."""
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+
+from modules.browser_pool import BrowserPool, attendre_page_prete
+
+TEXTE = "Le conseil municipal a voté le budget après trois heures de débat. " * 8
+PAGE_JS = f"""<!doctype html><html><head><title>Article JS</title></head><body>
+<div id="racine">Chargement...</div>
+<script>
+setTimeout(function () {{
+  document.getElementById("racine").innerHTML = "<article><h1>Budget</h1><p>{TEXTE}</p></article>";
+}}, 300);
+</script></body></html>"""
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        corps = PAGE_JS.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+@pytest.fixture(scope="module")
+def url_fixture():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{serveur.server_address[1]}/article-js"
+    serveur.shutdown()
+
+class NavigateurHttp:
+    """Remplaçant de webdriver.Chrome : charge la page en HTTP (sans exécuter le JS)."""
+    def __init__(self):
+        self.page_source = ""
+        self.ferme = False
+        self.session_morte = False
+        self.lent = False
+
+    def get(self, url):
+        if self.session_morte:
+            raise InvalidSessionIdException("invalid session id")
+        if self.lent:
+            raise TimeoutException("timeout: Timed out receiving message from renderer")
+        self.page_source = requests.get(url, timeout=5).text
+
+    def execute_script(self, script):
+        if self.session_morte:
+            raise WebDriverException("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.ferme = True
+
+@pytest.fixture
+def pool():
+    crees = []
+
+    def fabrique():
+        crees.append(NavigateurHttp())
+        return crees[-1]
+
+    pool = BrowserPool(max_size=1, max_pages=3, driver_factory=fabrique)
+    pool.crees = crees
+    yield pool
+    pool.close()
+
+def test_navigateur_reutilise_entre_emprunts(pool, url_fixture):
+    for _ in range(2):
+        with pool.checkout() as driver:
+            driver.get(url_fixture)
+            assert "Chargement..." in driver.page_source
+    assert len(pool.crees) == 1
+    assert pool.stats["pages"] == 2
+
+def test_recyclage_apres_max_pages(pool, url_fixture):
+    for _ in range(4):
+        with pool.checkout() as driver:
+            driver.get(url_fixture)
+    assert len(pool.crees) == 2
+    assert pool.crees[0].ferme and not pool.crees[1].ferme
+    assert pool.stats["recycles"] == 1
+
+def test_navigateur_plante_remplace(pool, url_fixture):
+    with pytest.raises(WebDriverException):
+        with pool.checkout() as driver:
+            driver.session_morte = True
+            driver.get(url_fixture)
+    assert pool.crees[0].ferme
+    assert pool.stats["plantages"] == 1
+    with pool.checkout() as driver:
+        driver.get(url_fixture)
+    assert len(pool.crees) == 2
+
+def test_delai_de_chargement_garde_le_navigateur(pool, url_fixture):
+    with pytest.raises(TimeoutException):
+        with pool.checkout() as driver:
+            driver.lent = True
+            driver.get(url_fixture)
+    driver.lent = False
+    assert not driver.ferme and pool.stats["plantages"] == 0
+    with pool.checkout() as encore:
+        assert encore is driver
+
+def test_emprunt_borne_par_la_taille_du_pool(pool):
+    with pool.checkout():
+        with pytest.raises(TimeoutError):
+            with pool.checkout(timeout=0.1):
+                pass
+
+@pytest.mark.skipif(not (shutil.which("chromedriver") or shutil.which("google-chrome")
+                         or shutil.which("chromium")), reason="Chrome non installé")
+def test_rendu_javascript_avec_chrome(url_fixture):
+    pool = BrowserPool(max_size=1, max_pages=2)
+    try:
+        with pool.checkout() as driver:
+            driver.get(url_fixture)
+            assert attendre_page_prete(driver, delai_max=10) == "selecteur"
+            assert "conseil municipal" in driver.page_source
+    finally:
+        pool.close()
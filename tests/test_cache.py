@@ -0,0 +1,77 @@
+import pytest
+
+from modules import cache
+from modules.cache import LRUCache, SQLiteStore
+
+class Horloge:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+@pytest.fixture
+def horloge(monkeypatch):
+    h = Horloge()
+    monkeypatch.setattr(cache.time, "time", h)
+    return h
+
+def test_lru_evince_la_moins_recemment_utilisee():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" devient la plus ancienne
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+
+def test_lru_expiration(horloge):
+    lru = LRUCache()
+    lru.set("a", 1, ttl=10)
+    lru.set("b", 2)
+    horloge.t += 11
+    assert lru.get("a") is None
+    assert lru.get("b") == 2
+    assert len(lru) == 1
+
+def test_sqlite_expiration(tmp_path, horloge):
+    store = SQLiteStore(str(tmp_path / "c.sqlite"), "t")
+    store.set("a", {"v": 1}, ttl=10)
+    assert store.get("a") == {"v": 1}
+    horloge.t += 11
+    assert store.get("a") is None
+    assert store.stats()["entrees"] == 0
+
+def test_sqlite_eviction_par_taille(tmp_path, horloge):
+    valeur = "x" * 100  # ~102 octets en JSON
+    store = SQLiteStore(str(tmp_path / "c.sqlite"), "t", max_bytes=250)
+    store.set("a", valeur)
+    horloge.t += 1
+    store.set("b", valeur)
+    horloge.t += 1
+    store.get("a")  # "b" devient la moins récemment lue
+    horloge.t += 1
+    store.set("c", valeur)
+    assert store.get("b") is None
+    assert store.get("a") == valeur and store.get("c") == valeur
+    assert store.stats()["octets"] <= 250
+
+def test_sqlite_partage_entre_instances(tmp_path):
+    chemin = str(tmp_path / "c.sqlite")
+    SQLiteStore(chemin, "t").set("cle", [1, 2])
+    assert SQLiteStore(chemin, "t").get("cle") == [1, 2]
+
+def test_verdict_valide_si_meme_html_ou_meme_texte(tmp_path):
+    from modules.result_cache import ResultCache
+    rc = ResultCache(chemin=str(tmp_path / "r.sqlite"))
+    rc.set("https://a.fr/x", "texte-np", {"verdict": "FIABLE"}, empreinte_html="html-1")
+    # Même HTML, texte tiré par un autre parser : toujours valide
+    assert rc.get("https://a.fr/x", "texte-tf", "html-1") == {"verdict": "FIABLE"}
+    # HTML différent (habillage) mais même texte : valide
+    assert rc.get("https://a.fr/x", "texte-np", "html-2") == {"verdict": "FIABLE"}
+    # Page rendue par Selenium (pas d'empreinte HTML) : le texte seul décide
+    assert rc.get("https://a.fr/x", "texte-np") == {"verdict": "FIABLE"}
+    # HTML et texte différents : article modifié, entrée invalidée
+    assert rc.get("https://a.fr/x", "texte-v2", "html-2") is None
+    assert rc.get("https://a.fr/x", "texte-np", "html-1") is None
+    assert rc.stats()["perimes"] == 1
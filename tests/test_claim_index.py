@@ -0,0 +1,63 @@
+import json
+import sqlite3
+
+import pytest
+
+from modules.claim_index import ClaimIndex, lire_export, pertinence, pertinents
+
+def claim(texte, url, note="Faux", titre=None, langue="fr"):
+    return {"text": texte, "claimReview": [{"url": url, "title": titre or texte, "textualRating": note,
+                                            "languageCode": langue}]}
+
+VACCIN = claim("Le vaccin contre la grippe contient une puce électronique", "https://verif.fr/puce")
+ELECTIONS = claim("Des bulletins de vote ont été détruits à Marseille", "https://verif.fr/bulletins")
+PROCHE = claim("La grippe saisonnière arrive plus tôt cette année", "https://verif.fr/grippe", note="Vrai")
+
+@pytest.fixture
+def index(tmp_path):
+    try:
+        index = ClaimIndex(chemin=str(tmp_path / "claims.sqlite"), seuil=0.6)
+    except sqlite3.OperationalError:
+        pytest.skip("SQLite compilé sans FTS5")
+    index.ajouter([VACCIN, ELECTIONS, PROCHE])
+    return index
+
+def test_seuil_de_pertinence(index):
+    titre = "Le vaccin contre la grippe contiendrait une puce électronique"
+    trouves = index.rechercher(titre)
+    # PROCHE partage « grippe » (candidat BM25) mais reste sous le seuil
+    assert [c['claimReview'][0]['url'] for c in trouves] == ["https://verif.fr/puce"]
+    assert trouves[0]['pertinence'] >= 0.6
+    assert pertinence(titre, PROCHE) < 0.6
+    assert len(index.rechercher(titre, seuil=0.0)) == 2
+
+def test_accents_et_mots_vides_ignores(index):
+    assert index.rechercher("BULLETINS de VOTE detruits a marseille")[0]['text'] == ELECTIONS['text']
+    assert index.rechercher("le la les de") == []
+
+def test_filtre_de_langue(index):
+    index.ajouter([claim("Vaccine microchip hidden in flu shots", "https://check.example/chip", langue="en")])
+    assert index.rechercher("flu shots vaccine microchip", langue="fr") == []
+    assert len(index.rechercher("flu shots vaccine microchip", langue="en")) == 1
+
+def test_ajout_idempotent(index):
+    assert index.ajouter([VACCIN, ELECTIONS]) == 0
+    assert index.ajouter([dict(VACCIN, claimant="Inconnu")]) == 1
+    assert index.stats()['claims'] == 3
+
+def test_pertinents_garde_le_mieux_classe_a_defaut():
+    claims = [{"pertinence": 0.4}, {"pertinence": 0.2}]
+    assert pertinents(claims, seuil=0.6) == [{"pertinence": 0.4}]
+    assert pertinents([{"pertinence": 0.9}, {"pertinence": 0.3}], seuil=0.6) == [{"pertinence": 0.9}]
+
+def test_export_schema_org(tmp_path):
+    flux = {"dataFeedElement": [{"item": [{
+        "@type": "ClaimReview", "url": "https://verif.fr/x", "claimReviewed": "Affirmation",
+        "author": {"name": "Vérif", "url": "https://verif.fr"}, "reviewRating": {"alternateName": "Faux"},
+        "inLanguage": "fr"}]}]}
+    chemin = tmp_path / "export.json"
+    chemin.write_text(json.dumps(flux), encoding="utf-8")
+    (lu,) = lire_export(str(chemin))
+    assert lu['text'] == "Affirmation"
+    assert lu['claimReview'][0]['textualRating'] == "Faux"
+    assert lu['claimReview'][0]['publisher']['name'] == "Vérif"
@@ -0,0 +1,47 @@
+import json
+import os
+
+from modules.domain_index import DomainIndex, DomainIndexLoader
+
+SOURCES = {
+    "whitelist": ["lemonde.fr", "*.gouv.bj", "exemple.com", "conteste.org"],
+    "blacklist": ["faux-infos.net", "blog.exemple.com", "*.lemonde.fr.evil.com", "conteste.org"],
+}
+
+def index():
+    return DomainIndex.from_sources(SOURCES)
+
+def test_domaine_et_sous_domaines():
+    assert index().lookup("lemonde.fr") == "whitelist"
+    assert index().lookup("www.lemonde.fr") == "whitelist"
+    assert index().lookup("sport.lemonde.fr") == "whitelist"
+    assert index().lookup("faux-infos.net") == "blacklist"
+    assert index().lookup("inconnu.fr") is None
+
+def test_joker_ne_couvre_que_les_sous_domaines():
+    assert index().lookup("presidence.gouv.bj") == "whitelist"
+    assert index().lookup("gouv.bj") is None
+
+def test_regle_la_plus_specifique_gagne():
+    assert index().lookup("exemple.com") == "whitelist"
+    assert index().lookup("blog.exemple.com") == "blacklist"
+    assert index().lookup("article.blog.exemple.com") == "blacklist"
+
+def test_liste_noire_gagne_a_egalite():
+    assert index().lookup("conteste.org") == "blacklist"
+    assert index().lookup("a.conteste.org") == "blacklist"
+
+def test_suffixe_trompeur_non_reconnu():
+    # "lemonde.fr" n'est qu'une partie du nom : pas de correspondance par simple sous-chaîne
+    assert index().lookup("lemonde.fr.evil.com") is None
+    assert index().lookup("x.lemonde.fr.evil.com") == "blacklist"
+
+def test_index_compile_puis_recompile_quand_le_json_change(tmp_path):
+    sources = tmp_path / "sources.json"
+    sources.write_text(json.dumps(SOURCES), encoding="utf-8")
+    loader = DomainIndexLoader(str(sources), intervalle=0)
+    assert os.path.exists(tmp_path / "sources.idx")
+    assert loader.get().lookup("inconnu.fr") is None
+
+    sources.write_text(json.dumps({"blacklist": ["inconnu.fr"]}) + "\n", encoding="utf-8")
+    assert loader.get().lookup("inconnu.fr") == "blacklist"
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from bench.fixtures import generer_corpus
+from modules.extractor import RobustExtractor
+
+TEXTE = "Le texte complet de l'article, assez long pour être considéré comme valide. " * 3
+
+@pytest.fixture(scope="module")
+def page():
+    chemin, page = next((c, p) for c, p in generer_corpus(10, part_js=0).items())
+    return "https://quotidien.fr" + chemin, page
+
+def parser(donnees, attendre=None):
+    def parse(*_):
+        if attendre is not None:
+            attendre.wait(5)
+        return dict(donnees) if donnees else donnees
+    return parse
+
+def test_priorite_fixe_quel_que_soit_le_plus_rapide(monkeypatch):
+    ex = RobustExtractor()
+    newspaper_libere = threading.Event()
+    monkeypatch.setattr(ex, "_parse_newspaper", parser({"titre": "Titre NP", "texte": TEXTE}, newspaper_libere))
+    monkeypatch.setattr(ex, "_parse_trafilatura", parser({"titre": "Titre TF", "texte": TEXTE}))
+    monkeypatch.setattr(ex, "_parse_readability", parser({"titre": "Titre RD", "texte": TEXTE}))
+    threading.Timer(0.1, newspaper_libere.set).start()  # Trafilatura et Readability finissent avant
+    essais = []
+    data, methode = ex._parse_parallel("https://a.fr/x", "<html/>", {"durees_parsers": {}}, essais=essais)
+    assert (methode, data["titre"]) == ("Newspaper3k", "Titre NP")
+    assert {nom for nom, _, _ in essais} >= {"Newspaper3k"}
+
+def test_titre_repris_d_un_autre_parser(monkeypatch):
+    ex = RobustExtractor()
+    monkeypatch.setattr(ex, "_parse_newspaper", parser({"titre": None, "texte": TEXTE}))
+    monkeypatch.setattr(ex, "_parse_trafilatura", parser(None))
+    monkeypatch.setattr(ex, "_parse_readability", parser({"titre": "Titre RD", "texte": "<p>court</p>"}))
+    data, methode = ex._parse_parallel("https://a.fr/x", "<html/>", {"durees_parsers": {}})
+    assert methode == "Newspaper3k"
+    assert data == {"titre": "Titre RD", "texte": TEXTE}
+
+def test_vrais_parsers_titre_et_texte_propre(page):
+    pytest.importorskip("trafilatura")
+    pytest.importorskip("readability")
+    pytest.importorskip("newspaper")
+    url, page = page
+    ex = RobustExtractor()
+    stats = {"durees_parsers": {}}
+    for noms in (["Newspaper3k", "Trafilatura", "Readability"], ["Trafilatura"], ["Readability"]):
+        data, methode = ex._parse_parallel(url, page["html"], stats, noms=noms)
+        assert methode == noms[0]
+        assert data["titre"] == page["titre"]
+        assert "<" not in data["texte"] and len(data["texte"]) > 1000
@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from modules.extractor import RobustExtractor
+from modules.extractor_router import ALPHA, ExtractorRouter
+
+TEXTE = "Le texte complet de l'article, assez long pour être considéré comme valide. " * 3
+
+@pytest.fixture
+def router(tmp_path):
+    return ExtractorRouter(chemin=str(tmp_path / "routage.sqlite"), exploration=0.0)
+
+@pytest.mark.parametrize("data, attendu", [
+    ({"titre": "Un vrai titre", "texte": TEXTE}, True),
+    ({"titre": None, "texte": TEXTE}, False),                           # titre absent
+    ({"titre": "Un vrai titre", "texte": "<div><p>" + TEXTE}, False),  # HTML brut
+    ({"titre": "Un vrai titre", "texte": "trop court"}, False),
+])
+def test_qualite_d_une_extraction(data, attendu):
+    assert RobustExtractor()._qualite(data) is attendu
+
+def test_parser_sans_titre_note_en_echec(monkeypatch):
+    ex = RobustExtractor()
+    monkeypatch.setattr(ex, "_parse_newspaper", lambda *_: {"titre": "Titre", "texte": TEXTE})
+    monkeypatch.setattr(ex, "_parse_trafilatura", lambda *_: {"titre": None, "texte": TEXTE})
+    essais = []
+    ex._parse_parallel("https://a.fr/x", "<html/>", {"durees_parsers": {}}, noms=["Trafilatura"], essais=essais)
+    assert [(nom, succes) for nom, succes, _ in essais] == [("Trafilatura", False)]
+
+def test_statistiques_d_une_ancienne_version_effacees(tmp_path):
+    chemin = str(tmp_path / "routage.sqlite")
+    ExtractorRouter(chemin=chemin).enregistrer("a.fr", [("Trafilatura", True, 0.01)])
+    with sqlite3.connect(chemin) as conn:
+        conn.execute("PRAGMA user_version = 1")
+    assert ExtractorRouter(chemin=chemin).statistiques("a.fr") == {}
+    # Version à jour : rien n'est effacé
+    ExtractorRouter(chemin=chemin).enregistrer("a.fr", [("Trafilatura", True, 0.01)])
+    assert ExtractorRouter(chemin=chemin).statistiques("a.fr")["Trafilatura"]["essais"] == 1
+
+def st(taux, essais=10, latence_ms=100.0):
+    return {"essais": essais, "taux": taux, "latence_ms": latence_ms}
+
+PARSERS_VIDES = {"Newspaper3k": st(0.0), "Trafilatura": st(0.0), "Readability": st(0.05)}
+
+@pytest.mark.parametrize("stats, mode, parsers, secours, selenium", [
+    # Domaine inconnu ou trop peu d'essais : plan complet
+    ({}, "complet", ["Newspaper3k", "Trafilatura", "Readability"], [], True),
+    ({"Trafilatura": st(1.0, essais=4)}, "complet", ["Newspaper3k", "Trafilatura", "Readability"], [], True),
+    # Site rendu en JavaScript : Selenium direct
+    ({**PARSERS_VIDES, "Selenium": st(0.8)}, "selenium_direct", [], [], True),
+    # Selenium peu efficace lui aussi : on garde le plan complet
+    ({**PARSERS_VIDES, "Selenium": st(0.2)}, "complet", ["Newspaper3k", "Trafilatura", "Readability"], [], True),
+    # Un parser fiable seul, les autres en secours (les plus efficaces d'abord)
+    ({"Newspaper3k": st(0.6), "Trafilatura": st(0.95), "Readability": st(0.3)},
+     "parser_unique", ["Trafilatura"], ["Newspaper3k", "Readability"], True),
+    # Deux parsers fiables à égalité : le plus rapide
+    ({"Newspaper3k": st(0.95, latence_ms=300), "Trafilatura": st(0.95, latence_ms=50)},
+     "parser_unique", ["Trafilatura"], ["Newspaper3k", "Readability"], True),
+    # Parser toujours en échec relégué en secours
+    ({"Newspaper3k": st(0.7), "Trafilatura": st(0.6), "Readability": st(0.05)},
+     "parallele", ["Newspaper3k", "Trafilatura"], ["Readability"], True),
+    # Selenium toujours en échec : sauté
+    ({"Newspaper3k": st(0.7), "Trafilatura": st(0.6), "Readability": st(0.5), "Selenium": st(0.0)},
+     "parallele", ["Newspaper3k", "Trafilatura", "Readability"], [], False),
+    # Rien de fiable ni d'inutile : plan complet
+    ({"Newspaper3k": st(0.7), "Trafilatura": st(0.6), "Readability": st(0.5), "Selenium": st(0.5)},
+     "complet", ["Newspaper3k", "Trafilatura", "Readability"], [], True),
+])
+def test_plan(router, stats, mode, parsers, secours, selenium):
+    plan = router._plan("a.fr", stats)
+    assert (plan.mode, plan.parsers, plan.secours, plan.selenium) == (mode, parsers, secours, selenium)
+    assert not plan.exploration
+
+def test_exploration_suit_le_plan_complet(tmp_path):
+    router = ExtractorRouter(chemin=str(tmp_path / "routage.sqlite"), exploration=1.0)
+    plan = router._plan("a.fr", {**PARSERS_VIDES, "Selenium": st(0.8)})
+    assert plan.exploration and plan.mode == "complet"
+    # Domaine inconnu : plan complet, sans compter d'exploration
+    assert not router._plan("b.fr", {}).exploration
+
+def test_moyenne_mobile_exponentielle(router):
+    router.enregistrer("a.fr", [("Trafilatura", True, 0.1)])
+    router.enregistrer("a.fr", [("Trafilatura", False, 0.3)])
+    router.enregistrer("a.fr", [("Trafilatura", False, 0.3), ("Selenium", True, 2.0)])
+    taux = (1 - ALPHA) ** 2
+    latence = (0.1 * (1 - ALPHA) + 0.3 * ALPHA) * (1 - ALPHA) + 0.3 * ALPHA
+    stats = router.statistiques("a.fr")
+    assert stats["Trafilatura"]["essais"] == 3
+    assert stats["Trafilatura"]["taux"] == round(taux, 3)
+    assert stats["Trafilatura"]["latence_ms"] == round(latence * 1000, 1)
+    assert (stats["Selenium"]["essais"], stats["Selenium"]["taux"]) == (1, 1.0)
+    assert router.statistiques("b.fr") == {}
+
+def test_planifier_depuis_les_statistiques(router):
+    for _ in range(5):
+        router.enregistrer("a.fr", [("Newspaper3k", False, 0.1), ("Trafilatura", False, 0.1),
+                                    ("Readability", False, 0.1), ("Selenium", True, 2.0)])
+    plan = router.planifier("https://www.a.fr/article")
+    assert plan.mode == "selenium_direct" and not plan.telecharger
+    assert router.stats()["decisions"]["selenium_direct"] == 1
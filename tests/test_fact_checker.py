@@ -0,0 +1,99 @@
+"""Cache du Fact-Check : appels identiques regroupés, durées de vie positive / négative, compteurs."""
+import threading
+import time
+
+import pytest
+
+from modules import cache, fact_checker
+from modules.cache import LRUCache, SQLiteStore
+from modules.fact_checker import TTL_NEGATIF, TTL_POSITIF, check_google_facts, stats_cache
+
+CLAIM = {"text": "Le pape est mort", "claimReview": [{"textualRating": "Faux"}]}
+
+class Api:
+    """Remplace la requête HTTP : claims selon la requête, éventuellement bloquée jusqu'à `libere`."""
+    def __init__(self, reponses, libere=None):
+        self.reponses = reponses
+        self.libere = libere
+        self.requetes = []
+
+    def __call__(self, params):
+        self.requetes.append(params["query"])
+        if self.libere is not None:
+            self.libere.wait(5)
+        return list(self.reponses.get(params["query"], []))
+
+@pytest.fixture(autouse=True)
+def caches_vides(tmp_path, monkeypatch):
+    monkeypatch.setattr(fact_checker, "_CACHE_MEMOIRE", LRUCache())
+    monkeypatch.setattr(fact_checker, "_CACHE_DISQUE", SQLiteStore(str(tmp_path / "factcheck.sqlite"), "factcheck"))
+    monkeypatch.setattr(fact_checker, "_COMPTEURS", dict.fromkeys(fact_checker._COMPTEURS, 0))
+    monkeypatch.setattr(fact_checker, "_indexer_localement", lambda claims, language: None)
+
+def installer(monkeypatch, api):
+    monkeypatch.setattr(fact_checker, "_requete_api", api)
+    return api
+
+def test_requetes_identiques_en_vol_regroupees(monkeypatch):
+    libere = threading.Event()
+    api = installer(monkeypatch, Api({"Le pape est mort ?": [CLAIM]}, libere))
+    requetes = ["Le pape est mort ?", "le pape est MORT", "Le pâpe, est mort"]
+    resultats = [None] * len(requetes)
+
+    def chercher(i):
+        resultats[i] = check_google_facts(requetes[i], "cle")
+
+    threads = [threading.Thread(target=chercher, args=(0,))]
+    threads[0].start()
+    while not api.requetes:
+        time.sleep(0.01)
+    threads += [threading.Thread(target=chercher, args=(i,)) for i in (1, 2)]
+    for t in threads[1:]:
+        t.start()
+    while stats_cache()["regroupes"] < 2:
+        time.sleep(0.01)
+    libere.set()
+    for t in threads:
+        t.join(5)
+
+    assert api.requetes == ["Le pape est mort ?"]
+    assert resultats == [[CLAIM]] * 3
+    assert resultats[1] is not resultats[2]  # chaque appelant reçoit sa copie
+    stats = stats_cache()
+    assert (stats["misses"], stats["regroupes"], stats["appels_api"], stats["appels_economises"]) == (1, 2, 1, 2)
+
+def test_durees_de_vie_positive_et_negative(monkeypatch):
+    horloge = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: horloge[0])
+    api = installer(monkeypatch, Api({"trouvee": [CLAIM]}))
+    for _ in range(2):
+        assert check_google_facts("trouvee", "cle") == [CLAIM]
+        assert check_google_facts("absente", "cle") == []
+    assert len(api.requetes) == 2
+
+    # L'absence de résultat expire d'abord (les fact-checkers publient après coup)
+    horloge[0] += TTL_NEGATIF + 1
+    check_google_facts("trouvee", "cle")
+    check_google_facts("absente", "cle")
+    assert api.requetes[2:] == ["absente"]
+
+    horloge[0] += TTL_POSITIF
+    check_google_facts("trouvee", "cle")
+    assert api.requetes[3:] == ["trouvee"]
+    stats = stats_cache()
+    assert (stats["hits"], stats["misses"], stats["appels_api"]) == (3, 4, 4)
+    assert stats["hit_ratio"] == round(3 / 7, 3)
+
+def test_reprise_depuis_le_disque(monkeypatch):
+    api = installer(monkeypatch, Api({"trouvee": [CLAIM]}))
+    check_google_facts("trouvee", "cle")
+    monkeypatch.setattr(fact_checker, "_CACHE_MEMOIRE", LRUCache())  # autre processus, même disque
+    assert check_google_facts("trouvee", "cle") == [CLAIM]
+    assert len(api.requetes) == 1 and stats_cache()["hits"] == 1
+
+def test_erreur_jamais_mise_en_cache(monkeypatch):
+    reponses = iter([None, [CLAIM]])
+    monkeypatch.setattr(fact_checker, "_appel_api", lambda *_: next(reponses))
+    assert check_google_facts("panne", "cle") is None
+    assert check_google_facts("panne", "cle") == [CLAIM]
+    assert stats_cache()["hits"] == 0
@@ -0,0 +1,87 @@
+"""Réponses groupées de Gemini : une réponse inattendue ne fait jamais échouer tout le lot."""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules import gemini_analyzer
+from modules.gemini_analyzer import _analyser_lot, analyze_text_semantics_groupe
+
+class Reponse:
+    def __init__(self, text):
+        self.text = text
+
+def analyse(score):
+    return {"analyse_subjectivite": {"score": score, "details": ""},
+            "analyse_clickbait": {"score": 2, "details": ""},
+            "analyse_preuves": {"score_manque_preuves": 2, "details": ""},
+            "synthese_globale": "", "verdict_style": "FIABLE"}
+
+@pytest.fixture
+def repondre(monkeypatch):
+    def installer(text):
+        monkeypatch.setattr(gemini_analyzer, "_generer", lambda client, prompt: (Reponse(text), "modele-test"))
+    return installer
+
+@pytest.mark.parametrize("text", ["42", '"texte"', "null", None, "", "[1, 2"])
+def test_reponse_inexploitable_erreur_par_article(repondre, text):
+    repondre(text)
+    resultats = _analyser_lot(None, ["a", "b"])
+    assert len(resultats) == 2
+    assert all("mal formatée" in r["error"] for r in resultats)
+
+def test_tableau_enveloppe_et_article_manquant(repondre):
+    repondre("```json\n" + json.dumps({"resultats": [{"id": 1, "analyse": analyse(2)}]}) + "\n```")
+    manquant, present = _analyser_lot(None, ["a", "b"])
+    assert "absent" in manquant["error"]
+    assert present["A_sem"] == 20.0 and present["modele_utilise"] == "modele-test"
+
+def test_note_non_numerique_isolee(repondre):
+    repondre(json.dumps([{"id": 0, "analyse": analyse("élevé")}, {"id": 1, "analyse": analyse(8)}]))
+    mauvais, bon = _analyser_lot(None, ["a", "b"])
+    assert "error" in mauvais
+    assert bon["A_sem"] == 40.0
+
+def analyse_lot(texte):
+    return {"texte": texte}
+
+def groupes(n, cle, fenetre):
+    with ThreadPoolExecutor(n) as pool:
+        return list(pool.map(lambda i: analyze_text_semantics_groupe(f"article {i}", cle, fenetre), range(n)))
+
+def test_lots_envoyes_en_parallele(monkeypatch):
+    # Deux lots pleins : chacun attend l'autre, ce qui n'aboutit que s'ils sont en vol ensemble
+    deux_lots = threading.Barrier(2, timeout=5)
+
+    def lot(texts, api_key, taille_lot):
+        deux_lots.wait()
+        return [analyse_lot(t) for t in texts]
+
+    monkeypatch.setattr(gemini_analyzer, "analyze_texts_batch", lot)
+    taille = gemini_analyzer.TAILLE_LOT
+    resultats = groupes(2 * taille, "cle-parallele", 5)
+    assert [r["texte"] for r in resultats] == [f"article {i}" for i in range(2 * taille)]
+
+def test_fenetre_propre_a_chaque_appel(monkeypatch):
+    monkeypatch.setattr(gemini_analyzer, "analyze_texts_batch", lambda texts, *_: [analyse_lot(t) for t in texts])
+    debut = time.monotonic()
+    assert analyze_text_semantics_groupe("pressé", "cle-fenetre", 0.0)["texte"] == "pressé"
+    # Un premier appel à longue fenêtre ne fixe pas celle des suivants
+    with ThreadPoolExecutor(2) as pool:
+        lent = pool.submit(analyze_text_semantics_groupe, "patient", "cle-fenetre", 30)
+        time.sleep(0.05)
+        assert analyze_text_semantics_groupe("pressé", "cle-fenetre", 0.0)["texte"] == "pressé"
+        assert lent.result(5)["texte"] == "patient"
+    assert time.monotonic() - debut < 5
+
+def test_attente_bornee(monkeypatch):
+    libere = threading.Event()
+    monkeypatch.setattr(gemini_analyzer, "analyze_texts_batch", lambda texts, *_: libere.wait(5) and [])
+    monkeypatch.setattr(gemini_analyzer, "ATTENTE_LOT", 0.1)
+    try:
+        resultat = analyze_text_semantics_groupe("bloqué", "cle-bloquee", 0.0)
+    finally:
+        libere.set()
+    assert resultat["indisponible"] and resultat["A_sem"] == 50
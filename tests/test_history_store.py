@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from modules.history_store import HistoryStore
+
+MAINTENANT = time.time()
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(chemin=str(tmp_path / "historique.sqlite"))
+
+def resultat(verdict, score=50.0):
+    return {"titre": "Titre", "verdict": verdict, "S_final": score, "R_source": 80.0,
+            "V_fact": "NOT_FOUND", "A_sem": 30.0}
+
+def test_pagination_stable_sur_dates_egales(store):
+    # Beaucoup d'analyses enregistrées à la même seconde : le curseur départage par id
+    ids = [store.enregistrer(f"https://a.fr/{i}", resultat("FIABLE"), quand=MAINTENANT - (i // 4))
+           for i in range(10)]
+    vus, curseur = [], None
+    while True:
+        lignes, curseur = store.page(taille=3, apres=curseur)
+        vus += [l["id"] for l in lignes]
+        if curseur is None:
+            break
+    # Plus récentes d'abord, puis id décroissant à date égale : ni doublon ni trou aux frontières de page
+    assert vus == ids[3::-1] + ids[7:3:-1] + ids[9:7:-1]
+    assert store.page(taille=10)[1] is None
+
+def test_analyse_sans_verdict_ignoree(store):
+    assert store.enregistrer("https://a.fr/x", {"error": "Impossible d'extraire"}) is None
+    assert store.compter() == {}
+
+def test_compter_et_filtre_de_domaine_normalise(store):
+    store.enregistrer("https://www.journal.fr/a", resultat("FIABLE"), quand=MAINTENANT - 10)
+    store.enregistrer("https://journal.fr/b", resultat("TROMPEUR / FAUX"), quand=MAINTENANT - 5)
+    store.enregistrer("https://autre.fr/c", resultat("FIABLE"), quand=MAINTENANT)
+    assert store.compter() == {"FIABLE": 2, "TROMPEUR / FAUX": 1}
+    for dom in ("journal.fr", "https://WWW.Journal.fr/", "www.journal.fr"):
+        assert store.compter(dom=dom) == {"FIABLE": 1, "TROMPEUR / FAUX": 1}
+        assert len(store.page(dom=dom)[0]) == 2
+    assert store.compter(dom="journal.fr", verdicts=["FIABLE"]) == {"FIABLE": 1}
+    assert store.compter(depuis=MAINTENANT - 6) == {"TROMPEUR / FAUX": 1, "FIABLE": 1}
+    assert store.compter(jusqu_a=MAINTENANT - 5) == {"FIABLE": 1}
+
+def test_domaines_suspects(store):
+    for i, verdict in enumerate(["FAUX (Avéré)", "TROMPEUR / FAUX", "FIABLE", "FIABLE"]):
+        store.enregistrer(f"https://douteux.fr/{i}", resultat(verdict, score=10.0 * i), quand=MAINTENANT - i)
+    for i in range(3):
+        store.enregistrer(f"https://serieux.fr/{i}", resultat("FIABLE", score=90.0), quand=MAINTENANT)
+    store.enregistrer("https://rare.fr/0", resultat("FAUX (Avéré)"), quand=MAINTENANT)
+    # Trop ancien pour la fenêtre : ignoré
+    store.enregistrer("https://vieux.fr/0", resultat("FAUX (Avéré)"), quand=MAINTENANT - 40 * 86400)
+
+    classement = store.domaines_suspects(jours=30, min_analyses=3)
+    assert [d["domaine"] for d in classement] == ["douteux.fr", "serieux.fr"]
+    douteux = classement[0]
+    assert (douteux["analyses"], douteux["suspectes"], douteux["part_suspectes"]) == (4, 2, 0.5)
+    assert douteux["score_moyen"] == 15.0 and douteux["derniere"] == MAINTENANT
+    assert classement[1]["suspectes"] == 0
+    assert [d["domaine"] for d in store.domaines_suspects(min_analyses=1, limite=1)] == ["rare.fr"]
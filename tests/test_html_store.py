@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from modules import extractor as module_extractor
+from modules import html_store
+from modules.extractor import RobustExtractor
+from modules.html_store import HtmlStore, _compresser
+
+URL = "https://journal.fr/article"
+TEXTE = "Le texte complet de l'article, assez long pour être considéré comme valide. " * 3
+
+class Serveur:
+    """Remplace _fetch_html : répond 304 si l'ETag envoyé correspond (quand etag est fourni)."""
+    def __init__(self, html, etag=None):
+        self.html = html
+        self.etag = etag
+        self.requetes = []
+
+    def __call__(self, url, entetes=None):
+        self.requetes.append(dict(entetes or {}))
+        if self.etag and (entetes or {}).get("If-None-Match") == self.etag:
+            return None, 0, {}
+        return self.html, len(self.html), {"etag": self.etag, "last_modified": None}
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = HtmlStore(chemin=str(tmp_path / "pages.sqlite"), fraicheur=0)
+    monkeypatch.setattr(module_extractor, "get_html_store", lambda: store)
+    monkeypatch.setenv("FAKELAB_ROUTAGE", "0")
+    return store
+
+def extracteur(monkeypatch, serveur, titre="Titre"):
+    ex = RobustExtractor()
+    parsings = []
+
+    def parse(*_):
+        parsings.append(1)
+        return {"titre": titre, "texte": TEXTE}
+
+    monkeypatch.setattr(ex, "_fetch_html", serveur)
+    for nom in ("_parse_newspaper", "_parse_trafilatura", "_parse_readability"):
+        monkeypatch.setattr(ex, nom, parse)
+    return ex, parsings
+
+def test_revalidation_304_sans_parsing(store, monkeypatch):
+    serveur = Serveur("<html>v1</html>", etag='"v1"')
+    ex, parsings = extracteur(monkeypatch, serveur)
+    data, methode = ex.extract(URL)
+    n = len(parsings)
+    data2, methode2 = ex.extract(URL)
+    assert serveur.requetes[1] == {"If-None-Match": '"v1"'}
+    assert len(parsings) == n  # rien de re-parsé
+    assert (data2["titre"], data2["texte"], methode2) == (data["titre"], data["texte"], methode)
+    assert data2["stats_extraction"]["stockage"] == "304"
+    # Même empreinte HTML sur le chemin 304 : le verdict en cache reste valide
+    assert data2["stats_extraction"]["empreinte_html"] == data["stats_extraction"]["empreinte_html"] is not None
+    assert store.stats()["revalides_304"] == 1
+
+def test_html_identique_sans_validateurs_reprend_le_parsing(store, monkeypatch):
+    serveur = Serveur("<html>v1</html>")
+    ex, parsings = extracteur(monkeypatch, serveur)
+    ex.extract(URL)
+    n = len(parsings)
+    data, _ = ex.extract(URL)
+    assert len(parsings) == n
+    assert data["stats_extraction"]["stockage"] == "html_identique"
+    # Page modifiée : nouveau parsing
+    serveur.html = "<html>v2</html>"
+    data, _ = ex.extract(URL)
+    assert len(parsings) > n
+    assert "stockage" not in data["stats_extraction"]
+
+def test_extraction_sans_titre_non_stockee(store, monkeypatch):
+    ex, parsings = extracteur(monkeypatch, Serveur("<html>v1</html>", etag='"v1"'), titre=None)
+    ex.extract(URL)
+    assert store.get(URL)["extraction"] is None
+    n = len(parsings)
+    ex.extract(URL)  # 304, mais rien à rejouer : le HTML stocké est re-parsé
+    assert len(parsings) > n
+
+def test_extraction_d_une_ancienne_version_ignoree(store):
+    store.enregistrer_html(URL, "<html>v1</html>", 15)
+    ancienne = {"data": {"titre": "Titre (via Trafilatura)", "texte": TEXTE}, "methode": "Trafilatura"}
+    with store._connect() as conn:
+        conn.execute("UPDATE pages SET extraction = ?", (_compresser(json.dumps(ancienne)),))
+    assert store.get(URL)["extraction"] is None
+    store.enregistrer_extraction(URL, {"titre": "Titre", "texte": TEXTE}, "Newspaper3k")
+    assert store.get(URL)["extraction"]["data"]["titre"] == "Titre"
+
+def test_eviction_lru_par_taille(tmp_path, monkeypatch):
+    store = HtmlStore(chemin=str(tmp_path / "pages.sqlite"), max_bytes=2500)
+    horloge = iter(range(1000, 2000))
+    monkeypatch.setattr(html_store.time, "time", lambda: next(horloge))
+    pages = {f"https://a.fr/{i}": "".join(chr(0x4e00 + (i * 7919 + j * 104729) % 20000) for j in range(400))
+             for i in range(3)}
+    for url, html in list(pages.items())[:2]:
+        store.enregistrer_html(url, html, len(html))
+    store.get("https://a.fr/0")  # la page 0 devient la plus récemment lue
+    store.enregistrer_html("https://a.fr/2", pages["https://a.fr/2"], 400)
+    assert store.get("https://a.fr/1") is None
+    assert store.get("https://a.fr/0") is not None and store.get("https://a.fr/2") is not None
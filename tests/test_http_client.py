@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from modules import http_client
+
+class Gestionnaire(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.server.connexions.add(self.client_address)
+        if self.path == "/lent":
+            time.sleep(0.5)
+        corps = self.headers.get("User-Agent", "").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def serveur():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), Gestionnaire)
+    serveur.daemon_threads = True
+    serveur.connexions = set()
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    yield serveur, f"http://127.0.0.1:{serveur.server_address[1]}"
+    serveur.shutdown()
+    serveur.server_close()
+
+def test_session_partagee_et_connexion_reutilisee(serveur):
+    serveur, base = serveur
+    assert http_client.get_session() is http_client.get_session()
+    for _ in range(5):
+        reponse = http_client.get(base + "/")
+        assert reponse.text == http_client.USER_AGENT
+    # La variante asynchrone passe par le même pool
+    assert asyncio.run(http_client.async_get(base + "/")).status_code == 200
+    assert len(serveur.connexions) == 1
+
+def test_delai_par_defaut(serveur, monkeypatch):
+    _, base = serveur
+    monkeypatch.setattr(http_client, "DEFAULT_TIMEOUT", (1, 0.1))
+    debut = time.monotonic()
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        http_client.get(base + "/lent")
+    assert time.monotonic() - debut < 0.45
+    # Un délai explicite de l'appelant l'emporte
+    assert http_client.get(base + "/lent", timeout=5).status_code == 200
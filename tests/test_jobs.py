@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from modules.jobs import FileSaturee, JobManager
+
+def pipeline_bloque(feu, lances=None):
+    def pipeline(url, api_key):
+        if lances is not None:
+            lances.append(url)
+        feu.wait(timeout=5)
+        yield "resultat", {"url": url}
+    return pipeline
+
+def test_etapes_attente_bornee_puis_resultat():
+    feu = threading.Event()
+
+    def pipeline(url, api_key):
+        yield "reputation", {"R_source": 80}
+        feu.wait(timeout=5)
+        yield "resultat", {"verdict": "FIABLE"}
+
+    job = JobManager(max_workers=1, pipeline=pipeline).soumettre("https://a.fr/x", None)
+    evenements = job.etapes(0, timeout=2)
+    assert evenements[0][0] == "reputation"
+
+    # Rien de nouveau : rend la main après le délai, sans lever d'erreur
+    debut = time.monotonic()
+    assert job.etapes(len(evenements), timeout=0.2) == evenements
+    assert time.monotonic() - debut < 1
+    assert not job.termine
+
+    feu.set()
+    evenements = job.etapes(len(evenements), timeout=2)
+    assert evenements[-1] == ("resultat", {"verdict": "FIABLE"})
+    assert job.termine
+
+def test_meme_url_canonique_regroupee_en_vol():
+    feu, lances = threading.Event(), []
+    manager = JobManager(max_workers=1, pipeline=pipeline_bloque(feu, lances))
+    job = manager.soumettre("https://a.fr/x", None)
+    assert manager.soumettre("https://www.a.fr/x/?utm_source=tw#haut", None) is job
+    assert job.abonnes == 2
+    assert manager.stats()["regroupes"] == 1 and manager.stats()["soumis"] == 1
+    feu.set()
+    assert job.attendre(timeout=5) == {"url": "https://a.fr/x"}
+    assert lances == ["https://a.fr/x"]
+
+def test_file_saturee():
+    feu = threading.Event()
+    manager = JobManager(max_workers=1, max_file=2, pipeline=pipeline_bloque(feu))
+    try:
+        premier = manager.soumettre("https://a.fr/0", None)
+        # Le premier job quitte la file quand le worker le prend
+        for _ in range(100):
+            if premier.etat == "en_cours":
+                break
+            time.sleep(0.01)
+        manager.soumettre("https://a.fr/1", None)
+        manager.soumettre("https://a.fr/2", None)
+        with pytest.raises(FileSaturee):
+            manager.soumettre("https://a.fr/3", None)
+        # Une URL déjà en vol reste regroupée même file pleine
+        assert manager.soumettre("https://a.fr/2", None).abonnes == 2
+        assert manager.stats()["rejetes"] == 1
+    finally:
+        feu.set()
+
+def test_job_termine_plus_regroupe():
+    feu, lances = threading.Event(), []
+    feu.set()
+    manager = JobManager(max_workers=1, pipeline=pipeline_bloque(feu, lances))
+    premier = manager.soumettre("https://a.fr/x", None)
+    assert premier.attendre(timeout=5) is not None
+    second = manager.soumettre("https://a.fr/x", None)
+    assert second is not premier and second.abonnes == 1
+    second.attendre(timeout=5)
+    assert len(lances) == 2
+    assert manager.job(premier.id) is premier
@@ -0,0 +1,63 @@
+import json
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from modules.local_model import LocalSemanticModel, lire_historique
+
+NEUTRES = ["Selon le rapport publié par l'institut, la production a progressé de {n} % au dernier trimestre.",
+           "Le ministère indique dans un communiqué que {n} communes recevront une aide, précise la source.",
+           "D'après l'étude, {n} patients ont été suivis pendant deux ans, explique le chercheur."]
+CHOC = ["INCROYABLE !!! Vous ne devinerez jamais ce qu'ils nous cachent depuis {n} ans !",
+        "SCANDALE ! Je vous le dis : on nous ment, partagez avant que ce soit censuré !!! ({n})",
+        "Ce qu'ils ne veulent pas que vous sachiez ! Moi je sais, et c'est TERRIFIANT !!! {n}"]
+
+def corpus(taille=60):
+    alea = random.Random(1)
+    textes, cibles = [], []
+    for i in range(taille):
+        choc = i % 2
+        textes.append(alea.choice(CHOC if choc else NEUTRES).format(n=alea.randint(2, 90)))
+        cibles.append((8.5, 9.0, 8.0) if choc else (1.5, 1.0, 2.0))
+    return textes, cibles
+
+@pytest.fixture(scope="module")
+def modele():
+    return LocalSemanticModel.entrainer(*corpus())
+
+def test_separe_les_styles(modele):
+    _, a_sem_choc, couverture = modele.predire("SCANDALE ! Ce qu'ils nous cachent depuis 12 ans !!!")
+    _, a_sem_neutre, _ = modele.predire("Selon le rapport de l'institut, la production a progressé de 3 %.")
+    assert a_sem_choc > 65 > 35 > a_sem_neutre
+    assert couverture >= 0.5
+
+def test_analyse_sure_seulement_hors_bande_et_vocabulaire_connu(modele):
+    assert modele.est_sur(80, 0.9, (35, 65))
+    assert not modele.est_sur(50, 0.9, (35, 65))   # dans la bande d'incertitude
+    assert not modele.est_sur(80, 0.1, (35, 65))   # vocabulaire inconnu
+    analyse = modele.analyser("zxqv wlkj trpm qsdf")
+    assert analyse["modele_utilise"] == "local"
+    assert analyse["confiance_locale"]["couverture"] == 0.0
+    assert not analyse["confiance_locale"]["sur"]
+
+def test_sauvegarde_et_rechargement(modele, tmp_path):
+    chemin = str(tmp_path / "modele.npz")
+    modele.sauvegarder(chemin)
+    recharge = LocalSemanticModel.charger(chemin)
+    texte = "INCROYABLE !!! On nous ment depuis 40 ans !"
+    # Poids stockés en float32 : écart d'arrondi au plus
+    assert abs(recharge.predire(texte)[1] - modele.predire(texte)[1]) <= 0.2
+
+def test_historique_ne_garde_que_les_analyses_gemini(tmp_path):
+    def ligne(modele_utilise, contenu="texte"):
+        ia = {"modele_utilise": modele_utilise, "analyse_subjectivite": {"score": 3},
+              "analyse_clickbait": {"score": 4}, "analyse_preuves": {"score_manque_preuves": 5}}
+        return json.dumps({"url": "u", "resultat": {"contenu": contenu, "details_ia": ia}})
+    chemin = tmp_path / "resultats.jsonl"
+    chemin.write_text("\n".join([ligne("gemini-2.5-flash"), ligne("local"), ligne("aucun"),
+                                 ligne("gemini-2.5-flash", contenu=""), "{tronqué"]), encoding="utf-8")
+    textes, cibles = lire_historique([str(chemin)])
+    assert textes == ["texte"]
+    assert cibles == [(3.0, 4.0, 5.0)]
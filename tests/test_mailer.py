@@ -0,0 +1,93 @@
+import socket
+import threading
+
+import pytest
+
+from modules import mailer
+from modules.mailer import Mailer, get_mailer
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+class Boite:
+    """Serveur SMTP de test : garde les messages reçus et la connexion (port client) de chacun."""
+    def __init__(self, refus=0):
+        self.refus = refus  # nombre de DATA refusés (451) avant d'accepter
+        self.recus = []
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            if self.refus:
+                self.refus -= 1
+                return "451 Réessayez plus tard"
+            self.recus.append((session.peer, envelope.rcpt_tos[0]))
+        return "250 OK"
+
+    def connexions(self):
+        return {peer for peer, _ in self.recus}
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def serveur():
+    def demarrer(boite):
+        controleur = aiosmtpd_controller.Controller(boite, hostname="127.0.0.1", port=port_libre())
+        controleur.start()
+        demarres.append(controleur)
+        return controleur
+    demarres = []
+    yield demarrer
+    for controleur in demarres:
+        controleur.stop()
+
+def test_lot_sur_une_seule_connexion(serveur):
+    boite = Boite()
+    ctl = serveur(boite)
+    m = Mailer("fakelab@test.fr", None, hote=ctl.hostname, port=ctl.port, starttls=False)
+    envois = [m.envoyer(f"lecteur{i}@test.fr", "Rapport", "corps") for i in range(5)]
+    assert all(e.attendre(5) for e in envois)
+    # Un deuxième lot plus tard réutilise la connexion restée ouverte
+    assert m.envoyer("tardif@test.fr", "Rapport", "corps").attendre(5)
+    assert len(boite.recus) == 6
+    assert len(boite.connexions()) == 1
+    assert m.stats["connexions"] == 1
+    m.arreter()
+    m._thread.join(5)
+
+def test_reessai_apres_refus_temporaire(serveur, monkeypatch):
+    monkeypatch.setattr(mailer, "DELAI_BASE", 0.05)
+    boite = Boite(refus=1)
+    ctl = serveur(boite)
+    m = Mailer("fakelab@test.fr", None, hote=ctl.hostname, port=ctl.port, starttls=False)
+    envoi = m.envoyer("lecteur@test.fr", "Rapport", "corps")
+    assert envoi.attendre(5)
+    assert envoi.tentatives == 2
+    assert m.stats["reessais"] == 1
+    assert m.stats["connexions"] == 2  # connexion fermée après l'échec, puis rouverte
+    m.arreter()
+    m._thread.join(5)
+
+def test_arreter_vide_la_file_puis_ferme(serveur):
+    boite = Boite()
+    ctl = serveur(boite)
+    m = Mailer("fakelab@test.fr", None, hote=ctl.hostname, port=ctl.port, starttls=False)
+    envois = [m.envoyer(f"lecteur{i}@test.fr", "Rapport", "corps") for i in range(3)]
+    m.arreter()
+    refuse = m.envoyer("trop-tard@test.fr", "Rapport", "corps")
+    m._thread.join(5)
+    assert not m._thread.is_alive()
+    assert all(e.etat == "envoye" for e in envois)
+    assert refuse.etat == "echec"
+    assert m._smtp is None
+
+def test_changement_de_mot_de_passe_arrete_l_ancienne_file():
+    ancien = get_mailer("compte@test.fr", "ancien")
+    assert get_mailer("compte@test.fr", "ancien") is ancien
+    nouveau = get_mailer("compte@test.fr", "nouveau")
+    assert nouveau is not ancien
+    ancien._thread.join(5)
+    assert not ancien._thread.is_alive()
+    nouveau.arreter()
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from modules import near_duplicates
+from modules.near_duplicates import NearDuplicateIndex
+
+def article(graine, mots=200):
+    alea = random.Random(graine)
+    return " ".join(f"mot{alea.randint(0, 5000)}" for _ in range(mots))
+
+@pytest.fixture
+def index(tmp_path):
+    return NearDuplicateIndex(chemin=str(tmp_path / "doublons.sqlite"), seuil=0.8)
+
+def test_reprise_quasi_identique_retrouvee(index):
+    original = article(1)
+    index.ajouter("https://source.fr/a", original, {"V_fact": "NOT_FOUND"})
+    # Même texte avec une phrase d'accroche ajoutée par le site qui le reprend
+    repris = "Article repris de notre partenaire " + original
+    trouve = index.chercher(repris)
+    assert trouve["url"] == "https://source.fr/a"
+    assert trouve["similarite"] >= 0.8
+    assert trouve["donnees"] == {"V_fact": "NOT_FOUND"}
+
+def test_texte_different_ou_trop_court_ignore(index):
+    index.ajouter("https://source.fr/a", article(1), {})
+    assert index.chercher(article(2)) is None
+    assert index.signature("trop court pour une signature") is None
+    assert index.chercher("trop court pour une signature") is None
+
+def test_persistance_et_ttl(tmp_path, monkeypatch):
+    chemin = str(tmp_path / "doublons.sqlite")
+    NearDuplicateIndex(chemin=chemin).ajouter("https://source.fr/a", article(1), {"n": 1})
+    # Un autre processus relit les signatures depuis SQLite
+    autre = NearDuplicateIndex(chemin=chemin)
+    assert len(autre) == 1
+    assert autre.chercher(article(1))["similarite"] == 1.0
+    # Au-delà du TTL, l'analyse n'est plus réutilisée
+    horloge = near_duplicates.time.time() + 2 * near_duplicates.TTL
+    monkeypatch.setattr(near_duplicates.time, "time", lambda: horloge)
+    assert autre.chercher(article(1)) is None
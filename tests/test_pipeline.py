@@ -0,0 +1,124 @@
+"""Pipeline avec étapes simulées : modes concurrent et séquentiel, Fact-Check qui tranche."""
+import threading
+import time
+
+import pytest
+
+import pipeline
+from pipeline import iter_fakelab_pipeline, run_fakelab_pipeline
+
+URL = "https://journal.fr/article"
+EXTRACTION = {"titre": "Titre", "contenu": "Le texte de l'article.", "methode_extraction": "Newspaper3k",
+              "empreinte_html": None}
+REPUTATION = {"R_source": 80.0, "details_reputation": {"status": "FIABLE", "source": "liste", "details": ""}}
+ANALYSE = {"A_sem": 30.0, "analyse_subjectivite": {"score": 3}}
+VRAI = {"V_fact": "NOT_FOUND", "preuves_factcheck": []}
+FAUX = {"V_fact": "FOUND_FAKE", "preuves_factcheck": [{"text": "claim"}]}
+
+def installer(monkeypatch, extraction=EXTRACTION, factcheck=VRAI, semantique=ANALYSE, gemini_libere=None):
+    appels = []
+
+    def etape_semantique(contenu, api_key, trace=None, titre=None):
+        appels.append(titre)
+        if gemini_libere is not None:
+            gemini_libere.wait(5)
+        return dict(semantique)
+
+    erreur = None if extraction else {"error": "Impossible d'extraire le contenu de cette page."}
+    monkeypatch.setattr(pipeline, "_etape_extraction", lambda url, trace=None: (extraction and dict(extraction), erreur))
+    monkeypatch.setattr(pipeline, "_etape_reputation", lambda url, trace=None: dict(REPUTATION))
+    monkeypatch.setattr(pipeline, "_etape_factcheck", lambda titre, trace=None: dict(factcheck))
+    monkeypatch.setattr(pipeline, "_etape_semantique", etape_semantique)
+    monkeypatch.setattr(pipeline, "get_near_duplicate_index", lambda: None)
+    monkeypatch.setattr(pipeline, "get_history_store", lambda: None)
+    return appels
+
+@pytest.mark.parametrize("scenario", [
+    {},
+    {"factcheck": FAUX},
+    {"semantique": {"error": "Clé API manquante"}},
+    {"extraction": None},
+])
+def test_modes_concurrent_et_sequentiel_identiques(monkeypatch, scenario):
+    installer(monkeypatch, **scenario)
+    concurrent = run_fakelab_pipeline(URL, "cle", concurrent=True, use_cache=False)
+    sequentiel = run_fakelab_pipeline(URL, "cle", concurrent=False, use_cache=False)
+    assert concurrent == sequentiel
+    assert ("verdict" in concurrent) is (not scenario or "factcheck" in scenario)
+
+def test_fake_avere_n_attend_pas_l_analyse_ia(monkeypatch):
+    gemini_libere = threading.Event()
+    installer(monkeypatch, factcheck=FAUX, semantique={"A_sem": 0.0}, gemini_libere=gemini_libere)
+    try:
+        etapes = list(iter_fakelab_pipeline(URL, "cle", concurrent=True, use_cache=False))
+        # Résultat obtenu alors que l'appel IA est toujours en cours
+        assert not gemini_libere.is_set()
+    finally:
+        gemini_libere.set()
+    noms = [e for e, _ in etapes]
+    assert "semantique" not in noms and noms[-1] == "resultat"
+    resultat = etapes[-1][1]
+    assert (resultat["verdict"], resultat["S_final"], resultat["A_sem"]) == ("FAUX (Avéré)", 0.0, 100)
+    assert resultat["details_ia"] is None
+
+def noms(etapes):
+    return [e for e, _ in etapes]
+
+def test_etapes_du_mode_sequentiel(monkeypatch):
+    installer(monkeypatch)
+    etapes = list(iter_fakelab_pipeline(URL, "cle", concurrent=False, use_cache=False))
+    assert noms(etapes) == ["extraction", "reputation", "factcheck", "semantique", "resultat"]
+    assert etapes[0][1] == EXTRACTION and etapes[1][1] == REPUTATION
+    assert etapes[2][1] == VRAI and etapes[3][1] == ANALYSE
+    resultat = etapes[-1][1]
+    assert resultat["titre"] == "Titre" and resultat["R_source"] == 80.0 and resultat["A_sem"] == 30.0
+    assert resultat["details_ia"] == ANALYSE and "timings" not in resultat
+
+def test_reputation_publiee_avant_la_fin_de_l_extraction(monkeypatch):
+    installer(monkeypatch)
+    reputation_prete = threading.Event()
+
+    def reputation(url, trace=None):
+        reputation_prete.set()
+        return dict(REPUTATION)
+
+    def extraction(url, trace=None):
+        reputation_prete.wait(5)
+        time.sleep(0.05)
+        return dict(EXTRACTION), None
+
+    monkeypatch.setattr(pipeline, "_etape_reputation", reputation)
+    monkeypatch.setattr(pipeline, "_etape_extraction", extraction)
+    etapes = noms(iter_fakelab_pipeline(URL, "cle", concurrent=True, use_cache=False))
+    assert etapes[:2] == ["reputation", "extraction"]
+    assert sorted(etapes[2:4]) == ["factcheck", "semantique"] and etapes[4:] == ["resultat"]
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_erreur_d_extraction_seul_evenement(monkeypatch, concurrent):
+    installer(monkeypatch, extraction=None)
+    etapes = [(e, d) for e, d in iter_fakelab_pipeline(URL, "cle", concurrent=concurrent, use_cache=False)
+              if e != "reputation"]
+    assert etapes == [("resultat", {"error": "Impossible d'extraire le contenu de cette page."})]
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_verdict_en_cache(monkeypatch, concurrent):
+    appels = installer(monkeypatch)
+    en_cache = {"verdict": "FIABLE", "S_final": 80.0}
+
+    class Cache:
+        def get(self, url, empreinte_texte, empreinte_html=None):
+            return dict(en_cache)
+
+    monkeypatch.setattr(pipeline, "get_result_cache", Cache)
+    etapes = [e for e in iter_fakelab_pipeline(URL, "cle", concurrent=concurrent) if e[0] != "reputation"]
+    assert etapes == [("extraction", EXTRACTION), ("resultat", en_cache)]
+    assert run_fakelab_pipeline(URL, "cle", concurrent=concurrent) == en_cache
+    assert appels == []  # ni Fact-Check ni IA
+
+def test_run_renvoie_le_dernier_evenement(monkeypatch):
+    installer(monkeypatch)
+    dernier = list(iter_fakelab_pipeline(URL, "cle", use_cache=False))[-1][1]
+    resultat = run_fakelab_pipeline(URL, "cle", use_cache=False, timings=True)
+    chronos = resultat.pop("timings")
+    assert resultat == dernier
+    assert "pipeline" in {s["etape"] for s in chronos}
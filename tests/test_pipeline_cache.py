@@ -0,0 +1,40 @@
+"""Verdicts provisoires ou dégradés : jamais gardés dans le cache des résultats."""
+from modules.tracing import Trace
+from pipeline import _finaliser, _vers_cache
+
+class CacheEspion:
+    def __init__(self):
+        self.ecrits = []
+
+    def set(self, url, empreinte, resultats, empreinte_html=None):
+        self.ecrits.append(url)
+
+def _finaliser_avec(issue_wiki=None, issue_fact="ok"):
+    trace = Trace()
+    if issue_wiki:
+        trace.ajouter("reputation.wikipedia", 0.0, issue=issue_wiki)
+    trace.ajouter("factcheck", 0.0, issue=issue_fact)
+    resultats = {"R_source": 100.0, "V_fact": "NOT_FOUND"}
+    return _finaliser(resultats, {"A_sem": 20.0}, trace)
+
+def test_verdict_complet_mis_en_cache():
+    cache = CacheEspion()
+    resultats = _finaliser_avec(issue_wiki="appel")
+    assert "reputation_provisoire" not in resultats
+    _vers_cache(cache, "https://a.fr/x", ("e", None), resultats)
+    assert cache.ecrits == ["https://a.fr/x"]
+
+def test_wikipedia_differe_non_mis_en_cache():
+    cache = CacheEspion()
+    resultats = _finaliser_avec(issue_wiki="differe")
+    assert resultats["reputation_provisoire"] is True
+    assert "verdict" in resultats
+    _vers_cache(cache, "https://a.fr/x", ("e", None), resultats)
+    assert cache.ecrits == []
+
+def test_service_degrade_non_mis_en_cache():
+    cache = CacheEspion()
+    resultats = _finaliser_avec(issue_fact="degrade")
+    assert resultats["services_degrades"] == ["factcheck"]
+    _vers_cache(cache, "https://a.fr/x", ("e", None), resultats)
+    assert cache.ecrits == []
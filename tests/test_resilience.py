@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+from modules import resilience
+from modules.resilience import (BudgetReessais, DEMI_OUVERT, Disjoncteur, FERME, OUVERT, SeauJetons,
+                                Service, ServiceIndisponible)
+
+class Panne(OSError):
+    pass
+
+def service(seuil=2, delai=0.05, reessais=2):
+    s = Service("test", 0, 1, reessais=reessais)
+    s.disjoncteur = Disjoncteur("test", seuil=seuil, delai=delai)
+    return s
+
+def en_panne():
+    raise Panne("connexion refusée")
+
+@pytest.fixture(autouse=True)
+def sans_attente(monkeypatch):
+    monkeypatch.setattr(resilience, "DELAI_BASE", 0.0)
+
+def test_transitions_du_disjoncteur():
+    d = Disjoncteur("test", seuil=2, delai=0.05)
+    assert d.autoriser()
+    d.panne()
+    assert d.etat == FERME
+    d.panne()
+    assert d.etat == OUVERT and d.ouvertures == 1
+    assert not d.autoriser()
+    time.sleep(0.06)
+    assert d.autoriser() and d.etat == DEMI_OUVERT
+    d.panne()  # l'essai échoue : réouverture immédiate
+    assert d.etat == OUVERT and d.ouvertures == 2
+    time.sleep(0.06)
+    assert d.autoriser()
+    d.succes()
+    assert d.etat == FERME and d.pannes == 0
+
+def test_demi_ouvert_un_seul_essai():
+    s = service()
+    for _ in range(2):
+        with pytest.raises(ServiceIndisponible):
+            s.essayer(en_panne)
+    time.sleep(0.06)
+    essai_lance, fin = threading.Event(), threading.Event()
+
+    def essai_lent():
+        essai_lance.set()
+        fin.wait(5)
+        return "ok"
+
+    t = threading.Thread(target=lambda: s.essayer(essai_lent))
+    t.start()
+    essai_lance.wait(5)
+    # Pendant l'essai, les autres appels sont refusés sans être tentés
+    with pytest.raises(ServiceIndisponible) as refus:
+        s.essayer(lambda: "ok")
+    assert refus.value.refus
+    fin.set()
+    t.join(5)
+    assert s.disjoncteur.etat == FERME
+    assert s.essayer(lambda: "ok") == "ok"
+
+def test_interruption_pendant_l_essai_libere_le_circuit():
+    s = service()
+    for _ in range(2):
+        with pytest.raises(ServiceIndisponible):
+            s.essayer(en_panne)
+    time.sleep(0.06)
+
+    def interrompu():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        s.essayer(interrompu)
+    assert s.disjoncteur.etat == DEMI_OUVERT
+    # Un nouvel essai reste possible et referme le circuit
+    assert s.essayer(lambda: "ok") == "ok"
+    assert s.disjoncteur.etat == FERME
+
+def test_erreur_de_requete_propagee_sans_reessai():
+    s = service()
+    appels = []
+
+    def refusee():
+        appels.append(1)
+        raise ValueError("clé invalide")
+
+    with pytest.raises(ValueError):
+        s.appeler(refusee)
+    assert len(appels) == 1
+    assert s.stats()["erreurs"] == 1 and s.disjoncteur.pannes == 0
+
+def test_reessais_puis_abandon():
+    s = service(seuil=10, reessais=2)
+    appels = []
+
+    def instable():
+        appels.append(1)
+        if len(appels) < 3:
+            raise Panne("délai dépassé")
+        return "ok"
+
+    assert s.appeler(instable) == "ok"
+    assert s.stats()["reessais"] == 2
+    appels.clear()
+    with pytest.raises(ServiceIndisponible) as e:
+        s.appeler(en_panne)
+    assert isinstance(e.value.__cause__, Panne)
+
+def test_budget_de_reessais():
+    budget = BudgetReessais(ratio=0.2, minimum=1, fenetre=60)
+    for _ in range(10):
+        budget.appel()
+    # 1 + 0.2 * 10 = 3 réessais sur la fenêtre, pas un de plus
+    assert [budget.reessayer() for _ in range(4)] == [True, True, True, False]
+    for _ in range(5):
+        budget.appel()
+    assert budget.reessayer()
+
+def test_budget_epuise_coupe_les_reessais():
+    s = service(seuil=100, reessais=5)
+    s.budget = BudgetReessais(ratio=0.0, minimum=2, fenetre=60)
+    for _ in range(3):
+        with pytest.raises(ServiceIndisponible):
+            s.appeler(en_panne)
+    # 2 réessais permis en tout sur la fenêtre, quel que soit le nombre d'appels
+    assert s.stats()["reessais"] == 2
+    assert s.stats()["pannes"] == 5
+
+def test_seau_de_jetons():
+    seau = SeauJetons(debit=10, rafale=2)
+    assert seau.prendre(0) and seau.prendre(0)
+    assert not seau.prendre(0.01)   # rafale épuisée, prochain jeton dans 0.1 s
+    debut = time.monotonic()
+    assert seau.prendre(1)
+    assert 0.05 < time.monotonic() - debut < 0.5
+    assert SeauJetons(debit=0, rafale=1).prendre(0)  # illimité
+
+def test_quota_refuse_libere_l_essai():
+    s = service()
+    s.seau = SeauJetons(debit=0.001, rafale=1)
+    assert s.essayer(lambda: "ok") == "ok"
+    s.disjoncteur.etat = DEMI_OUVERT
+    with pytest.raises(ServiceIndisponible) as e:
+        s.essayer(lambda: "ok")
+    assert e.value.raison == "quota dépassé"
+    assert not s.disjoncteur._essai_en_cours
@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from modules.scoring import (FAUX_AVERE, VERDICTS, comparer_poids, poids_depuis, score_final,
+                             scorer_lot, verdict)
+
+CODES_V = {0: "FOUND_FAKE", 1: "NOT_FOUND", 2: "FOUND_TRUE"}
+
+def attendus(r, v, a, poids=None, seuils=None):
+    """Résultat de la version unitaire, telle qu'appliquée par le pipeline (FOUND_FAKE -> 0)."""
+    scores, verdicts = [], []
+    for ri, vi, ai in zip(r.tolist(), v.tolist(), a.tolist()):
+        if CODES_V[vi] == "FOUND_FAKE":
+            scores.append(0.0)
+            verdicts.append("FAUX (Avéré)")
+        else:
+            s = score_final(ri, CODES_V[vi], ai, poids)
+            scores.append(s)
+            verdicts.append(verdict(s, seuils))
+    return scores, verdicts
+
+@pytest.mark.parametrize("poids", [None, "0.4,0.4,0.2", "0.35,0.45,0.2", "0.333,0.333,0.334"])
+def test_parite_avec_le_calcul_unitaire(poids):
+    poids = poids_depuis(poids) if poids else None
+    rng = np.random.default_rng(7)
+    n = 20000
+    # Valeurs au dixième (comme en production, où les arrondis tombent sur x,x5) et valeurs quelconques
+    r = np.concatenate([rng.integers(0, 1001, n) / 10, rng.uniform(0, 100, n)])
+    a = np.concatenate([rng.integers(0, 1001, n) / 10, rng.uniform(0, 100, n)])
+    v = rng.choice(np.array([0, 1, 2], dtype=np.int8), 2 * n, p=[0.05, 0.9, 0.05])
+    s, codes = scorer_lot(r, v, a, poids)
+    scores, verdicts = attendus(r, v, a, poids)
+    assert s.tolist() == scores
+    assert [VERDICTS[c] for c in codes] == verdicts
+
+def test_seuils_appliques_au_score_arrondi():
+    # 0.5 * 80 + 0.3 * 50 + 0.2 * (100 - 0.3) = 74.94 -> affiché 74.9 : DOUTEUX dans les deux versions
+    s_unitaire = score_final(80, "NOT_FOUND", 0.3)
+    s, codes = scorer_lot([80.0], ["NOT_FOUND"], [0.3])
+    assert s[0] == s_unitaire == 74.9
+    assert VERDICTS[codes[0]] == verdict(s_unitaire) == "DOUTEUX"
+    s, codes = scorer_lot([80.0], ["NOT_FOUND"], [0.2])
+    assert s[0] == score_final(80, "NOT_FOUND", 0.2) == 75.0
+    assert VERDICTS[codes[0]] == "FIABLE"
+
+def test_chaines_de_v_fact_et_fake():
+    s, codes = scorer_lot([90.0, 90.0, 90.0], ["FOUND_FAKE", "FOUND_TRUE", "INCONNU"], [10.0, 10.0, 10.0])
+    assert s.tolist() == [0.0, 93.0, 78.0]
+    assert codes[0] == FAUX_AVERE
+
+def test_comparer_poids():
+    r = np.array([80.0, 50.0, 20.0])
+    v = np.array([1, 1, 0], dtype=np.int8)
+    a = np.array([20.0, 50.0, 90.0])
+    assert comparer_poids(r, v, a, poids_depuis("0.5,0.3,0.2"))["bascules"] == 0
+    # Tout le poids sur la réputation : 71 -> 80 devient FIABLE, 50 passe sous le seuil DOUTEUX (55)
+    rapport = comparer_poids(r, v, a, poids_depuis("1,0,0"), seuils_proposes=(60, 55))
+    assert rapport["transitions"] == {"DOUTEUX -> FIABLE": 1, "DOUTEUX -> TROMPEUR / FAUX": 1}
+    assert rapport["bascules"] == 2
+    assert rapport["repartition"]["FAUX (Avéré)"] == {"avant": 1, "apres": 1}
@@ -0,0 +1,28 @@
+from modules.text_reducer import decouper_morceaux, estimer_tokens, reduire
+
+def test_texte_sans_fin_de_phrase_coupe_au_budget():
+    reduit = reduire("mot " * 20000, 1000, "T")
+    assert reduit.startswith("Titre : T mot mot")
+    assert reduit.endswith("[…]")
+    assert 900 < estimer_tokens(reduit) <= 1000
+
+def test_phrase_unique_trop_longue_coupee_sur_un_mot():
+    phrase = "Selon le rapport " + "très " * 3000 + "long."
+    reduit = reduire(phrase, 500)
+    assert estimer_tokens(reduit) <= 500
+    assert reduit.startswith("Selon le rapport très")
+    assert all(m in ("très", "[…]", "Selon", "le", "rapport") for m in reduit.split())
+
+def test_phrases_informatives_gardees_dans_l_ordre():
+    texte = " ".join(["Intertitre."] + [f"Phrase de remplissage numéro {i} sans intérêt particulier." for i in range(200)]
+                     + ["Selon le ministère, 42 % des écoles sont concernées."])
+    reduit = reduire(texte, 100)
+    assert estimer_tokens(reduit) <= 100
+    assert reduit.startswith("Intertitre.")
+    assert "Selon le ministère, 42 % des écoles sont concernées." in reduit
+    assert "[…]" in reduit
+
+def test_morceaux_bornes_meme_sans_ponctuation():
+    morceaux = decouper_morceaux(("mot " * 20000).strip(), 1500)
+    assert len(morceaux) == 8
+    assert all(estimer_tokens(m) <= 1500 for m in morceaux)